@@ -1,30 +1,22 @@
-def quantum_strategy(x,y):
+import os,sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def quantum_strategy_circuit(x,y):
     """
-    Runs the optimal quantum strategy for the CHSH game.
+    Builds the circuit for the optimal quantum strategy of the CHSH game.
 
     Args:
         x (int): bit representing Alice's question
         y (int): bit representing Bob's question
 
     Returns:
-        a (int): bit representing Alice's answer
-        b (int): bit representing Bob's answer
-    
-    Raises:
-        TypeError: if either x or y is not an integer
-        ValueError: if either x or y is not in the set {0,1}
-    
+        qc (QuantumCircuit): circuit preparing the shared Bell pair, applying Alice's and Bob's rotations and measuring both qubits
+
     Notes:
-        -Uses QuantumCircuit, numpy, and AerSimulator packages
+        -Uses QuantumCircuit and numpy packages
     """
-    if not all(isinstance(i,int) for i in [x,y]):
-        raise TypeError("x and y must both be integers")
-    if not all(i in [0,1] for i in [x,y]):
-        raise ValueError('x and y must both be either 0 or 1')
-
     from qiskit import QuantumCircuit
     from numpy import pi
-    from qiskit_aer import AerSimulator
 
     qc=QuantumCircuit(2,2)
     
@@ -46,11 +38,44 @@ def quantum_strategy(x,y):
         qc.ry(pi/4,1)
 
     qc.measure([0,1],[0,1])
+    return qc
+
+def quantum_strategy(x,y):
+    """
+    Runs the optimal quantum strategy for the CHSH game.
+
+    Args:
+        x (int): bit representing Alice's question
+        y (int): bit representing Bob's question
 
-    sim=AerSimulator()
-    result=sim.run(qc,shots=1).result().get_counts()
-    a=int(list(result.keys())[0][0])
-    b=int(list(result.keys())[0][1])
+    Returns:
+        a (int): bit representing Alice's answer
+        b (int): bit representing Bob's answer
+    
+    Raises:
+        TypeError: if either x or y is not an integer
+        ValueError: if either x or y is not in the set {0,1}
+    
+    Notes:
+        -Uses QuantumCircuit and numpy packages; answers are drawn from the exact distribution held in result_cache
+    """
+    if not all(isinstance(i,int) for i in [x,y]):
+        raise TypeError("x and y must both be integers")
+    if not all(i in [0,1] for i in [x,y]):
+        raise ValueError('x and y must both be either 0 or 1')
+
+    import result_cache
+    import tracing
+
+    with tracing.span('chsh_quantum_strategy',x=x,y=y):
+        with tracing.span('construct') as s:
+            qc=quantum_strategy_circuit(x,y)
+            s.set_circuit(qc)
+
+        result=result_cache.sample(qc,shots=1)
+        with tracing.span('parse_counts'):
+            a=int(list(result.keys())[0][0])
+            b=int(list(result.keys())[0][1])
     return a,b
 
 def classical_strategy(x,y):
@@ -87,6 +112,224 @@ def classical_strategy(x,y):
     
     return a,b
 
+def random_quantum_circuit(alice_phase,bob_phase):
+    """
+    Builds the circuit for a quantum CHSH strategy with fixed rotation angles.
+
+    Args:
+        alice_phase (float): angle of Alice's ry rotation
+        bob_phase (float): angle of Bob's ry rotation
+
+    Returns:
+        qc (QuantumCircuit): circuit preparing the shared Bell pair, applying both rotations and measuring both qubits
+
+    Notes:
+        -Uses QuantumCircuit package
+    """
+    from qiskit import QuantumCircuit
+
+    qc=QuantumCircuit(2,2)
+    
+    #create entangled state
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.barrier()
+
+    #Alice applies her gate
+    qc.ry(alice_phase,0)
+    
+    #Bob applies his gate
+    qc.ry(bob_phase,1)
+
+    qc.measure([0,1],[0,1])
+    return qc
+
+def rotated_bell_distribution(alice_phases,bob_phases):
+    """
+    Computes the exact answer distribution when Alice and Bob rotate a shared |φ+⟩ pair by ry angles.
+
+    Args:
+        alice_phases (float or numpy.ndarray): angles of Alice's ry rotation
+        bob_phases (float or numpy.ndarray): angles of Bob's ry rotation, broadcast against alice_phases
+    Returns:
+        probabilities (numpy.ndarray): array of shape (..., 4) giving the probability of answers (a,b) at index 2*a+b
+
+    Notes:
+        -Uses numpy package
+        -Matches the circuit built by random_quantum_circuit without running a simulator
+    """
+    import numpy as np
+
+    def ry(theta):
+        c=np.cos(np.asarray(theta,dtype=float)/2)
+        s=np.sin(np.asarray(theta,dtype=float)/2)
+        return np.stack([np.stack([c,-s],axis=-1),np.stack([s,c],axis=-1)],axis=-2)
+
+    #amplitudes of |φ+⟩ as a matrix indexed [qubit 1, qubit 0]
+    bell=np.eye(2)/np.sqrt(2)
+    alice,bob=np.broadcast_arrays(np.asarray(alice_phases,dtype=float),np.asarray(bob_phases,dtype=float))
+    amplitudes=np.einsum('...ij,jk,...lk->...il',ry(bob),bell,ry(alice))
+    return (amplitudes**2).reshape(alice.shape+(4,))
+
+
+class AngleTable:
+    """
+    Lookup table of exact answer distributions for the rotated Bell-pair strategy on a grid of angles.
+
+    Angles are pi/denominator*k for k in [-denominator, denominator], the grid that random_quantum_strategy draws from
+    when denominator is 8. Rows (one per Alice angle) are computed lazily with numpy, so finer grids only pay for the
+    angles that are actually used. The distribution does not depend on the referee's questions, which only decide
+    whether equal or different answers win.
+
+    Args:
+        denominator (int): grid spacing is pi/denominator
+        path (str): .npz file to load previously computed rows from and save to (optional)
+    Raises:
+        TypeError: if denominator is not an integer
+        ValueError: if denominator is not positive
+    """
+    def __init__(self,denominator=8,path=None):
+        if not isinstance(denominator,int):
+            raise TypeError('denominator must be a positive integer.')
+        if not (denominator>0):
+            raise ValueError('denominator must be a positive integer.')
+
+        import numpy as np
+        import os
+
+        self.denominator=denominator
+        self.angles=np.pi/denominator*np.arange(-denominator,denominator+1)
+        self.path=path
+        self._rows={}
+
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self):
+        return len(self.angles)
+
+    def _check_index(self,index,name):
+        import numbers
+
+        if isinstance(index,bool) or not isinstance(index,numbers.Integral):
+            raise TypeError(f'{name} must be an integer.')
+        if not (0<=index<len(self)):
+            raise IndexError(f'{name} must be between 0 and {len(self)-1} (inclusive).')
+        return int(index)
+
+    def row(self,alice_index):
+        """
+        Returns the answer distributions for one of Alice's angles against every one of Bob's angles, shape (K, 4).
+
+        Raises:
+            TypeError: if alice_index is not an integer
+            IndexError: if alice_index is not between 0 and K-1
+        """
+        alice_index=self._check_index(alice_index,'alice_index')
+        if alice_index not in self._rows:
+            self._rows[alice_index]=rotated_bell_distribution(self.angles[alice_index],self.angles)
+        return self._rows[alice_index]
+
+    def distribution(self,alice_index,bob_index):
+        """
+        Returns the answer distribution, shape (4,), for grid indices of Alice's and Bob's angles.
+
+        Raises:
+            TypeError: if either index is not an integer
+            IndexError: if either index is not between 0 and K-1
+        """
+        bob_index=self._check_index(bob_index,'bob_index')
+        return self.row(alice_index)[bob_index]
+
+    def fill(self):
+        """
+        Computes every missing row and returns the full table, shape (K, K, 4).
+        """
+        import numpy as np
+
+        missing=[i for i in range(len(self)) if i not in self._rows]
+        if missing:
+            block=rotated_bell_distribution(self.angles[missing][:,None],self.angles[None,:])
+            for i,row in zip(missing,block):
+                self._rows[i]=row
+        return np.stack([self._rows[i] for i in range(len(self))])
+
+    def win_probabilities(self,question=None):
+        """
+        Win probability of every angle pair, shape (K, K), e.g. for a heat map.
+
+        Args:
+            question (tuple): referee question (x,y). If None, average over the four equally likely questions
+        """
+        table=self.fill()
+        equal=table[...,0]+table[...,3]
+        if question is None:
+            return (3*equal+(1-equal))/4
+        (x,y)=question
+        return 1-equal if (x and y) else equal
+
+    def mean_distribution(self):
+        """
+        Answer distribution, shape (4,), when both angles are drawn uniformly from the grid.
+        """
+        return self.fill().mean(axis=(0,1))
+
+    def save(self,path=None):
+        """
+        Saves the rows computed so far to an .npz file.
+        """
+        import numpy as np
+
+        path=path or self.path
+        if path is None:
+            raise ValueError('A path is needed to save the table.')
+        indices=sorted(self._rows)
+        rows=np.stack([self._rows[i] for i in indices]) if indices else np.zeros((0,len(self),4))
+        np.savez(path,denominator=self.denominator,indices=np.array(indices,dtype=int),rows=rows)
+
+    def load(self,path):
+        """
+        Loads rows previously saved for the same grid.
+        """
+        import numpy as np
+
+        with np.load(path) as data:
+            if int(data['denominator'])!=self.denominator:
+                raise ValueError('Saved table was computed for a different grid.')
+            for i,row in zip(data['indices'],data['rows']):
+                self._rows[int(i)]=row
+
+
+_angle_tables={}
+
+def angle_table(denominator=8,path=None):
+    """
+    Returns the shared AngleTable for a grid, creating (or loading) it on first use.
+
+    Args:
+        denominator (int): grid spacing is pi/denominator
+        path (str): .npz file to persist the table in (optional). If the shared table was created without it (or
+                    with another path), rows saved there are loaded into it and the full table is saved there
+    Returns:
+        table (AngleTable): lookup table for the grid
+    """
+    import os
+
+    table=_angle_tables.get(denominator)
+    if table is None:
+        table=_angle_tables[denominator]=AngleTable(denominator,path)
+    elif path is not None and path!=table.path:
+        if os.path.exists(path):
+            table.load(path)
+        table.path=path
+    else:
+        return table
+    if path is not None:
+        table.fill()
+        table.save()
+    return table
+
+
 def random_quantum_strategy(x,y):
     """
     Runs a random quantum strategy for the CHSH game.
@@ -104,41 +347,25 @@ def random_quantum_strategy(x,y):
         ValueError: if either x or y is not in the set {0,1}
     
     Notes:
-        -Uses QuantumCircuit, numpy, random, and AerSimulator packages
+        -Uses random package and the precomputed AngleTable, so no circuit is simulated
     """
     if not all(isinstance(i,int) for i in [x,y]):
         raise TypeError("x and y must both be integers")
     if not all(i in [0,1] for i in [x,y]):
         raise ValueError('x and y must both be either 0 or 1')
 
-    from qiskit import QuantumCircuit
-    from numpy import pi
     import random
-    from qiskit_aer import AerSimulator
 
-    qc=QuantumCircuit(2,2)
-    
-    #create entangled state
-    qc.h(0)
-    qc.cx(0, 1)
-    qc.barrier()
+    table=angle_table(8)
 
-    #create random phases
-    alice_phase=pi/8*random.randint(-8,8)
-    bob_phase=pi/8*random.randint(-8,8)
+    #create random phases, as indices into the grid pi/8*k for k in [-8,8]
+    alice_index=random.randint(0,len(table)-1)
+    bob_index=random.randint(0,len(table)-1)
 
-    #Alice applies her gate
-    qc.ry(alice_phase,0)
-    
-    #Bob applies his gate
-    qc.ry(bob_phase,1)
-
-    qc.measure([0,1],[0,1])
-
-    sim=AerSimulator()
-    result=sim.run(qc,shots=1).result().get_counts()
-    a=int(list(result.keys())[0][0])
-    b=int(list(result.keys())[0][1])
+    probabilities=table.distribution(alice_index,bob_index)
+    outcome=random.choices(range(4),weights=probabilities)[0]
+    a=outcome>>1
+    b=outcome&1
 
     return a,b
 
@@ -188,11 +415,11 @@ def chsh_game(strategy):
         TypeError: if strategy is not inputed as a string
         ValueError: if strategy is not quantum, classical, random_quantum or random_classical
     """
+    if not isinstance(strategy,str):
+        raise TypeError('Strategy must be given as a string.')
     strategy=strategy.lower()
     if not strategy in ['classical','quantum','random_quantum','random_classical']:
         raise ValueError('Strategy must either be quantum or classical.')
-    if not isinstance(strategy,str):
-        raise TypeError('Strategy must be given as a string.')
 
     import random
     referee_choices=[(0,0),(0,1),(1,0),(1,1)]
@@ -216,12 +443,332 @@ def chsh_game(strategy):
     else:
         return 0 #lose
 
-def winning_chance(strategy):
+def strategy_distributions(strategy):
+    """
+    Computes the exact joint answer distribution of a CHSH strategy for each of the referee's questions.
+
+    Args:
+        strategy (str): strategy to use
+    Returns:
+        distributions (numpy.ndarray): 4x4 array whose row 2*x+y holds the probabilities of the answers (a,b), indexed by 2*a+b
+
+    Raises:
+        TypeError: if strategy is not a string
+        ValueError: if strategy is not quantum, classical, random_quantum or random_classical
+
+    Notes:
+        -Uses numpy and prefix_sharing, which simulates the shared Bell pair once and branches the four referee circuits from it. No circuit is sampled.
+        -The random_quantum strategy is averaged over the precomputed AngleTable
+        -Answer indices follow quantum_strategy, where a is read from the first character of the measured bitstring
+    """
+    if not isinstance(strategy,str):
+        raise TypeError('Strategy must be given as a string.')
+    strategy=strategy.lower()
+    if not strategy in ['classical','quantum','random_quantum','random_classical']:
+        raise ValueError('Strategy must either be quantum or classical.')
+
+    import numpy as np
+
+    referee_choices=[(0,0),(0,1),(1,0),(1,1)]
+    distributions=np.zeros((4,4))
+
+    if strategy=='classical':
+        for question,(x,y) in enumerate(referee_choices):
+            (a,b)=classical_strategy(x,y)
+            distributions[question,2*a+b]=1
+    elif strategy=='random_classical':
+        distributions[:]=1/4
+    elif strategy=='quantum':
+        import prefix_sharing
+        #the four circuits share the Bell pair preparation, which is simulated once
+        circuits=[quantum_strategy_circuit(x,y) for (x,y) in referee_choices]
+        for question,distribution in enumerate(prefix_sharing.family_distributions(circuits)):
+            for answers,probability in distribution.items():
+                distributions[question,int(answers,2)]=probability
+    else:
+        #the random angles do not depend on the questions, so every row is the average over the angle grid
+        distributions[:]=angle_table(8).mean_distribution()
+
+    return distributions
+
+
+def chsh_games(strategy,games,seed=None,confidence=0.95,return_samples=False):
+    """
+    Plays many CHSH games at once by sampling from the exact answer distributions of a strategy.
+
+    Args:
+        strategy (str): strategy to use
+        games (int): number of games to play
+        seed (int): seed for numpy's random generator (optional)
+        confidence (float): confidence level of the interval on the win rate
+        return_samples (bool): if True, also return the questions and answers of every game
+    Returns:
+        results (dict): with keys
+            'games' (int): number of games played
+            'wins' (int): number of games won
+            'win_rate' (float): fraction of games won
+            'confidence_interval' (tuple): Wilson score interval on the win rate
+            'counts' (numpy.ndarray): 4x4 array of games per question 2*x+y (rows) and answer 2*a+b (columns)
+            'wins_per_question' (numpy.ndarray): games won for each question 2*x+y
+            'x', 'y', 'a', 'b' (numpy.ndarray): questions and answers of every game, only if return_samples is True
+
+    Raises:
+        TypeError: if games is not an integer
+        ValueError: if games is not positive
+
+    Notes:
+        -Uses numpy and statistics packages
+        -Games are drawn in fixed-size chunks so memory stays bounded unless return_samples is True
+    """
+    if not isinstance(games,int):
+        raise TypeError('games must be a positive integer.')
+    if not (games>0):
+        raise ValueError('games must be a positive integer.')
+
+    import numpy as np
+
+    distributions=strategy_distributions(strategy)
+    rng=np.random.default_rng(seed)
+    samples=[] if return_samples else None
+
+    counts=_sample_counts(distributions,games,rng,samples)
+    results=_win_statistics(counts,confidence)
+
+    if return_samples:
+        questions,answers=samples[0]
+        results['x']=questions>>1
+        results['y']=questions&1
+        results['a']=answers>>1
+        results['b']=answers&1
+
+    return results
+
+
+def _sample_counts(distributions,games,rng,samples=None):
+    """
+    Draws referee questions and answers for a number of games.
+
+    Args:
+        distributions (numpy.ndarray): 4x4 answer distributions, as returned by strategy_distributions
+        games (int): number of games to play
+        rng (numpy.random.Generator): random generator to draw from
+        samples (list): if given, the (questions, answers) arrays are appended to it and games are drawn in one chunk
+    Returns:
+        counts (numpy.ndarray): 4x4 array of games per question 2*x+y (rows) and answer 2*a+b (columns)
+    """
+    import numpy as np
+
+    cumulative=np.cumsum(distributions,axis=1)
+    cumulative[:,-1]=1.0
+    counts=np.zeros(16,dtype=np.int64)
+
+    chunk=games if samples is not None else 1<<20
+    for start in range(0,games,chunk):
+        size=min(chunk,games-start)
+        questions=rng.integers(0,4,size=size)
+        answers=(rng.random(size)[:,None]>=cumulative[questions]).sum(axis=1)
+        counts+=np.bincount(4*questions+answers,minlength=16)
+        if samples is not None:
+            samples.append((questions,answers))
+
+    return counts.reshape(4,4)
+
+
+def _win_statistics(counts,confidence=0.95):
+    """
+    Summarises a 4x4 array of games per question and answer.
+
+    Args:
+        counts (numpy.ndarray): games per question 2*x+y (rows) and answer 2*a+b (columns)
+        confidence (float): confidence level of the interval on the win rate
+    Returns:
+        results (dict): games, wins, win rate, Wilson score interval, counts and wins per question
+    """
+    import numpy as np
+    from statistics import NormalDist
+
+    #a xor b must equal x and y
+    winning=np.array([[(a^b)==(x&y) for a in (0,1) for b in (0,1)] for x in (0,1) for y in (0,1)])
+
+    games=int(counts.sum())
+    wins_per_question=(counts*winning).sum(axis=1)
+    wins=int(wins_per_question.sum())
+    win_rate=wins/games
+
+    z=NormalDist().inv_cdf((1+confidence)/2)
+    centre=(win_rate+z**2/(2*games))/(1+z**2/games)
+    half_width=z*np.sqrt(win_rate*(1-win_rate)/games+z**2/(4*games**2))/(1+z**2/games)
+
+    return {
+        'games':games,
+        'wins':wins,
+        'win_rate':win_rate,
+        'confidence_interval':(centre-half_width,centre+half_width),
+        'counts':counts,
+        'wins_per_question':wins_per_question,
+    }
+
+
+def _play_chunk(distributions,games,seed_sequence):
+    """
+    Worker task for parallel_winning_chance: plays one chunk of games with its own random stream.
+
+    Returns:
+        counts (numpy.ndarray): 4x4 games per question and answer
+        elapsed (float): seconds spent playing
+        pid (int): id of the worker process
+    """
+    import numpy as np
+    import os
+    import time
+
+    start=time.perf_counter()
+    counts=_sample_counts(distributions,games,np.random.default_rng(seed_sequence))
+    return counts,time.perf_counter()-start,os.getpid()
+
+
+def parallel_winning_chance(strategies=None,workers=None,chunk_games=1<<20,max_games=10**8,target_width=None,
+                            confidence=0.95,seed=None,progress=None):
+    """
+    Estimates the winning rates of CHSH strategies side by side on a pool of worker processes.
+
+    Games are split into chunks of chunk_games. Chunk i of each strategy is played with the i-th child of that
+    strategy's numpy SeedSequence, and chunks are folded into the running totals in order, so a given seed always
+    gives the same result however the chunks are scheduled. A strategy stops early once the width of its confidence
+    interval drops below target_width.
+
+    Args:
+        strategies (list): strategy names to run (defaults to all four accepted by chsh_game)
+        workers (int): number of worker processes (defaults to the number of CPUs)
+        chunk_games (int): games per task sent to a worker
+        max_games (int): games to play per strategy if the target width is never reached
+        target_width (float): stop a strategy once its confidence interval is narrower than this (optional)
+        confidence (float): confidence level of the interval on the win rate
+        seed (int): seed for the root SeedSequence (optional)
+        progress (callable): called as progress(strategy, results) each time new games are folded in (optional)
+    Returns:
+        results (dict): for every strategy, the statistics of chsh_games plus
+            'stopped_early' (bool): whether target_width was reached before max_games
+            'elapsed' (float): wall-clock seconds until the strategy finished
+            'games_per_second' (float): overall throughput for the strategy
+        and under the key 'workers', a dict mapping each worker's pid to its games/sec while busy
+
+    Raises:
+        TypeError: if chunk_games or max_games is not an integer, or a strategy name is not a string
+        ValueError: if chunk_games or max_games is not positive, or a strategy name is not recognised
+
+    Notes:
+        -Uses numpy, concurrent.futures, os and time packages
+    """
+    if not all(isinstance(i,int) for i in [chunk_games,max_games]):
+        raise TypeError('chunk_games and max_games must be positive integers.')
+    if not (chunk_games>0 and max_games>0):
+        raise ValueError('chunk_games and max_games must be positive integers.')
+    strategies=strategies or ['quantum','classical','random_quantum','random_classical']
+    if not all(isinstance(strategy,str) for strategy in strategies):
+        raise TypeError('Strategy must be given as a string.')
+
+    import numpy as np
+    import os
+    import time
+    from concurrent.futures import ProcessPoolExecutor,wait,FIRST_COMPLETED
+
+    strategies=[strategy.lower() for strategy in strategies]
+    workers=workers or os.cpu_count()
+
+    distributions={strategy:strategy_distributions(strategy) for strategy in strategies}
+    streams=dict(zip(strategies,np.random.SeedSequence(seed).spawn(len(strategies))))
+    total_chunks=-(-max_games//chunk_games)
+
+    state={strategy:{
+        'submitted':0,
+        'finished':{},
+        'folded':0,
+        'counts':np.zeros((4,4),dtype=np.int64),
+        'done':False,
+        'stopped_early':False,
+        'elapsed':0.0,
+    } for strategy in strategies}
+    busy={}
+    start=time.perf_counter()
+
+    def submit(pool,strategy):
+        s=state[strategy]
+        index=s['submitted']
+        games=min(chunk_games,max_games-index*chunk_games)
+        s['submitted']+=1
+        return pool.submit(_play_chunk,distributions[strategy],games,streams[strategy].spawn(1)[0]),(strategy,index)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending={}
+        #keep roughly two chunks per worker in flight, shared round-robin between strategies
+        while len(pending)<2*workers and any(state[s]['submitted']<total_chunks for s in strategies):
+            for strategy in strategies:
+                if state[strategy]['submitted']<total_chunks and len(pending)<2*workers:
+                    future,key=submit(pool,strategy)
+                    pending[future]=key
+
+        while pending:
+            completed,_=wait(pending,return_when=FIRST_COMPLETED)
+            for future in completed:
+                (strategy,index)=pending.pop(future)
+                s=state[strategy]
+                if s['done']:
+                    continue
+                counts,elapsed,pid=future.result()
+                games_done,busy_time=busy.get(pid,(0,0.0))
+                busy[pid]=(games_done+int(counts.sum()),busy_time+elapsed)
+                s['finished'][index]=counts
+
+                #fold chunks in order so early stopping is reproducible
+                while s['folded'] in s['finished']:
+                    s['counts']+=s['finished'].pop(s['folded'])
+                    s['folded']+=1
+                    results=_win_statistics(s['counts'],confidence)
+                    if progress is not None:
+                        progress(strategy,results)
+                    (low,high)=results['confidence_interval']
+                    if target_width is not None and high-low<target_width:
+                        s['stopped_early']=s['folded']<total_chunks
+                        s['done']=True
+                    elif s['folded']==total_chunks:
+                        s['done']=True
+                    if s['done']:
+                        s['elapsed']=time.perf_counter()-start
+                        s['finished'].clear()
+                        break
+
+            #drop work for finished strategies and top the pool back up
+            for future,(strategy,index) in list(pending.items()):
+                if state[strategy]['done'] and future.cancel():
+                    del pending[future]
+            open_strategies=[s for s in strategies if not state[s]['done'] and state[s]['submitted']<total_chunks]
+            while open_strategies and len(pending)<2*workers:
+                for strategy in open_strategies:
+                    if state[strategy]['submitted']<total_chunks and len(pending)<2*workers:
+                        future,key=submit(pool,strategy)
+                        pending[future]=key
+                open_strategies=[s for s in open_strategies if state[s]['submitted']<total_chunks]
+
+    results={}
+    for strategy in strategies:
+        s=state[strategy]
+        results[strategy]=_win_statistics(s['counts'],confidence)
+        results[strategy]['stopped_early']=s['stopped_early']
+        results[strategy]['elapsed']=s['elapsed']
+        results[strategy]['games_per_second']=results[strategy]['games']/s['elapsed']
+    results['workers']={pid:games/busy_time for pid,(games,busy_time) in busy.items()}
+    return results
+
+
+def winning_chance(strategy,games=1000,batched=False):
     """
     Calculates the winning rate of a given CHSH game strategy
 
     Args:
         strategy (str): Strategy for the CHSH game
+        games (int): number of games to play
+        batched (bool): if True, sample all games at once from the strategy's exact answer distributions
     Returns:
         win_message (str): Message giving the winning rate for chosen strategy
 
@@ -229,22 +776,29 @@ def winning_chance(strategy):
         TypeError: if strategy is not a string
         ValueError: if strategy is not quantumn, classical, or random
     """
+    if not isinstance(strategy,str):
+        raise TypeError('Strategy must be given as a string.')
     strategy=strategy.lower()
     if not strategy in ['classical','quantum','random_quantum','random_classical']:
         raise ValueError('Strategy must either be quantum or classical.')
-    if not isinstance(strategy,str):
-        raise TypeError('Strategy must be given as a string.')
+
+    if batched:
+        results=chsh_games(strategy,games)
+        (low,high)=results['confidence_interval']
+        win_message='Out of '+str(games)+' games, Alice and Bob won '+str(results['win_rate']*100)+'% (95% CI '+f'{low*100:.3f}-{high*100:.3f}'+'%) using the '+strategy+' strategy.'
+        return(win_message)
     
     wins=0 
-    for _ in range(1000):
+    for _ in range(games):
         if chsh_game(strategy) == 1:
             wins+=1
 
-    win_rate=(wins/1000)*100
-    win_message='Out of 1000 games, Alice and Bob won '+str(win_rate)+'%% using the '+strategy+' strategy.'
+    win_rate=(wins/games)*100
+    win_message='Out of '+str(games)+' games, Alice and Bob won '+str(win_rate)+'%% using the '+strategy+' strategy.'
     return(win_message)
 
 
-strategy=input('Choose a strategy to use for the CHSH game. Type either "quantum", "classical", "random_quantum", or "random_classical" (without speech marks): ')
-print(winning_chance(strategy))
+if __name__ == "__main__":
+    strategy=input('Choose a strategy to use for the CHSH game. Type either "quantum", "classical", "random_quantum", or "random_classical" (without speech marks): ')
+    print(winning_chance(strategy))
 
@@ -1,3 +1,6 @@
+import os,sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 def superdense_coding(bits):
     """
     Carries out the superdense coding protocol for a given two-bit binary string
@@ -13,12 +16,12 @@ def superdense_coding(bits):
         ValueError: If bits is not two digits long.
 
     Notes:
-        -Uses QuantumCircuit and AerSimulator packages
+        -Uses QuantumCircuit package; counts are drawn from the exact distribution held in result_cache
         -https://en.wikipedia.org/wiki/Superdense_coding
         -https://learn.qiskit.org/course/basics/entanglement-in-action#entanglement-16-0 
     """
-    from qiskit import QuantumCircuit
-    from qiskit_aer import AerSimulator
+    import result_cache
+    import tracing
 
     if not isinstance(bits,str):
         raise TypeError('input must be a two-digit binary string')
@@ -27,6 +30,34 @@ def superdense_coding(bits):
     if not len(bits)==2:
         raise ValueError('input must be a two-digit binary string')
     
+    with tracing.span('superdense_coding',bits=bits):
+        with tracing.span('construct') as s:
+            qc=message_circuit(bits)
+            s.set_circuit(qc)
+
+        counts=result_cache.sample(qc,shots=1024)
+    return counts
+
+
+_message_circuits={}
+
+def message_circuit(bits):
+    """
+    Builds the superdense coding circuit for one two-bit message, caching it for later calls.
+
+    Args:
+        bits (str): two-digit binary string
+    Returns:
+        qc (QuantumCircuit): circuit preparing a Bell pair, encoding bits on Alice's qubit and decoding on Bob's end
+    Notes:
+        -Uses QuantumCircuit package
+        -The same circuit object is returned for every call with the same bits, so do not modify it
+    """
+    if bits in _message_circuits:
+        return _message_circuits[bits]
+
+    from qiskit import QuantumCircuit
+
     a=bits[0]
     b=bits[1]
 
@@ -51,10 +82,118 @@ def superdense_coding(bits):
 
     qc.measure_all()
 
-    sim=AerSimulator()
-    counts=sim.run(qc).result().get_counts()
-    return counts
+    _message_circuits[bits]=qc
+    return qc
+
+
+def decoding_table(noise=None):
+    """
+    Computes the probability that Bob decodes each two-bit message as each other one.
+
+    Args:
+        noise (dict): depolarizing, amplitude_damping and readout probabilities for noise_sweep (optional)
+    Returns:
+        table (numpy.ndarray): 4x4 array whose row int(sent,2) holds the probability of each decoded message
+    Notes:
+        -uses numpy and the exact distributions of the four message circuits held in result_cache, or the
+         density-matrix model of noise_sweep when noise is given
+    """
+    import numpy as np
+    import result_cache
+
+    if noise:
+        import noise_sweep
+        return noise_sweep.superdense_confusion(**noise)
+
+    table=np.zeros((4,4))
+    for sent in range(4):
+        distribution=result_cache.distribution(message_circuit(format(sent,'02b')))
+        for decoded,probability in distribution.items():
+            table[sent,int(decoded,2)]=probability
+    return table
+
+
+def _byte_chunks(source,chunk_bytes):
+    """
+    Yields bytes objects of at most chunk_bytes from bytes, a file-like object with read(), or an iterable of byte
+    values or byte strings.
+    """
+    if isinstance(source,(bytes,bytearray,memoryview)):
+        source=memoryview(source)
+        for start in range(0,len(source),chunk_bytes):
+            yield bytes(source[start:start+chunk_bytes])
+        return
+    if hasattr(source,'read'):
+        while True:
+            chunk=source.read(chunk_bytes)
+            if not chunk:
+                return
+            yield chunk
+    buffer=bytearray()
+    for item in source:
+        if isinstance(item,int):
+            buffer.append(item)
+        else:
+            buffer.extend(item)
+        while len(buffer)>=chunk_bytes:
+            yield bytes(buffer[:chunk_bytes])
+            del buffer[:chunk_bytes]
+    if buffer:
+        yield bytes(buffer)
+
+
+def superdense_stream(source,chunk_bytes=1<<16,seed=None,stats=None,noise=None):
+    """
+    Sends a stream of bytes through the superdense coding channel, two bits per Bell pair.
+
+    Each byte is split into four two-bit messages, most significant first. Every chunk of messages is decoded in
+    one vectorized pass by sampling Bob's measurement from decoding_table(), which is computed once from the four
+    message circuits, and the decoded messages are packed back into bytes.
+
+    Args:
+        source (bytes, file-like or iterable): payload; file-like objects are read chunk by chunk
+        chunk_bytes (int): bytes decoded per batch, which bounds the memory in use
+        seed (int): seed for numpy's random generator (optional)
+        stats (dict): if given, updated after every chunk with 'bytes', 'messages', 'seconds' and 'bits_per_second'
+        noise (dict): depolarizing, amplitude_damping and readout probabilities of the channel (optional)
+    Yields:
+        decoded (bytes): Bob's decoded bytes, one chunk at a time
+    Notes:
+        -uses numpy package
+        -when every message is decoded with certainty, as in the noiseless protocol, no random numbers are drawn
+    """
+    import time
+    import numpy as np
+
+    table=decoding_table(noise)
+    deterministic=np.all((table<1e-12)|(table>1-1e-12))
+    lookup=table.argmax(axis=1).astype(np.uint8)
+    cumulative=np.cumsum(table,axis=1)
+    rng=np.random.default_rng(seed)
+    shifts=np.array([6,4,2,0],dtype=np.uint8)
+
+    if stats is not None:
+        stats.update(bytes=0,messages=0,seconds=0.0,bits_per_second=0.0)
+    for chunk in _byte_chunks(source,chunk_bytes):
+        start=time.perf_counter()
+        payload=np.frombuffer(chunk,dtype=np.uint8)
+        messages=((payload[:,None]>>shifts)&3).ravel()
+
+        if deterministic:
+            decoded=lookup[messages]
+        else:
+            u=rng.random(len(messages))
+            decoded=(u[:,None]>=cumulative[messages]).sum(axis=1).clip(max=3).astype(np.uint8)
+
+        received=(decoded.reshape(-1,4)<<shifts).sum(axis=1,dtype=np.uint8).tobytes()
+        if stats is not None:
+            stats['bytes']+=len(payload)
+            stats['messages']+=len(messages)
+            stats['seconds']+=time.perf_counter()-start
+            stats['bits_per_second']=8*stats['bytes']/stats['seconds'] if stats['seconds'] else 0.0
+        yield received
 
 
-bits=input('Give a two-digit binary string to send: ')
-print(superdense_coding(bits))
+if __name__ == "__main__":
+    bits=input('Give a two-digit binary string to send: ')
+    print(superdense_coding(bits))
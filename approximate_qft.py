@@ -0,0 +1,84 @@
+"""
+Approximate inverse QFT for the phase estimation circuits.
+
+The inverse QFT on m qubits applies a controlled rotation by pi/2^k between every pair of qubits k apart, m(m-1)/2
+in all. The smallest of them barely move the state: dropping every rotation by less than pi/2^(m-1-d) (qiskit's
+approximation_degree d) removes d(d+1)/2 of them, and the error this adds shrinks exponentially with m - d. Both
+phase_estimation functions accept the degree:
+
+    import approximate_qft
+    approximate_qft.auto_degree(14)                   # 8: keep rotations down to pi/2^5
+    qpe.phase_estimation(0.3, precision=14, approximation_degree='auto')
+
+auto_degree() keeps rotations down to pi/2^(ceil(log2(m)) + 1). For random phases, that lowers the chance of
+reading the nearest m-bit estimate by less than half a percentage point at m = 6 to 14, while removing 36 of the 91
+rotations at m = 14; see `python benchmarks/approximate_qft.py` for gate counts, depth, time and success loss of
+every degree.
+"""
+import math
+
+import tracing
+
+AUTO = 'auto'
+
+
+def auto_degree(precision):
+    """
+    Returns the approximation degree the automatic mode uses for a precision.
+
+    Args:
+        precision (int): number of qubits of the QFT
+    Returns:
+        degree (int): number of the smallest rotation angles to drop, 0 up to precision 4
+    """
+    kept = math.ceil(math.log2(precision)) + 1 if precision > 1 else 1
+    return max(0, precision - 1 - kept)
+
+
+def resolve_degree(approximation_degree, precision):
+    """
+    Validates an approximation degree, turning 'auto' into a number.
+
+    Args:
+        approximation_degree (int or str): degree, 'auto', or None for the exact QFT
+        precision (int): number of qubits of the QFT
+    Returns:
+        degree (int): between 0 and precision - 1
+    Raises:
+        TypeError: if approximation_degree is neither an integer nor 'auto'
+        ValueError: if approximation_degree is not between 0 and precision - 1
+    """
+    if approximation_degree is None:
+        return 0
+    if approximation_degree == AUTO:
+        return auto_degree(precision)
+    if not isinstance(approximation_degree, int):
+        raise TypeError("approximation_degree must be an integer or 'auto'")
+    if not (0 <= approximation_degree < max(precision, 1)):
+        raise ValueError(f'approximation_degree must be between 0 and {max(precision - 1, 0)} (inclusive)')
+    return approximation_degree
+
+
+def smallest_angle(precision, approximation_degree=0):
+    """
+    Returns the smallest rotation angle the (approximate) QFT keeps, or None if it keeps no rotation.
+    """
+    distance = precision - 1 - resolve_degree(approximation_degree, precision)
+    return math.pi / 2**distance if distance > 0 else None
+
+
+def inverse_qft(precision, approximation_degree=0):
+    """
+    Builds the inverse QFT without the rotations the approximation degree drops.
+
+    Args:
+        precision (int): number of qubits
+        approximation_degree (int or str): degree, or 'auto' (see resolve_degree)
+    Returns:
+        qft (QFT): the inverse QFT gate circuit
+    """
+    from qiskit.circuit.library import QFT
+
+    degree = resolve_degree(approximation_degree, precision)
+    with tracing.span('qft', qubits=precision, approximation_degree=degree):
+        return QFT(precision, approximation_degree=degree, inverse=True)
@@ -0,0 +1,324 @@
+"""
+Asynchronous submission of algorithm runs and simulator jobs with bounded concurrency.
+
+Every algorithm function blocks until its simulator job finishes. The coroutines here run them on a shared thread
+pool instead (Aer and numpy release the GIL while they simulate), so a service can fan out hundreds of independent
+runs from one event loop:
+
+    import asyncio
+    import async_jobs
+    from uqic import load_script
+
+    async def main():
+        print(await async_jobs.phase_estimation(0.3, precision=6, timeout=30))
+        strings = ['1011', '0110', '1110']
+        simon = load_script('simon').simon_algorithm
+        async for index, result in async_jobs.as_completed(simon, strings, timeout=30):
+            print(strings[index], result)
+
+    asyncio.run(main())
+
+At most max_concurrency calls run at once; further submissions wait for a free slot (backpressure), and
+as_completed() only takes the next argument from its iterable when one is about to run. A call can be given a
+timeout, and cancelling the coroutine that awaits it cancels the call if it has not started. A call that has already
+started cannot be interrupted: it finishes in the background, and its slot is freed only then.
+
+gather() batches compatible circuits (same simulation method) into one simulator job each, which costs much less
+than one job per circuit when the circuits are small.
+"""
+import asyncio
+import concurrent.futures
+import threading
+import weakref
+
+import tracing
+
+
+class JobRunner:
+    """
+    Runs blocking calls on a thread pool with at most max_concurrency of them in flight.
+
+    Args:
+        max_concurrency (int): most calls running at the same time
+    """
+    def __init__(self, max_concurrency=4):
+        if max_concurrency < 1:
+            raise ValueError('max_concurrency must be at least 1')
+        self.max_concurrency = max_concurrency
+        self._executor = None
+        self._lock = threading.Lock()
+        # asyncio primitives belong to one event loop, so each loop gets its own semaphore
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._stats = {'submitted': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'timed_out': 0}
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                                                       thread_name_prefix='uqic-job')
+            return self._executor
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    async def submit(self, function, *args, timeout=None, **kwargs):
+        """
+        Runs function(*args, **kwargs) on the pool once a slot is free and returns its result.
+
+        Args:
+            function (callable): blocking function to run
+            *args, **kwargs: its arguments
+            timeout (float): seconds to wait for the result once the call has started (optional)
+        Returns:
+            result: what function returned
+        Raises:
+            asyncio.TimeoutError: if the call did not finish within timeout
+            asyncio.CancelledError: if the awaiting coroutine was cancelled
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphore()
+        try:
+            await semaphore.acquire()
+        except asyncio.CancelledError:
+            self._count('cancelled')
+            raise
+        try:
+            future = self._pool().submit(function, *args, **kwargs)
+        except BaseException:
+            semaphore.release()
+            raise
+        self._count('submitted')
+
+        def release(_):
+            # the slot is freed when the call really ends, even if its waiter gave up on it
+            try:
+                loop.call_soon_threadsafe(semaphore.release)
+            except RuntimeError:
+                pass   # the event loop has already closed
+
+        future.add_done_callback(release)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            self._count('timed_out')
+            raise
+        except asyncio.CancelledError:
+            self._count('cancelled')
+            raise
+        except BaseException:
+            self._count('failed')
+            raise
+        self._count('completed')
+        return result
+
+    async def as_completed(self, function, arguments, timeout=None, return_exceptions=False):
+        """
+        Calls function on every item of arguments and yields the results in the order they finish.
+
+        Items are taken from arguments lazily, so it can be a generator of any length: no more than twice
+        max_concurrency calls are pending at a time.
+
+        Args:
+            function (callable): blocking function of one argument (use a tuple and a lambda for more)
+            arguments (iterable): its arguments
+            timeout (float): timeout of each call, as in submit (optional)
+            return_exceptions (bool): yield exceptions of failed calls as results instead of raising them
+        Yields:
+            (index, result) (tuple): position of the argument in arguments, and the call's result
+        """
+        iterator = enumerate(arguments)
+        pending = set()
+
+        async def call(index, argument):
+            try:
+                return index, await self.submit(function, argument, timeout=timeout)
+            except Exception as error:
+                if not return_exceptions:
+                    raise
+                return index, error
+
+        def refill():
+            for index, argument in iterator:
+                pending.add(asyncio.ensure_future(call(index, argument)))
+                if len(pending) >= 2 * self.max_concurrency:
+                    break
+
+        try:
+            refill()
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    yield task.result()
+                refill()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self):
+        """
+        Reports how the runner was used.
+
+        Returns:
+            stats (dict): counts of 'submitted', 'completed', 'failed', 'cancelled' and 'timed_out' calls
+        """
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self, wait=True):
+        """
+        Stops the thread pool; a later submission starts a new one.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+_runner = JobRunner()
+
+
+def configure(max_concurrency=4):
+    """
+    Replaces the shared runner used by the module-level coroutines.
+
+    Args:
+        max_concurrency (int): most calls running at the same time
+    Returns:
+        runner (JobRunner): the new shared runner
+    """
+    global _runner
+    previous, _runner = _runner, JobRunner(max_concurrency)
+    previous.shutdown(wait=False)
+    return _runner
+
+
+def get_runner():
+    """
+    Returns the shared JobRunner.
+    """
+    return _runner
+
+
+async def submit(function, *args, timeout=None, **kwargs):
+    """
+    Runs a blocking call on the shared runner. See JobRunner.submit.
+    """
+    return await _runner.submit(function, *args, timeout=timeout, **kwargs)
+
+
+def as_completed(function, arguments, timeout=None, return_exceptions=False):
+    """
+    Yields results of function over arguments as they finish, on the shared runner. See JobRunner.as_completed.
+    """
+    return _runner.as_completed(function, arguments, timeout=timeout, return_exceptions=return_exceptions)
+
+
+async def run(circuit, timeout=None, **run_options):
+    """
+    Asynchronous counterpart of backends.run.
+    """
+    import backends
+
+    return await submit(backends.run, circuit, timeout=timeout, **run_options)
+
+
+def _run_batch(circuits, method, run_options):
+    import backends
+    import transpile_cache
+
+    simulator = backends.get_simulator(method=method)
+    compiled = [transpile_cache.transpile(circuit, simulator) for circuit in circuits]
+    with tracing.span('simulate_batch', method=method, circuits=len(circuits), **run_options):
+        return simulator.run(compiled, **run_options).result()
+
+
+async def gather(circuits, max_batch=64, timeout=None, **run_options):
+    """
+    Runs many circuits, batching those with the same simulation method into shared simulator jobs.
+
+    Args:
+        circuits (list): QuantumCircuits with all parameters bound
+        max_batch (int): most circuits in one job; batches run concurrently on the shared runner
+        timeout (float): timeout of each job, as in submit (optional)
+        **run_options: options for every job, e.g. shots or memory
+    Returns:
+        results (list): counts of each circuit in the order given, or its list of measured bitstrings when
+                        memory=True
+    """
+    import backends
+
+    groups = {}
+    for index, circuit in enumerate(circuits):
+        groups.setdefault(backends.route(circuit)['method'], []).append(index)
+
+    async def batch(method, indices):
+        result = await submit(_run_batch, [circuits[i] for i in indices], method, run_options, timeout=timeout)
+        if run_options.get('memory'):
+            return indices, [result.get_memory(k) for k in range(len(indices))]
+        return indices, [result.get_counts(k) for k in range(len(indices))]
+
+    jobs = [batch(method, indices[start:start + max_batch])
+            for method, indices in groups.items() for start in range(0, len(indices), max_batch)]
+    results = [None] * len(circuits)
+    for indices, values in await asyncio.gather(*jobs):
+        for index, value in zip(indices, values):
+            results[index] = value
+    return results
+
+
+def _script(name):
+    from uqic import load_script
+
+    return load_script(name)
+
+
+async def deutsch(function, timeout=None):
+    """
+    Asynchronous counterpart of deutsch.constant_or_balanced.
+    """
+    return await submit(_script('deutsch').constant_or_balanced, function, timeout=timeout)
+
+
+async def deutsch_jozsa(n, oracle=None, timeout=None):
+    """
+    Asynchronous counterpart of deutsch_jozsa_alorgithm in deutsch-jozsa.py.
+    """
+    return await submit(_script('deutsch-jozsa').deutsch_jozsa_alorgithm, n, oracle, timeout=timeout)
+
+
+async def simon(string, timeout=None):
+    """
+    Asynchronous counterpart of simon.simon_algorithm.
+    """
+    return await submit(_script('simon').simon_algorithm, string, timeout=timeout)
+
+
+async def phase_estimation(phi, precision=3, timeout=None, **options):
+    """
+    Asynchronous counterpart of phase_estimation in phase-estimation-general-case.py.
+    """
+    return await submit(_script('qpe').phase_estimation, phi, precision, timeout=timeout, **options)
+
+
+async def find_order(a, N=15, timeout=None, **options):
+    """
+    Asynchronous counterpart of shor2.find_order.
+    """
+    return await submit(_script('shor').find_order, a, N, timeout=timeout, **options)
+
+
+async def superdense_coding(bits, timeout=None):
+    """
+    Asynchronous counterpart of superdense_coding in superdense-coding.py.
+    """
+    return await submit(_script('superdense').superdense_coding, bits, timeout=timeout)
@@ -0,0 +1,252 @@
+"""
+Process-wide registry of warmed, reusable simulator backends.
+
+Every algorithm in this project used to construct a fresh AerSimulator() or Sampler() for each call, which
+dominates the run time of the tiny circuits they simulate. The functions here hand out one shared instance per
+configuration instead, creating and warming it on first use.
+
+    import backends
+    result = backends.get_simulator().run(qc, shots=1).result()
+
+Instances are never reconfigured after creation, so they can be shared between threads. The reference Sampler
+keeps an internal circuit cache, so submissions to it go through sample(), which holds a per-instance lock while
+the job is submitted.
+
+run() also picks the simulation method for a circuit: circuits made only of Clifford operations go to the
+stabilizer-tableau simulator, which handles thousands of qubits, and everything else to the statevector simulator.
+The circuit is transpiled for the chosen simulator through transpile_cache, so repeated structures are only
+transpiled once. Circuits of at most micro_max_qubits qubits (5 by default) that microsim supports skip Aer
+altogether and run on its NumPy engine, unless a method is given.
+
+    result = backends.run(qc, shots=1, memory=True)
+    result.metadata['routing']   # {'method': 'stabilizer', 'reason': '...'}
+"""
+import threading
+import time
+
+import tracing
+
+_lock = threading.Lock()
+_instances = {}
+_defaults = {'method': 'automatic', 'max_parallel_threads': 0, 'micro_max_qubits': 5}
+_stats = {'hits': 0, 'misses': 0, 'construction_seconds': 0.0}
+
+# operations the stabilizer simulator can run, besides instructions with no effect on the state
+CLIFFORD_OPERATIONS = frozenset([
+    'id', 'x', 'y', 'z', 'h', 's', 'sdg', 'sx', 'sxdg', 'cx', 'cy', 'cz', 'swap', 'ecr', 'dcx', 'iswap',
+    'measure', 'reset', 'barrier', 'delay',
+])
+
+# run options microsim understands; anything else (e.g. a noise model) needs Aer
+MICRO_OPTIONS = frozenset(['shots', 'memory', 'seed_simulator'])
+
+
+def configure(method=None, max_parallel_threads=None, micro_max_qubits=None):
+    """
+    Sets the default simulation options used when get_simulator() is called without arguments.
+
+    Args:
+        method (str): Aer simulation method, e.g. 'automatic', 'statevector', 'stabilizer' or 'density_matrix'
+        max_parallel_threads (int): threads Aer may use per job (0 lets Aer decide)
+        micro_max_qubits (int): largest circuit run() sends to microsim (0 disables it, at most microsim.MAX_QUBITS)
+    """
+    with _lock:
+        if method is not None:
+            _defaults['method'] = method
+        if max_parallel_threads is not None:
+            _defaults['max_parallel_threads'] = max_parallel_threads
+        if micro_max_qubits is not None:
+            _defaults['micro_max_qubits'] = micro_max_qubits
+
+
+def _get(key, factory):
+    with _lock:
+        entry = _instances.get(key)
+        if entry is not None:
+            _stats['hits'] += 1
+            return entry
+        start = time.perf_counter()
+        entry = factory()
+        _stats['construction_seconds'] += time.perf_counter() - start
+        _stats['misses'] += 1
+        _instances[key] = entry
+        return entry
+
+
+def get_simulator(method=None, max_parallel_threads=None, **options):
+    """
+    Returns the shared AerSimulator for a configuration, creating and warming it on first use.
+
+    Args:
+        method (str): Aer simulation method (defaults to the value set with configure)
+        max_parallel_threads (int): threads Aer may use per job (defaults to the value set with configure)
+        **options: any other AerSimulator options
+    Returns:
+        simulator (AerSimulator): shared simulator instance
+    """
+    method = method or _defaults['method']
+    if max_parallel_threads is None:
+        max_parallel_threads = _defaults['max_parallel_threads']
+    key = ('aer', method, max_parallel_threads, tuple(sorted(options.items())))
+
+    def factory():
+        from qiskit import QuantumCircuit
+        from qiskit_aer import AerSimulator
+
+        with tracing.span('simulator_startup', method=method):
+            simulator = AerSimulator(method=method, max_parallel_threads=max_parallel_threads, **options)
+            # the first run loads Aer's controller; pay for it here rather than in the caller's job
+            warmup = QuantumCircuit(1, 1)
+            warmup.measure(0, 0)
+            simulator.run(warmup, shots=1).result()
+        return simulator
+
+    return _get(key, factory)
+
+
+def get_sampler(**options):
+    """
+    Returns the shared reference Sampler for a set of options, creating it on first use.
+
+    Args:
+        **options: default run options of the Sampler, e.g. shots or seed
+    Returns:
+        sampler (Sampler): shared sampler instance
+    """
+    key = ('sampler', tuple(sorted(options.items())))
+
+    def factory():
+        from qiskit.primitives import Sampler
+
+        sampler = Sampler(options=options or None)
+        sampler.lock = threading.Lock()
+        return sampler
+
+    return _get(key, factory)
+
+
+def sample(circuits, parameter_values=None, sampler_options=None, **run_options):
+    """
+    Runs circuits on the shared Sampler and waits for the result.
+
+    Args:
+        circuits (QuantumCircuit or list): circuits to sample
+        parameter_values (list): parameter values to bind to each circuit (optional)
+        sampler_options (dict): options identifying which shared Sampler to use (optional)
+        **run_options: options for this run, e.g. shots
+    Returns:
+        result (SamplerResult): result of the job, with one quasi-distribution per circuit
+    """
+    sampler = get_sampler(**(sampler_options or {}))
+    with tracing.span('sample', circuits=len(circuits) if isinstance(circuits, list) else 1, **run_options):
+        with sampler.lock:
+            job = sampler.run(circuits, parameter_values, **run_options)
+        return job.result()
+
+
+def route(circuit):
+    """
+    Chooses a simulation method from the operations a circuit uses.
+
+    Args:
+        circuit (QuantumCircuit): circuit to inspect
+    Returns:
+        decision (dict): with keys
+            'method' (str): 'stabilizer' for Clifford-only circuits, 'statevector' otherwise
+            'reason' (str): why the method was chosen
+    """
+    operations = set(circuit.count_ops())
+    other = sorted(operations - CLIFFORD_OPERATIONS)
+    if not other:
+        return {
+            'method': 'stabilizer',
+            'reason': f'Clifford-only circuit on {circuit.num_qubits} qubits ({", ".join(sorted(operations))})',
+        }
+    return {
+        'method': 'statevector',
+        'reason': f'non-Clifford operations: {", ".join(other)}',
+    }
+
+
+def run(circuit, method=None, parameter_values=None, **run_options):
+    """
+    Runs a circuit on the shared simulator chosen by route() and waits for the result.
+
+    Small circuits supported by microsim run there instead of on Aer, and return a microsim.MicroResult, which has
+    the same get_counts(), get_memory() and metadata.
+
+    Args:
+        circuit (QuantumCircuit): circuit to run
+        method (str): simulation method to use instead of routing, or 'micro' for microsim (optional)
+        parameter_values (dict or list): values for the circuit's parameters, bound after the transpile cache lookup
+                                         (optional)
+        **run_options: options for this run, e.g. shots or memory
+    Returns:
+        result (Result): result of the job, with the routing decision under result.metadata['routing']
+    """
+    import microsim
+    import transpile_cache
+
+    with tracing.span('route'):
+        decision = program = None
+        if method is None and circuit.num_qubits <= _defaults['micro_max_qubits'] and MICRO_OPTIONS.issuperset(
+                run_options):
+            bound = transpile_cache.bind_parameters(circuit, parameter_values)
+            program = microsim.get_program(bound)
+            if program is not None:
+                # otherwise parameters stay unbound until after the transpile cache lookup
+                circuit, parameter_values = bound, None
+                decision = {'method': 'micro', 'reason': f'{circuit.num_qubits} qubits, at most '
+                                                         f"{_defaults['micro_max_qubits']} run on microsim"}
+        if decision is None:
+            if method is None:
+                decision = route(circuit)
+            else:
+                decision = {'method': method, 'reason': 'method given by the caller'}
+    if decision['method'] == 'micro':
+        with tracing.span('simulate', method='micro', qubits=circuit.num_qubits, **run_options):
+            result = microsim.run(transpile_cache.bind_parameters(circuit, parameter_values), program=program,
+                                  **run_options)
+        result.metadata['routing'] = decision
+        return result
+    simulator = get_simulator(method=decision['method'])
+    compiled = transpile_cache.transpile(circuit, simulator, parameter_values=parameter_values)
+    with tracing.span('simulate', method=decision['method'], qubits=circuit.num_qubits, **run_options):
+        result = simulator.run(compiled, **run_options).result()
+    result.metadata['routing'] = decision
+    return result
+
+
+def backend_stats():
+    """
+    Reports how often shared backends were reused.
+
+    Returns:
+        stats (dict): with keys
+            'hits' (int): requests served by an existing instance
+            'misses' (int): requests that created an instance
+            'hit_rate' (float): fraction of requests served by an existing instance
+            'instances' (int): number of live instances
+            'construction_seconds' (float): total time spent creating and warming instances
+            'seconds_saved' (float): estimated construction time avoided by reuse
+    """
+    with _lock:
+        requests = _stats['hits'] + _stats['misses']
+        average = _stats['construction_seconds'] / _stats['misses'] if _stats['misses'] else 0.0
+        return {
+            'hits': _stats['hits'],
+            'misses': _stats['misses'],
+            'hit_rate': _stats['hits'] / requests if requests else 0.0,
+            'instances': len(_instances),
+            'construction_seconds': _stats['construction_seconds'],
+            'seconds_saved': _stats['hits'] * average,
+        }
+
+
+def reset():
+    """
+    Drops every shared instance and clears the statistics.
+    """
+    with _lock:
+        _instances.clear()
+        _stats.update(hits=0, misses=0, construction_seconds=0.0)
@@ -0,0 +1,112 @@
+"""
+Gate count, depth, simulation time and success-probability loss of the approximate inverse QFT, degree by degree.
+
+For each precision m, phase-estimation-general-case.py's approximation_report simulates the phase-gate QPE circuit
+with every approximation degree on --phases random phases and prints one row per degree. 'success' is the mean
+probability of reading the closest m-bit estimate and 'loss' is how much lower it is than with the exact QFT. The
+row of the degree approximation_degree='auto' picks is marked with *. A last table does the same for Shor's order
+finding of --a mod 15, where success is the probability of measuring an exact multiple of 2^m/r; its phases s/r
+have at most two bits, which no dropped rotation affects. The script exits with status 1 if the 'auto' degree loses
+more than --max-loss.
+
+Dropping rotations shortens the circuit but not its depth: qiskit's QFT applies the rotations of each qubit in
+sequence, and the remaining ones still form a chain through every qubit.
+
+    python benchmarks/approximate_qft.py
+    python benchmarks/approximate_qft.py --precisions 6 10 14 --phases 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uqic import load_script
+
+HEADER = f"{'degree':>8}{'min angle':>11}{'rotations':>11}{'gates':>7}{'depth':>7}{'qft depth':>11}" \
+         f"{'ms/run':>9}{'success':>9}{'loss':>8}"
+
+
+def _row(row):
+    angle = '-' if row['smallest_angle'] is None else f"{row['smallest_angle']:.4f}"
+    mark = '*' if row['auto'] else ' '
+    return (f"{row['degree']:>7}{mark}{angle:>11}{row['rotations']:>11}{row['gates']:>7}{row['depth']:>7}"
+            f"{row['qft_depth']:>11}{row['seconds'] * 1e3:>9.2f}{row['success']:>9.4f}{row['loss']:>8.4f}")
+
+
+def shor_report(a, precision, repeats=3):
+    """
+    Returns approximation_report-style rows for the order-finding circuit of a mod 15.
+    """
+    import approximate_qft
+    import backends
+    import transpile_cache
+    from qiskit import QuantumCircuit
+
+    shor = load_script('shor')
+    psi_prep = QuantumCircuit(4)
+    psi_prep.x(0)
+    order = next(r for r in range(1, 16) if pow(a, r, 15) == 1)
+    peaks = {s * 2**precision // order for s in range(order)}
+    auto = approximate_qft.auto_degree(precision)
+
+    rows = []
+    for degree in range(precision):
+        qc = shor.phase_estimation_circuit(shor.c_amod15_powers(a), psi_prep, precision, degree)
+        compiled = transpile_cache.transpile(qc, backends.get_simulator())
+        qft = approximate_qft.inverse_qft(precision, degree).decompose()
+        seconds = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            distribution = backends.sample(qc).quasi_dists[0]
+            seconds = min(seconds, time.perf_counter() - start)
+        rows.append({
+            'degree': degree,
+            'auto': degree == auto,
+            'smallest_angle': approximate_qft.smallest_angle(precision, degree),
+            'rotations': qft.count_ops().get('cp', 0),
+            'gates': compiled.size() - compiled.count_ops().get('barrier', 0),
+            'depth': compiled.depth(),
+            'qft_depth': qft.depth(),
+            'seconds': seconds,
+            'success': sum(distribution.get(y, 0.0) for y in peaks),
+        })
+    for row in rows:
+        row['loss'] = rows[0]['success'] - row['success']
+    return rows
+
+
+def main(argv=None):
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description='Approximate inverse QFT trade-offs')
+    parser.add_argument('--precisions', type=int, nargs='+', default=[6, 10, 12])
+    parser.add_argument('--phases', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=1, help='timed runs per degree; the fastest is reported')
+    parser.add_argument('--a', type=int, default=7, help="base of Shor's order finding")
+    parser.add_argument('--shor-precision', type=int, default=8)
+    parser.add_argument('--max-loss', type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    qpe = load_script('qpe')
+    phis = np.random.default_rng(0).uniform(0, 1, args.phases)
+    ok = True
+    for precision in args.precisions:
+        print(f'phase gate, {precision} bits, {args.phases} phases')
+        print(HEADER)
+        for row in qpe.approximation_report(precision, phis=phis, repeats=args.repeats):
+            print(_row(row))
+            ok = ok and not (row['auto'] and row['loss'] > args.max_loss)
+        print()
+
+    print(f"Shor order finding of {args.a} mod 15, {args.shor_precision} bits")
+    print(HEADER)
+    for row in shor_report(args.a, args.shor_precision, repeats=args.repeats):
+        print(_row(row))
+        ok = ok and not (row['auto'] and row['loss'] > args.max_loss)
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+Bulk Deutsch-Jozsa classification of compact oracle records.
+
+Oracles are drawn in chunks with a seeded generator and classified with one vectorized pass per chunk.
+tests/test_deutsch_jozsa.py checks the bulk classifier against simulated circuits.
+
+    python benchmarks/dj_bulk.py
+    python benchmarks/dj_bulk.py --oracles 100000000 --n 48 --chunk 4000000 --seed 7
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from uqic import load_script
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk classification of compact Deutsch-Jozsa oracles')
+    parser.add_argument('--oracles', type=int, default=10**7)
+    parser.add_argument('--n', type=int, default=32)
+    parser.add_argument('--chunk', type=int, default=2**21)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    dj = load_script('deutsch-jozsa')
+    seeds = np.random.SeedSequence(args.seed)
+
+    generate = classify = 0.0
+    balanced_total = done = 0
+    while done < args.oracles:
+        count = min(args.chunk, args.oracles - done)
+        start = time.perf_counter()
+        oracles = dj.random_oracles(count, args.n, seed=seeds.spawn(1)[0])
+        middle = time.perf_counter()
+        _, balanced = dj.classify_oracles(oracles)
+        balanced_total += int(balanced.sum())
+        end = time.perf_counter()
+        generate += middle - start
+        classify += end - middle
+        done += count
+
+    print(f"oracles: {done:,} (n={args.n}), balanced fraction {balanced_total / done:.4f}")
+    print(f"generation: {done / generate:,.0f} oracles/s")
+    print(f"classification: {done / classify:,.0f} oracles/s")
+    print(f"record size: {dj.oracle_dtype().itemsize} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Iterative (single control qubit) phase estimation against the QFT-based circuit.
+
+For each precision m, both versions of phase-estimation-general-case.py estimate --phases random phases. The QFT
+version needs m + 1 qubits, so its statevector doubles with every bit; the iterative version always needs 2 and
+reuses its control qubit through mid-circuit measurement, reset and classically conditioned corrections. The table
+shows qubits, statevector memory, mean time per estimate and the fraction of estimates within 2^-m of the phase
+(the nearest m-bit value is the most likely outcome of both). A last section does the same for Shor's order finding
+of 7 mod 15. The script exits with status 1 if the iterative estimates are less accurate than the QFT ones.
+
+    python benchmarks/iterative_qpe.py
+    python benchmarks/iterative_qpe.py --precisions 4 8 12 14 --iterative-precisions 20 40 52
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uqic import load_script
+
+
+def _memory(qubits):
+    size = 16 * 2**qubits
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            return f'{size:.0f} {unit}'
+        size /= 1024
+    return f'{size:.0f} TiB'
+
+
+def _close(estimate, phi, precision):
+    error = abs(estimate - phi)
+    return min(error, 1 - error) <= 2**-precision
+
+
+def measure(estimate, phis, precision):
+    """
+    Returns the mean seconds per estimate and the fraction of estimates within 2^-precision of their phase.
+    """
+    estimate(phis[0], precision)   # the first call transpiles
+    start = time.perf_counter()
+    correct = sum(_close(estimate(phi, precision), phi, precision) for phi in phis)
+    return (time.perf_counter() - start) / len(phis), correct / len(phis)
+
+
+def main(argv=None):
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description='Iterative against QFT-based phase estimation')
+    parser.add_argument('--precisions', type=int, nargs='+', default=[4, 8, 10, 12])
+    parser.add_argument('--iterative-precisions', type=int, nargs='+', default=[20, 40, 52],
+                        help='precisions beyond the QFT version, run iteratively only')
+    parser.add_argument('--phases', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    qpe = load_script('qpe')
+    phis = list(np.random.default_rng(0).uniform(0, 1, args.phases))
+
+    def qft(phi, precision):
+        return qpe.phase_estimation(phi, precision)
+
+    print(f"{'bits':>4}  {'version':<10}{'qubits':>7}{'statevector':>13}{'ms/estimate':>13}{'within 2^-m':>13}")
+    ok = True
+    for precision in args.precisions + args.iterative_precisions:
+        rows = [('iterative', 2, qpe.iterative_phase_estimation)]
+        if precision in args.precisions:
+            rows.insert(0, ('qft', precision + 1, qft))
+        accuracy = {}
+        for name, qubits, estimate in rows:
+            seconds, accuracy[name] = measure(estimate, phis, precision)
+            print(f'{precision:>4}  {name:<10}{qubits:>7}{_memory(qubits):>13}{seconds * 1e3:>13.1f}'
+                  f'{accuracy[name]:>13.0%}')
+        # the QFT estimate itself is only right with probability >= 4/pi^2, so allow one miss more
+        ok = ok and accuracy['iterative'] >= accuracy.get('qft', 1.0) - 1 / len(phis)
+
+    shor = load_script('shor')
+    print("\nShor order finding of 7 mod 15, 8 bits, 64 shots")
+    for name, iterative, qubits in (('qft', False, 8 + 4), ('iterative', True, 1 + 4)):
+        shor.find_order(7, 15, 8, shots=64, iterative=iterative)
+        start = time.perf_counter()
+        order = shor.find_order(7, 15, 8, shots=64, iterative=iterative)['order']
+        seconds = time.perf_counter() - start
+        print(f'  {name:<10}{qubits:>3} qubits {_memory(qubits):>9}  {seconds * 1e3:8.1f} ms  order {order}')
+        ok = ok and order == 4
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
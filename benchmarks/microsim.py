@@ -0,0 +1,61 @@
+"""
+Per-run latency of the NumPy micro-simulator against Aer for the repository's small circuits.
+
+Each circuit (a Deutsch oracle, a superdense coding message, a CHSH question pair and the two small phase
+estimation circuits) is run --repeats times through backends.run, which picks microsim, and then with
+method='statevector', which forces Aer. tests/test_microsim.py checks microsim's distributions against Statevector.
+
+    python benchmarks/microsim.py
+    python benchmarks/microsim.py --repeats 2000 --shots 1
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backends
+from uqic import load_script
+
+
+def circuits():
+    """
+    Returns (name, circuit) pairs for the small circuits the scripts run.
+    """
+    return [
+        ('deutsch 3', load_script('deutsch').deutsch_circuit('3')),
+        ('superdense 10', load_script('superdense').message_circuit('10')),
+        ('chsh 11', load_script('chsh').quantum_strategy_circuit(1, 1)),
+        ('qpe-low-precision 0.3', load_script('qpe-low-precision').phase_estimation_circuit(0.3)),
+        ('qpe-2-qubits 0.3', load_script('qpe-2-qubits').phase_estimation_circuit(0.3)),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-simulator latency against Aer')
+    parser.add_argument('--repeats', type=int, default=500)
+    parser.add_argument('--shots', type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    print(f"{'circuit':<24}{'microsim us':>13}{'aer us':>10}{'speed-up':>10}")
+    for name, qc in circuits():
+        backends.run(qc, shots=1)
+        backends.run(qc, shots=1, method='statevector')
+
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            backends.run(qc, shots=args.shots)
+        micro = (time.perf_counter() - start) / args.repeats
+
+        repeats = max(1, args.repeats // 20)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            backends.run(qc, shots=args.shots, method='statevector')
+        aer = (time.perf_counter() - start) / repeats
+
+        print(f"{name:<24}{micro * 1e6:>13.1f}{aer * 1e6:>10.0f}{aer / micro:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Throughput of the batched noise-sweep engine, with a few points of each fidelity curve.
+
+The CHSH win probability and the superdense coding error rates are evaluated over a grid of depolarizing,
+amplitude-damping and readout-error probabilities with --points values per axis (--points**3 grid points).
+
+    python benchmarks/noise_sweep.py
+    python benchmarks/noise_sweep.py --points 60
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import noise_sweep
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Batched noise sweep of superdense coding and CHSH')
+    parser.add_argument('--points', type=int, default=47, help='grid values per noise parameter')
+    args = parser.parse_args(argv)
+
+    # build and hash the protocol circuits before timing
+    noise_sweep.chsh_win_probability()
+    noise_sweep.superdense_error_rates()
+
+    axis = np.linspace(0, 1, args.points)
+    p, gamma, e = axis[:, None, None], axis[None, :, None], axis[None, None, :] / 2
+    size = args.points**3
+
+    start = time.perf_counter()
+    win = noise_sweep.chsh_win_probability(p, gamma, e)
+    chsh_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    errors = noise_sweep.superdense_error_rates(p, gamma, e)['error_rate']
+    superdense_seconds = time.perf_counter() - start
+
+    print(f"grid: {size:,} points")
+    print(f"CHSH win probability: {chsh_seconds:.3f} s ({size / chsh_seconds:,.0f} points/s)")
+    print(f"superdense error rates: {superdense_seconds:.3f} s ({size / superdense_seconds:,.0f} points/s)")
+
+    print(f"{'depolarizing':>13}{'CHSH win':>10}{'superdense error':>18}")
+    for i in np.linspace(0, args.points - 1, 6).astype(int):
+        print(f"{axis[i]:>13.3f}{win[i, 0, 0]:>10.4f}{errors[i, 0, 0]:>18.4f}")
+
+
+if __name__ == '__main__':
+    main()
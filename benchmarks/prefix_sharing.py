@@ -0,0 +1,72 @@
+"""
+Simulating a circuit family's common prefix once against simulating every variant from scratch.
+
+The family is a deep random prefix on --qubits qubits followed by --variants different measurement-basis suffixes
+(one ry rotation per qubit and a final measurement), the shape of a CHSH-style sweep on a larger state. Exact
+distributions are computed with prefix_sharing.family_distributions and, for comparison, with one Statevector
+simulation per variant; the script exits with status 1 if they differ.
+
+    python benchmarks/prefix_sharing.py
+    python benchmarks/prefix_sharing.py --qubits 12 --prefix-depth 80 --variants 128
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import prefix_sharing
+import result_cache
+
+
+def family(qubits, prefix_depth, variants, seed=0):
+    """
+    Returns variants circuits sharing a random prefix of depth prefix_depth.
+    """
+    import numpy as np
+    from qiskit.circuit.random import random_circuit
+
+    prefix = random_circuit(qubits, prefix_depth, max_operands=2, seed=seed)
+    rng = np.random.default_rng(seed)
+    circuits = []
+    for _ in range(variants):
+        qc = prefix.copy()
+        qc.barrier()
+        for qubit, angle in enumerate(rng.uniform(-np.pi, np.pi, qubits)):
+            qc.ry(angle, qubit)
+        qc.measure_all()
+        circuits.append(qc)
+    return circuits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prefix sharing against independent simulation')
+    parser.add_argument('--qubits', type=int, default=10)
+    parser.add_argument('--prefix-depth', type=int, default=60)
+    parser.add_argument('--variants', type=int, default=64)
+    args = parser.parse_args(argv)
+
+    circuits = family(args.qubits, args.prefix_depth, args.variants)
+
+    stats = {}
+    start = time.perf_counter()
+    shared = prefix_sharing.family_distributions(circuits, stats=stats)
+    shared_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    independent = [result_cache.exact_distribution(qc) for qc in circuits]
+    independent_seconds = time.perf_counter() - start
+
+    exact = all(max(abs(a.get(key, 0.0) - b.get(key, 0.0)) for key in a.keys() | b.keys()) < 1e-10
+                for a, b in zip(shared, independent))
+    print(f"{args.variants} variants on {args.qubits} qubits, prefix of {stats['prefix_operations']} gates")
+    print(f"gates simulated: {stats['operations']:,} shared, {stats['naive_operations']:,} independent")
+    print(f"shared prefix: {shared_seconds * 1e3:.1f} ms")
+    print(f"independent:   {independent_seconds * 1e3:.1f} ms ({independent_seconds / shared_seconds:.1f}x)")
+    print(f"distributions match: {'yes' if exact else 'NO'}")
+    return 0 if exact else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Measures the batch throughput of the analytic QPE engine.
+
+    python benchmarks/qpe_analytic.py
+    python benchmarks/qpe_analytic.py --phases 2000000 --precision 30
+
+Its agreement with simulation, and its exactness beyond int64 precisions, are checked in tests/test_qpe_analytic.py.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from uqic import load_script
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analytic QPE engine benchmark')
+    parser.add_argument('--phases', type=int, default=10**6)
+    parser.add_argument('--precision', type=int, default=30)
+    args = parser.parse_args(argv)
+
+    qpe = load_script('qpe')
+
+    phis = np.random.default_rng(1).random(args.phases)
+    m = args.precision
+
+    start = time.perf_counter()
+    qpe.qpe_success_probability(phis, m)
+    elapsed = time.perf_counter() - start
+    print(f"success probabilities, m={m}: {args.phases / elapsed:,.0f} phases/s")
+
+    start = time.perf_counter()
+    qpe.qpe_sample(phis, m, seed=2)
+    elapsed = time.perf_counter() - start
+    print(f"one sample per phase, m={m}: {args.phases / elapsed:,.0f} phases/s")
+
+    start = time.perf_counter()
+    qpe.qpe_distribution(0.3, m)
+    elapsed = time.perf_counter() - start
+    print(f"windowed distribution, m={m}: {elapsed * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Simulator runs against cached exact distributions for the repository's small repeated circuits.
+
+Each circuit (the four Deutsch oracles, the four superdense coding messages and the four CHSH question pairs) is
+run --repeats times on the Aer simulator with backends.run, then sampled the same number of times from
+result_cache, and for reference run on microsim, where backends.run sends such small circuits by default. The cache
+tier can be put on disk with --path to measure a warm restart.
+
+    python benchmarks/result_cache.py
+    python benchmarks/result_cache.py --repeats 200 --path /tmp/uqic-cache
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backends
+import microsim
+import result_cache
+from uqic import load_script
+
+
+def circuits():
+    """
+    Returns (name, circuit) pairs for the circuits the scripts re-simulate most often.
+    """
+    from qiskit import QuantumCircuit
+
+    deutsch = load_script('deutsch')
+    chsh = load_script('chsh')
+    pairs = []
+    for function in '1234':
+        qc = QuantumCircuit(2, 1)
+        qc.x(1)
+        qc.h([0, 1])
+        qc.compose(deutsch.deutsch_query_gate(function), inplace=True)
+        qc.h(0)
+        qc.measure(0, 0)
+        pairs.append((f'deutsch {function}', qc))
+    for bits in ['00', '01', '10', '11']:
+        qc = QuantumCircuit(2)
+        qc.h(0)
+        qc.cx(0, 1)
+        if bits[1] == '1':
+            qc.z(0)
+        if bits[0] == '1':
+            qc.x(0)
+        qc.cx(0, 1)
+        qc.h(0)
+        qc.measure_all()
+        pairs.append((f'superdense {bits}', qc))
+    for x in (0, 1):
+        for y in (0, 1):
+            pairs.append((f'chsh {x}{y}', chsh.quantum_strategy_circuit(x, y)))
+    return pairs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Result cache against repeated simulation')
+    parser.add_argument('--repeats', type=int, default=100)
+    parser.add_argument('--shots', type=int, default=1024)
+    parser.add_argument('--path', help='directory for the on-disk tier')
+    args = parser.parse_args(argv)
+
+    cache = result_cache.configure(path=args.path)
+    pairs = circuits()
+    backends.run(pairs[0][1], method='statevector', shots=1)
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        for _, qc in pairs:
+            backends.run(qc, method='statevector', shots=args.shots)
+    simulated = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        for _, qc in pairs:
+            cache.sample(qc, shots=args.shots)
+    cached = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        for _, qc in pairs:
+            microsim.run(qc, shots=args.shots)
+    micro = time.perf_counter() - start
+
+    runs = args.repeats * len(pairs)
+    print(f"{runs} runs of {len(pairs)} circuits, {args.shots} shots each")
+    print(f"simulator: {simulated / runs * 1e3:.3f} ms/run")
+    print(f"cache:     {cached / runs * 1e3:.3f} ms/run ({simulated / cached:.1f}x)")
+    print(f"microsim:  {micro / runs * 1e3:.3f} ms/run ({simulated / micro:.1f}x)")
+    stats = cache.stats()
+    print(f"hits {stats['hits']}, disk hits {stats['disk_hits']}, misses {stats['misses']}, "
+          f"evictions {stats['evictions']}, hit rate {stats['hit_rate']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+Time and memory scaling of shor2.emulate_order_finding with the size of N.
+
+For moduli from 4 to 20 bits the script emulates order finding with precision min(2n, --max-precision) counting
+qubits, where n is the bit length of N, then recovers the order from --shots samples. Peak memory is measured with
+tracemalloc, which tracks numpy allocations.
+
+    python benchmarks/shor_emulator.py
+    python benchmarks/shor_emulator.py --max-precision 20 --output shor_emulator.json
+
+Expected scaling: time O(2^m + m*N) and memory O(2^m + N) for m counting qubits, i.e. linear in N and exponential
+only in the counting register; no 2^n x 2^n unitary is ever formed.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy  # noqa: F401  (imported up front so the first case does not pay for it)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import shor2
+
+# (N, a) with N a product of two primes and a coprime to N
+CASES = [
+    (15, 7),
+    (221, 2),
+    (3233, 3),
+    (64507, 2),
+    (1022117, 2),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scaling of the permutation-based order-finding emulator')
+    parser.add_argument('--max-precision', type=int, default=22)
+    parser.add_argument('--shots', type=int, default=64)
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'N':>9}{'bits':>6}{'m':>4}{'emulate s':>11}{'peak MB':>9}{'order':>8}{'jobs':>6}  check")
+    for N, a in CASES:
+        bits = N.bit_length()
+        precision = min(2 * bits, args.max_precision)
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        probabilities = shor2.emulate_order_finding(a, N, precision)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del probabilities
+
+        found = shor2.find_order(a, N, precision, args.shots, emulate=True)
+        order = found['order']
+        check = 'ok' if order is not None and pow(a, order, N) == 1 else 'no order'
+
+        results.append({
+            'N': N, 'a': a, 'bits': bits, 'precision': precision, 'emulate_seconds': elapsed,
+            'peak_bytes': peak, 'order': order, 'executions': found['executions'],
+        })
+        print(f"{N:>9}{bits:>6}{precision:>4}{elapsed:>11.3f}{peak / 2**20:>9.1f}{str(order):>8}"
+              f"{found['executions']:>6}  {check}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
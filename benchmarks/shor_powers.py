@@ -0,0 +1,82 @@
+"""
+Compares the two ways shor2.phase_estimation_circuit applies controlled powers of U.
+
+    repeated: 2**k copies of c_amod15(a) for counting qubit k (exponential in precision)
+    squared:  one cached c_amod15_power(a, k) built by repeated squaring (linear in precision)
+
+For each precision the script reports circuit size and the time spent constructing, transpiling and simulating.
+
+    python benchmarks/shor_powers.py --max-precision 10 --output shor_powers.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backends
+import shor2
+
+
+def measure(controlled_operation, precision, shots):
+    """
+    Returns sizes and stage timings (seconds) for one phase estimation circuit.
+    """
+    from qiskit import QuantumCircuit, transpile
+
+    psi_prep = QuantumCircuit(4)
+    psi_prep.x(0)
+    simulator = backends.get_simulator()
+
+    start = time.perf_counter()
+    qc = shor2.phase_estimation_circuit(controlled_operation, psi_prep, precision)
+    construction = time.perf_counter() - start
+
+    start = time.perf_counter()
+    transpiled = transpile(qc, simulator)
+    transpilation = time.perf_counter() - start
+
+    start = time.perf_counter()
+    simulator.run(transpiled, shots=shots).result()
+    simulation = time.perf_counter() - start
+
+    return {
+        'size': qc.size(),
+        'transpiled_size': transpiled.size(),
+        'transpiled_depth': transpiled.depth(),
+        'construction': construction,
+        'transpilation': transpilation,
+        'simulation': simulation,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Repeated controlled-U versus repeated squaring in Shor QPE')
+    parser.add_argument('--a', type=int, default=7)
+    parser.add_argument('--min-precision', type=int, default=2)
+    parser.add_argument('--max-precision', type=int, default=10)
+    parser.add_argument('--shots', type=int, default=1024)
+    parser.add_argument('--output', help='write results to this JSON file')
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'m':>3} {'path':<9}{'size':>7}{'tsize':>8}{'depth':>7}{'build s':>10}{'transp s':>10}{'sim s':>9}")
+    for precision in range(args.min_precision, args.max_precision + 1):
+        for path, operation in [('repeated', shor2.c_amod15(args.a)), ('squared', shor2.c_amod15_powers(args.a))]:
+            shor2._power_gates.clear()
+            result = measure(operation, precision, args.shots)
+            result.update(precision=precision, path=path)
+            results.append(result)
+            print(f"{precision:>3} {path:<9}{result['size']:>7}{result['transpiled_size']:>8}"
+                  f"{result['transpiled_depth']:>7}{result['construction']:>10.4f}"
+                  f"{result['transpilation']:>10.4f}{result['simulation']:>9.4f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Cold-start benchmark for the uqic command-line entry point.
+
+Each subcommand is run in a fresh interpreter several times and the fastest wall-clock time is kept. Purely
+classical subcommands have a start-up budget; the others are recorded so their trend can be followed.
+
+    python benchmarks/startup.py                          # run and print a table
+    python benchmarks/startup.py --output startup.json    # also save the results
+    python benchmarks/startup.py --baseline startup.json  # fail on budget overruns or >25% regressions
+
+The exit status is 1 if any subcommand is over budget or regressed against the baseline.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (name, arguments, budget in seconds or None)
+COMMANDS = [
+    ('help', ['--help'], 0.1),
+    ('chsh-classical', ['chsh', 'classical'], 0.1),
+    ('chsh-random-classical', ['chsh', 'random_classical'], 0.1),
+    ('shor-phase', ['shor', '--phase', '0.75', '--a', '7'], 0.1),
+    ('deutsch', ['deutsch', '2'], None),
+    ('deutsch-jozsa', ['deutsch-jozsa', '4'], None),
+    ('simon', ['simon', '101'], None),
+    ('shor', ['shor', '--a', '7'], None),
+    ('chsh-quantum', ['chsh', 'quantum', '--games', '100'], None),
+    ('superdense', ['superdense', '10'], None),
+    ('qpe', ['qpe', '0.3', '--precision', '5'], None),
+]
+
+
+def cold_start(arguments, repeats):
+    """
+    Returns the fastest of several wall-clock times of `python -m uqic <arguments>` in a fresh interpreter.
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'uqic', *arguments], cwd=ROOT, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def baseline_interpreter(repeats):
+    """
+    Returns the fastest start-up time of a bare interpreter, to separate Python's own start-up from ours.
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'], check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold-start benchmark for python -m uqic')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--only', nargs='*', help='names of the subcommands to run')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='compare against results saved with --output')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown against the baseline')
+    args = parser.parse_args(argv)
+
+    results = {'python': baseline_interpreter(args.repeats), 'commands': {}}
+    for name, arguments, budget in COMMANDS:
+        if args.only and name not in args.only:
+            continue
+        results['commands'][name] = {'seconds': cold_start(arguments, args.repeats), 'budget': budget}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['commands']
+
+    failed = False
+    print(f"{'command':<24}{'seconds':>10}{'budget':>10}{'baseline':>10}  status")
+    for name, result in results['commands'].items():
+        status = 'ok'
+        if result['budget'] is not None and result['seconds'] > result['budget']:
+            status = 'OVER BUDGET'
+        previous = baseline.get(name, {}).get('seconds') if baseline else None
+        if previous is not None and result['seconds'] > previous * (1 + args.tolerance):
+            status = 'REGRESSED'
+        failed = failed or status != 'ok'
+        budget = f"{result['budget']:.3f}" if result['budget'] is not None else '-'
+        previous = f"{previous:.3f}" if previous is not None else '-'
+        print(f"{name:<24}{result['seconds']:>10.3f}{budget:>10}{previous:>10}  {status}")
+    print(f"(bare interpreter start-up: {results['python']:.3f}s)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
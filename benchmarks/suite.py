@@ -0,0 +1,310 @@
+"""
+Benchmark suite for every algorithm in the repository, with a per-stage breakdown and regression tracking.
+
+Each case sweeps one algorithm over problem sizes (n, precision) and shot counts, and times four stages separately:
+
+    construct    building the circuit with the script's own builder
+    transpile    qiskit.transpile for the simulator backends.route() picks
+    simulate     running the transpiled circuit on that shared simulator
+    postprocess  the script's classical post-processing of the counts
+
+Every stage is repeated --repeats times and the fastest time is kept. Peak Python memory of a case is measured with
+tracemalloc on one extra, untimed pass (it sees numpy but not Aer's own allocations), and the process's maximum
+resident set size is recorded alongside it. Everything runs offline on the CPU.
+
+    python benchmarks/suite.py run                                # print a table
+    python benchmarks/suite.py run --output bench.json            # also save the results
+    python benchmarks/suite.py run --only simon shor --repeats 5
+    python benchmarks/suite.py compare baseline.json bench.json   # flag regressions
+    python benchmarks/suite.py run --baseline baseline.json       # run, then compare
+
+compare exits with status 1 if any stage time or peak memory grew by more than --threshold (25% by default) and by
+more than --min-seconds, or if a case of the baseline is missing.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STAGES = ['construct', 'transpile', 'simulate', 'postprocess']
+
+
+def _deutsch_cases(load):
+    deutsch = load('deutsch')
+    for function in '1234':
+        yield {'params': {'function': function}, 'build': lambda f=function: deutsch.deutsch_circuit(f),
+               'post': lambda counts: int(max(counts, key=counts.get))}
+
+
+def _deutsch_jozsa_cases(load, sizes):
+    dj = load('deutsch-jozsa')
+    for n in sizes:
+        # a fixed balanced oracle keeps runs comparable
+        oracle = (dj.BALANCED, 2**n - 1, 1)
+        yield {'params': {'n': n}, 'build': lambda n=n, o=oracle: dj.deutsch_jozsa_circuit(n, o),
+               'post': lambda counts: 'Balanced' if '1' in max(counts, key=counts.get) else 'Constant'}
+
+
+def _simon_cases(load, sizes):
+    simon = load('simon')
+
+    def post(counts, n):
+        basis = simon.GF2Basis(n)
+        for y in counts:
+            basis.add(int(y, 2))
+        return basis.null_vector()
+
+    for n in sizes:
+        string = ('1' + '01' * n)[:n]
+        yield {'params': {'n': n}, 'build': lambda s=string: simon.simon_circuit(s),
+               'post': lambda counts, n=n: post(counts, n)}
+
+
+def _qpe_cases(load, precisions):
+    qpe = load('qpe')
+    for m in precisions:
+        def build(m=m):
+            qc = qpe.phase_estimation_circuit(m)
+            return qc.assign_parameters({qc.parameters[0]: 0.3}, inplace=False)
+        yield {'params': {'precision': m}, 'build': build,
+               'post': lambda counts, m=m: int(max(counts, key=counts.get), 2) / 2**m}
+
+
+def _qpe_small_cases(load, name, outcomes):
+    script = load(name)
+    yield {'params': {'theta': 0.3}, 'build': lambda: script.phase_estimation_circuit(0.3),
+           'post': lambda counts: int(max(counts, key=counts.get), 2) / outcomes}
+
+
+def _shor_cases(load, precisions):
+    shor = load('shor')
+    for m in precisions:
+        def build(m=m):
+            from qiskit import QuantumCircuit
+
+            psi_prep = QuantumCircuit(4)
+            psi_prep.x(0)
+            return shor.phase_estimation_circuit(shor.c_amod15_powers(7), psi_prep, m)
+        yield {'params': {'a': 7, 'N': 15, 'precision': m}, 'build': build,
+               'post': lambda counts, m=m: shor.order_candidates({int(y, 2) for y in counts}, m, 7, 15)[0]}
+
+
+def _superdense_cases(load):
+    superdense = load('superdense')
+    for bits in ['00', '01', '10', '11']:
+        yield {'params': {'bits': bits}, 'build': lambda b=bits: superdense.message_circuit(b),
+               'post': lambda counts: max(counts, key=counts.get)}
+
+
+def _chsh_cases(load):
+    chsh = load('chsh')
+    for x in (0, 1):
+        for y in (0, 1):
+            def post(counts, x=x, y=y):
+                wins = sum(c for key, c in counts.items() if (int(key[0]) ^ int(key[1])) == (x & y))
+                return wins / sum(counts.values())
+            yield {'params': {'x': x, 'y': y}, 'build': lambda x=x, y=y: chsh.quantum_strategy_circuit(x, y),
+                   'post': post}
+
+
+def cases(args):
+    """
+    Returns (algorithm, case) pairs for the algorithms selected by args.only.
+    """
+    from uqic import load_script
+
+    generators = {
+        'deutsch': lambda: _deutsch_cases(load_script),
+        'deutsch-jozsa': lambda: _deutsch_jozsa_cases(load_script, args.n),
+        'simon': lambda: _simon_cases(load_script, args.n),
+        'qpe': lambda: _qpe_cases(load_script, args.precision),
+        'qpe-2-qubits': lambda: _qpe_small_cases(load_script, 'qpe-2-qubits', 4),
+        'qpe-low-precision': lambda: _qpe_small_cases(load_script, 'qpe-low-precision', 2),
+        'shor': lambda: _shor_cases(load_script, [m for m in args.precision if m <= 8]),
+        'superdense': lambda: _superdense_cases(load_script),
+        'chsh': lambda: _chsh_cases(load_script),
+    }
+    for algorithm in args.only or generators:
+        for case in generators[algorithm]():
+            yield algorithm, case
+
+
+def measure(case, shots, repeats):
+    """
+    Times the stages of one case and measures its peak memory.
+
+    Returns:
+        result (dict): 'stages' (fastest seconds per stage), 'total', 'peak_bytes', 'maxrss_kb' and 'method'
+    """
+    from qiskit import transpile
+    import backends
+
+    def once():
+        start = time.perf_counter()
+        qc = case['build']()
+        built = time.perf_counter()
+        method = backends.route(qc)['method']
+        simulator = backends.get_simulator(method=method)
+        routed = time.perf_counter()
+        compiled = transpile(qc, simulator)
+        transpiled = time.perf_counter()
+        counts = simulator.run(compiled, shots=shots).result().get_counts()
+        simulated = time.perf_counter()
+        case['post'](counts)
+        done = time.perf_counter()
+        return method, [built - start, transpiled - routed, simulated - transpiled, done - simulated]
+
+    best = dict.fromkeys(STAGES, float('inf'))
+    for _ in range(repeats):
+        method, seconds = once()
+        for stage, elapsed in zip(STAGES, seconds):
+            best[stage] = min(best[stage], elapsed)
+
+    # tracemalloc slows allocation-heavy stages down, so memory is measured on a separate, untimed pass
+    tracemalloc.start()
+    once()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'stages': best,
+        'total': sum(best.values()),
+        'peak_bytes': peak,
+        'maxrss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'method': method,
+    }
+
+
+def case_name(algorithm, params, shots):
+    return ' '.join([algorithm] + [f'{key}={value}' for key, value in params.items()] + [f'shots={shots}'])
+
+
+def run(args):
+    import qiskit
+    import backends
+
+    # pay for the simulators' start-up outside the timed stages
+    backends.get_simulator(method='stabilizer')
+    backends.get_simulator(method='statevector')
+
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'qiskit': qiskit.__version__,
+            'machine': platform.machine(),
+            'system': platform.system(),
+            'cpus': os.cpu_count(),
+            'repeats': args.repeats,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'cases': {},
+    }
+    print(f"{'case':<48}" + ''.join(f'{stage:>12}' for stage in STAGES) + f"{'peak KB':>10}")
+    for algorithm, case in cases(args):
+        for shots in args.shots:
+            name = case_name(algorithm, case['params'], shots)
+            result = measure(case, shots, args.repeats)
+            result.update(algorithm=algorithm, params=case['params'], shots=shots)
+            results['cases'][name] = result
+            print(f'{name:<48}' + ''.join(f"{result['stages'][stage] * 1e3:>10.2f}ms" for stage in STAGES)
+                  + f"{result['peak_bytes'] / 1024:>10.0f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            return report(compare(json.load(f), results, args.threshold, args.min_seconds))
+    return 0
+
+
+def compare(baseline, current, threshold=0.25, min_seconds=0.005):
+    """
+    Compares two suite results.
+
+    Args:
+        baseline (dict): results of an earlier run
+        current (dict): results to check
+        threshold (float): relative growth that counts as a regression
+        min_seconds (float): absolute growth in seconds below which a stage never counts as a regression
+    Returns:
+        regressions (list): (case, metric, baseline value, current value) tuples, with None for a missing case
+    """
+    regressions = []
+    for name, before in baseline['cases'].items():
+        after = current['cases'].get(name)
+        if after is None:
+            regressions.append((name, 'missing', None, None))
+            continue
+        for stage in STAGES:
+            old, new = before['stages'][stage], after['stages'][stage]
+            if new > old * (1 + threshold) and new - old > min_seconds:
+                regressions.append((name, stage, old, new))
+        old, new = before['peak_bytes'], after['peak_bytes']
+        if new > old * (1 + threshold) and new - old > 64 * 1024:
+            regressions.append((name, 'peak_bytes', old, new))
+    return regressions
+
+
+def report(regressions):
+    if not regressions:
+        print('no regressions')
+        return 0
+    for name, metric, old, new in regressions:
+        if metric == 'missing':
+            print(f'REGRESSION {name}: missing from the current results')
+        elif metric == 'peak_bytes':
+            print(f'REGRESSION {name}: peak memory {old / 1024:.0f} KB -> {new / 1024:.0f} KB')
+        else:
+            print(f'REGRESSION {name}: {metric} {old * 1e3:.2f} ms -> {new * 1e3:.2f} ms')
+    return 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmark suite for the algorithms in this repository')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('run', help='run the suite')
+    command.add_argument('--only', nargs='+', metavar='ALGORITHM',
+                         choices=['deutsch', 'deutsch-jozsa', 'simon', 'qpe', 'qpe-2-qubits', 'qpe-low-precision',
+                                  'shor', 'superdense', 'chsh'])
+    command.add_argument('--n', type=int, nargs='+', default=[4, 8, 16], help='sizes for Deutsch-Jozsa and Simon')
+    command.add_argument('--precision', type=int, nargs='+', default=[3, 6, 8],
+                         help='precisions for phase estimation and Shor (Shor uses those up to 8)')
+    command.add_argument('--shots', type=int, nargs='+', default=[1, 1024])
+    command.add_argument('--repeats', type=int, default=3)
+    command.add_argument('--output', help='write results to this JSON file')
+    command.add_argument('--baseline', help='compare against this JSON file after running')
+    command.add_argument('--threshold', type=float, default=0.25)
+    command.add_argument('--min-seconds', type=float, default=0.005)
+    command.set_defaults(run=run)
+
+    command = commands.add_parser('compare', help='compare two saved results')
+    command.add_argument('baseline')
+    command.add_argument('current')
+    command.add_argument('--threshold', type=float, default=0.25)
+    command.add_argument('--min-seconds', type=float, default=0.005)
+
+    def compare_files(args):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        return report(compare(baseline, current, args.threshold, args.min_seconds))
+
+    command.set_defaults(run=compare_files)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Throughput of the streaming superdense coding channel on multi-megabyte payloads.
+
+A random payload is written to a temporary file and streamed through superdense_stream from the open file, so
+memory stays bounded by --chunk-bytes. The decoded stream is compared with the payload byte for byte, and the
+script exits with status 1 if they differ.
+
+    python benchmarks/superdense_stream.py
+    python benchmarks/superdense_stream.py --megabytes 64 --chunk-bytes 1048576
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uqic import load_script
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Streaming superdense coding throughput')
+    parser.add_argument('--megabytes', type=int, default=16)
+    parser.add_argument('--chunk-bytes', type=int, default=1 << 16)
+    args = parser.parse_args(argv)
+
+    superdense = load_script('superdense')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'payload.bin')
+        sent = hashlib.sha256()
+        with open(path, 'wb') as f:
+            for _ in range(args.megabytes):
+                block = os.urandom(1 << 20)
+                sent.update(block)
+                f.write(block)
+
+        stats = {}
+        received = hashlib.sha256()
+        start = time.perf_counter()
+        with open(path, 'rb') as f:
+            for decoded in superdense.superdense_stream(f, chunk_bytes=args.chunk_bytes, stats=stats):
+                received.update(decoded)
+        elapsed = time.perf_counter() - start
+
+    ok = sent.digest() == received.digest()
+    print(f"payload: {stats['bytes']:,} bytes in {stats['messages']:,} two-bit messages")
+    print(f"channel: {stats['bits_per_second'] / 1e6:,.1f} Mbit/s decoding, "
+          f"{8 * stats['bytes'] / elapsed / 1e6:,.1f} Mbit/s including file reads")
+    print(f"round trip: {'ok' if ok else 'MISMATCH'}")
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Transpiling repeated circuit structures every time against looking them up in transpile_cache.
+
+Three structures the scripts rebuild on every call are used: the parameterized 2-qubit phase estimation template
+(bound to a new theta each time), the Shor order-finding circuit for a = 7 and a Simon circuit. Each is transpiled
+--repeats times with qiskit.transpile, then looked up once cold (a miss, or a QPY load from disk) and --repeats times
+warm through the cache. The cache tier can be put on disk with --path to measure a restart.
+
+    python benchmarks/transpile_cache.py
+    python benchmarks/transpile_cache.py --repeats 50 --path /tmp/uqic-transpiled
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backends
+import transpile_cache
+from uqic import load_script
+
+
+def circuits():
+    """
+    Returns (name, circuit, parameter values) triples for structures the scripts transpile over and over.
+    """
+    from qiskit import QuantumCircuit
+
+    qpe = load_script('qpe-2-qubits')
+    shor = load_script('shor')
+    simon = load_script('simon')
+    psi_prep = QuantumCircuit(4)
+    psi_prep.x(0)
+    return [
+        ('qpe-2-qubits template', qpe.phase_estimation_template(), lambda i: [(i % 100) / 100]),
+        ('shor a=7 m=8', shor.phase_estimation_circuit(shor.c_amod15_powers(7), psi_prep, 8), lambda i: None),
+        ('simon 101101', simon.simon_circuit('101101'), lambda i: None),
+    ]
+
+
+def main(argv=None):
+    from qiskit import transpile
+
+    parser = argparse.ArgumentParser(description='Transpile cache against repeated transpilation')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--path', help='directory for the on-disk tier')
+    args = parser.parse_args(argv)
+
+    cache = transpile_cache.configure(path=args.path)
+    simulator = backends.get_simulator(method='statevector')
+
+    print(f"{'circuit':<24}{'transpile ms':>14}{'cold ms':>10}{'cached ms':>12}{'speed-up':>10}")
+    for name, qc, values in circuits():
+        start = time.perf_counter()
+        for i in range(args.repeats):
+            values_i = values(i)
+            transpile(qc.assign_parameters(values_i) if values_i else qc, simulator)
+        direct = (time.perf_counter() - start) / args.repeats
+
+        start = time.perf_counter()
+        cache.transpile(qc, simulator, parameter_values=values(0))
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for i in range(args.repeats):
+            cache.transpile(qc, simulator, parameter_values=values(i))
+        cached = (time.perf_counter() - start) / args.repeats
+        print(f'{name:<24}{direct * 1e3:>14.3f}{cold * 1e3:>10.3f}{cached * 1e3:>12.3f}{direct / cached:>9.1f}x')
+
+    stats = cache.stats()
+    print(f"hits {stats['hits']}, disk hits {stats['disk_hits']}, misses {stats['misses']}, "
+          f"hit rate {stats['hit_rate']:.3f}, {stats['seconds_saved']:.2f} s of transpilation saved")
+
+
+if __name__ == '__main__':
+    main()
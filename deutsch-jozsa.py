@@ -1,10 +1,148 @@
-from qiskit import QuantumCircuit
 import random
-from qiskit_aer import AerSimulator
+import backends
+import tracing
+
+CONSTANT=0
+BALANCED=1
+
+def oracle_dtype():
+    """
+    Returns the NumPy structured dtype of a compact oracle record.
+
+    Returns:
+        dtype (numpy.dtype): fields 'kind' (CONSTANT or BALANCED), 'mask' (uint64) and 'constant' (0 or 1)
+    Notes:
+        -A record describes f(x) = (mask . x) XOR constant, where . is the binary dot product and bit i of mask
+         acts on qubit i. Constant functions have mask 0; balanced functions have a non-zero mask.
+        -'kind' is only the label the record was drawn with; evaluating, classifying and building the oracle use
+         mask and constant alone
+    """
+    import numpy as np
+
+    return np.dtype([('kind','u1'),('mask','u8'),('constant','u1')])
+
+
+def random_oracles(count,n,seed=None):
+    """
+    Draws compact records of random query gates, each constant or balanced with 50/50 chance.
+
+    Args:
+        count (int): number of oracles
+        n (int): value of n for the Deutsch-Jozsa problem (at most 64)
+        seed (int): seed for numpy's random generator (optional)
+    Returns:
+        oracles (numpy.ndarray): structured array of oracle_dtype() records
+    Raises:
+        TypeError: if n is not an integer
+        ValueError: if n is not between 1 and 64
+    Notes:
+        -uses numpy package; balanced masks are uniform over the 2**n-1 non-zero strings
+    """
+    if not isinstance(n,int):
+        raise TypeError('n must be a positive integer.')
+    if not (0<n<=64):
+        raise ValueError('n must be between 1 and 64 for compact oracles.')
+
+    import numpy as np
+
+    rng=np.random.default_rng(seed)
+    oracles=np.empty(count,dtype=oracle_dtype())
+    kind=rng.integers(0,2,count,dtype=np.uint8)
+    oracles['kind']=kind
+    oracles['constant']=rng.integers(0,2,count,dtype=np.uint8)
+    masks=rng.integers(1,2**n-1,count,dtype=np.uint64,endpoint=True)
+    oracles['mask']=np.where(kind==BALANCED,masks,np.uint64(0))
+    return oracles
+
+
+def evaluate_oracles(oracles,x):
+    """
+    Classically evaluates compact oracles on inputs x.
+
+    Args:
+        oracles (numpy.ndarray): structured array of oracle_dtype() records
+        x (int or numpy.ndarray): inputs packed into integers, broadcast against oracles
+    Returns:
+        values (numpy.ndarray): f(x) for each oracle (uint8)
+    """
+    import numpy as np
+
+    x=np.asarray(x,dtype=np.uint64)
+    return (_parity(oracles['mask']&x)^oracles['constant']).astype(np.uint8)
+
+
+def _parity(values):
+    """
+    Parity of the set bits of each uint64, with np.bitwise_count on numpy 2 and XOR folding before it.
+    """
+    import numpy as np
+
+    if hasattr(np,'bitwise_count'):
+        return (np.bitwise_count(values)&1).astype(np.uint8)
+    values=np.array(values,dtype=np.uint64)
+    for shift in (32,16,8,4,2,1):
+        values^=values>>np.uint64(shift)
+    return (values&np.uint64(1)).astype(np.uint8)
+
+
+def classify_oracles(oracles):
+    """
+    Classifies a batch of compact oracles in one vectorized pass.
+
+    For f(x) = (mask . x) XOR constant, the Deutsch-Jozsa circuit measures the string mask with certainty (the
+    constant only flips the global phase), so the outcome of every oracle follows from its function without
+    building or simulating a circuit. The records' 'kind' labels are not read.
+
+    Args:
+        oracles (numpy.ndarray): structured array of oracle_dtype() records
+    Returns:
+        outcomes (numpy.ndarray): measured strings packed into integers (uint64), bit i being qubit i
+        balanced (numpy.ndarray): True where the outcome is non-zero, i.e. the algorithm answers 'Balanced'
+    """
+    import numpy as np
+
+    outcomes=np.asarray(oracles['mask'],dtype=np.uint64)
+    return outcomes,outcomes!=0
+
+
+def oracle_circuit(oracle,n):
+    """
+    Materializes the query gate of one compact oracle as a circuit.
+
+    Args:
+        oracle (numpy.void or tuple): one oracle_dtype() record, or a (kind, mask, constant) tuple with mask an int
+        n (int): value of n for the Deutsch-Jozsa problem
+    Returns:
+        qc (QuantumCircuit): Quantum circuit representation of the query gate, with output qubit n
+    Notes:
+        -Uses QuantumCircuit package
+    """
+    from qiskit import QuantumCircuit
+
+    _,mask,constant=(int(v) for v in oracle)
+    qc=QuantumCircuit(n+1)
+
+    if mask:
+        qc.barrier()
+        #apply cnot gates from every qubit in the mask to the output qubit
+        for qubit in range(n):
+            if (mask>>qubit)&1:
+                qc.cx(qubit,n)
+        qc.barrier()
+
+    if constant:
+        qc.x(n)
+
+    return qc
+
 
 def deutsch_jozsa_query_gate(n):
     """
-    Creates a random query gate that is either constant or balanced with 50/50 chance
+    Creates a random query gate that is either constant or balanced
+
+    The function is constant with probability 2/3, and then f(x)=1 for all x with probability 2/3. Otherwise it is
+    balanced: f(x) is the parity of x XOR b for a uniformly random string b, applied as cnot gates from every input
+    qubit to the output qubit between two layers of x gates on the bits of b.
 
     Args:
         n (int): value of n for the Deutsch-Jozsa problem
@@ -21,57 +159,164 @@ def deutsch_jozsa_query_gate(n):
     if not (n>0):
         raise ValueError('n must be a positive integer.')
 
+    #Function is constant 2/3 of the time
+    if random.randint(0,2):
+        #further 2/3 f(x)=1 for all x
+        return oracle_circuit((CONSTANT,0,1 if random.randint(0,2) else 0),n)
 
-    qc=QuantumCircuit(n+1)
+    from qiskit import QuantumCircuit
 
-    #Function is constant 50% of the time.
-    if random.randint(0,2):
-        #further 50% f(x)=1 for all x
-        if random.randint(0,2):
-            qc.x(n)
-        return qc
+    qc=QuantumCircuit(n+1)
 
-    #Function is balanced 50% of the time
+    #Function is balanced 1/3 of the time
     #choose random number out of 2**n possibilities
-    binary_string = ''.join(random.choice('01') for _ in range(n))
+    flipped=[qubit for qubit in range(n) if random.randint(0,1)]
 
     #apply x gates to oracle according to binary string
-    for i in range(len(binary_string)):
-        if list(reversed(binary_string))[i]=='1':
-            qc.x(i)
+    for qubit in flipped:
+        qc.x(qubit)
 
     qc.barrier()
-    #apply cnot gates to all qubits, with output qubit as control
+    #apply cnot gates from all input qubits to the output qubit
     for qubit in range(n):
         qc.cx(qubit,n)
-    
+
     qc.barrier()
-    for i in range(len(binary_string)):
-        if list(reversed(binary_string))[i]=='1':
-            qc.x(i)
-    
+    for qubit in flipped:
+        qc.x(qubit)
+
     return qc
 
 
-def deutsch_jozsa_alorgithm(n):
+def pack_truth_table(values):
     """
-    Runs the Deutsch-Jozsa algorithm with a random query gate
+    Packs a truth table into the bit layout read by walsh_hadamard_distribution.
 
     Args:
-        n (int): value of n in the Deutsch-Jozsa problem
+        values (array-like): f(x) for x = 0, 1, ..., 2**n-1, as 0/1 or booleans
     Returns:
-        qc (QuantumCircuit): circuit representation of the algorithm
-        'Balanced' or 'Constant' (str): outcome of the algorithm
+        table (numpy.ndarray): uint8 array with f(x) in bit x%8 of byte x//8
+    Notes:
+        -uses numpy package; write table.tofile(path) to store it for memory-mapping later
+    """
+    import numpy as np
+
+    return np.packbits(np.asarray(values,dtype=bool),bitorder='little')
+
+
+def _fwht(a):
+    """
+    In-place fast Walsh-Hadamard transform of a 2D array along axis 0, whose length must be a power of 2.
+    """
+    length,width=a.shape
+    h=1
+    while h<length:
+        pairs=a.reshape(length//(2*h),2,h,width)
+        u=pairs[:,0]
+        v=pairs[:,1]
+        #(u, v) -> (u+v, u-v) without a temporary
+        u+=v
+        v*=-2
+        v+=u
+        h*=2
+
+
+def walsh_hadamard_distribution(truth_table,n,out=None,block_bits=20,workers=1):
+    """
+    Computes the exact Deutsch-Jozsa measurement distribution of any f: {0,1}^n -> {0,1} from its truth table.
+
+    The probability of measuring y is (W(y)/2^n)^2, where W(y) = sum_x (-1)^(f(x) + x.y) is the Walsh-Hadamard
+    transform of (-1)^f. The transform is computed in place in two blocked passes: every block of 2**block_bits
+    entries is transformed over the low bits, then strips of columns are transformed over the remaining high bits,
+    so only about one block per worker is held in memory at a time.
+
+    Args:
+        truth_table (numpy.ndarray or str): packed truth table from pack_truth_table, or the path of a file holding
+                                            one, which is memory-mapped read-only
+        n (int): number of input bits
+        out (str): path of a file to memory-map the distribution into, for tables too large for memory (optional)
+        block_bits (int): log2 of the number of entries per block
+        workers (int): threads transforming blocks concurrently (None uses every CPU)
+    Returns:
+        distribution (numpy.ndarray): float64 array of length 2**n with the probability of each outcome y, bit i
+                                      being qubit i (a numpy.memmap when out is given)
     Raises:
         TypeError: if n is not an integer
         ValueError: if n is not greater than zero
+        ValueError: if the truth table does not hold 2**n bits
     Notes:
-        -Uses QuantumCircuit, AerSimulator and random packages
+        -uses numpy package; O(n*2^n) time and 8*2^n bytes for the distribution itself
+        -numpy releases the GIL in the butterflies, so workers > 1 runs blocks in parallel
     """
     if not isinstance(n,int):
         raise TypeError('n must be a positive integer.')
     if not (n>0):
         raise ValueError('n must be a positive integer.')
+
+    import os
+    import numpy as np
+    from concurrent.futures import ThreadPoolExecutor
+
+    if isinstance(truth_table,str):
+        truth_table=np.memmap(truth_table,dtype=np.uint8,mode='r')
+    size=2**n
+    if len(truth_table)!=(size+7)//8:
+        raise ValueError(f'truth table must hold 2**{n} bits packed into {(size+7)//8} bytes')
+
+    if out is None:
+        distribution=np.empty(size)
+    else:
+        distribution=np.memmap(out,dtype=np.float64,mode='w+',shape=(size,))
+
+    b=min(max(block_bits,3),n)
+    block=2**b
+    rows=size//block
+
+    def low_pass(k):
+        bits=np.unpackbits(truth_table[k*block//8:((k+1)*block+7)//8],bitorder='little',count=block)
+        values=1.0-2.0*bits
+        _fwht(values.reshape(block,1))
+        distribution[k*block:(k+1)*block]=values
+
+    #each strip holds about one block: all rows of width columns
+    matrix=distribution.reshape(rows,block)
+    width=max(1,block//rows)
+
+    def high_pass(j):
+        strip=np.array(matrix[:,j:j+width])
+        _fwht(strip)
+        matrix[:,j:j+width]=strip
+
+    def finish(k):
+        values=distribution[k*block:(k+1)*block]
+        values/=size
+        values*=values
+
+    #ThreadPoolExecutor(None) would start cpu_count()+4 threads
+    with ThreadPoolExecutor(os.cpu_count() if workers is None else workers) as executor:
+        list(executor.map(low_pass,range(rows)))
+        if rows>1:
+            list(executor.map(high_pass,range(0,block,width)))
+        list(executor.map(finish,range(rows)))
+
+    if out is not None:
+        distribution.flush()
+    return distribution
+
+
+def deutsch_jozsa_circuit(n,oracle=None):
+    """
+    Builds the circuit of the Deutsch-Jozsa algorithm
+
+    Args:
+        n (int): value of n in the Deutsch-Jozsa problem
+        oracle (numpy.void or tuple): compact oracle record to use instead of a random query gate (optional)
+    Returns:
+        qc (QuantumCircuit): circuit measuring the n input qubits after the query gate
+    Notes:
+        -Uses QuantumCircuit package
+    """
+    from qiskit import QuantumCircuit
     
     qc=QuantumCircuit(n+1,n)
 
@@ -82,21 +327,86 @@ def deutsch_jozsa_alorgithm(n):
         qc.h(qubit)
 
     qc.barrier()
-    qc=qc.compose(deutsch_jozsa_query_gate(n))
+    query_gate=deutsch_jozsa_query_gate(n) if oracle is None else oracle_circuit(oracle,n)
+    with tracing.span('compose',gates=len(query_gate.data)):
+        qc=qc.compose(query_gate)
     qc.barrier()
 
     for qubit in range(n):
         qc.h(qubit)
         qc.measure(qubit,qubit)
-    
-    result = AerSimulator().run(qc,shots=1,memory=True).result()
-    measurement = result.get_memory()
+
+    return qc
+
+
+def deutsch_jozsa_truth_table(truth_table,n,**options):
+    """
+    Runs the Deutsch-Jozsa algorithm on the packed truth table of any f, without a circuit
+
+    Args:
+        truth_table (numpy.ndarray or str): packed truth table (see pack_truth_table), or its path
+        n (int): value of n in the Deutsch-Jozsa problem
+        **options: out, block_bits and workers for walsh_hadamard_distribution
+    Returns:
+        distribution (numpy.ndarray): exact probability of each outcome y, from walsh_hadamard_distribution
+        'Balanced' or 'Constant' (str): outcome of one run of the algorithm
+    Raises:
+        TypeError: if n is not an integer
+        ValueError: if n is not greater than zero, or the table does not hold 2**n bits
+    Notes:
+        -Uses numpy and random packages
+        -For a truth table outside the promise, the answer is drawn as one run of the circuit would give it:
+         'Constant' with the probability of measuring all zeros
+    """
+    if not isinstance(n,int):
+        raise TypeError('n must be a positive integer.')
+    if not (n>0):
+        raise ValueError('n must be a positive integer.')
+
+    with tracing.span('walsh_hadamard',n=n):
+        distribution=walsh_hadamard_distribution(truth_table,n,**options)
+    if random.random()<distribution[0]:
+        return [distribution,'Constant']
+    return [distribution,'Balanced']
+
+
+def deutsch_jozsa_alorgithm(n,oracle=None):
+    """
+    Runs the Deutsch-Jozsa algorithm with a random query gate
+
+    Args:
+        n (int): value of n in the Deutsch-Jozsa problem
+        oracle (numpy.void or tuple): compact oracle record to use instead of a random query gate (optional)
+    Returns:
+        qc (QuantumCircuit): circuit representation of the algorithm
+        'Balanced' or 'Constant' (str): outcome of the algorithm
+    Raises:
+        TypeError: if n is not an integer
+        ValueError: if n is not greater than zero
+    Notes:
+        -Uses QuantumCircuit and random packages, and the shared simulator from backends
+        -deutsch_jozsa_truth_table evaluates a truth table of any f exactly instead
+    """
+    if not isinstance(n,int):
+        raise TypeError('n must be a positive integer.')
+    if not (n>0):
+        raise ValueError('n must be a positive integer.')
+
+    with tracing.span('deutsch_jozsa',n=n):
+        with tracing.span('construct') as s:
+            qc=deutsch_jozsa_circuit(n,oracle)
+            s.set_circuit(qc)
+        
+        result = backends.run(qc,shots=1,memory=True)
+        with tracing.span('parse_memory'):
+            measurement = result.get_memory()
 
     if '1' in measurement[0]:
         return [qc,'Balanced']
     else:
         return [qc,'Constant']
 
-algorithm=deutsch_jozsa_alorgithm(4)
-print(algorithm[0].draw())
-print(algorithm[1])
\ No newline at end of file
+if __name__ == "__main__":
+    algorithm=deutsch_jozsa_alorgithm(4)
+    print(algorithm[0].draw())
+    print(algorithm[1])
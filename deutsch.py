@@ -1,6 +1,5 @@
-from qiskit import QuantumCircuit
-from qiskit_aer import AerSimulator
-from tabulate import tabulate
+import result_cache
+import tracing
 
 def deutsch_query_gate(function):
     """
@@ -17,6 +16,8 @@ def deutsch_query_gate(function):
     """
     if function not in ['1','2','3','4']:
         raise ValueError('Function must be 1, 2, 3, or 4')
+
+    from qiskit import QuantumCircuit
     
     gate=QuantumCircuit(2)
 
@@ -31,17 +32,19 @@ def deutsch_query_gate(function):
     return gate
 
 
-def run_deutsch_algorithm(function):
+def deutsch_circuit(function):
     """
-    Runs the Deutsch algorithm on a quantum circuit for a specified function
+    Builds the circuit of the Deutsch algorithm for a specified function
 
     Args:
         function (str): string representing one of the four possible functions
     Returns:
-        bit(int): 0 if function is constant, 1 if balanced
+        qc (QuantumCircuit): circuit measuring the query qubit into its only classical bit
     Notes:
         -Uses QuantumCircuit package
     """
+    from qiskit import QuantumCircuit
+
     qc=QuantumCircuit(2,1)
     qc.x(1)
     qc.h([0,1])
@@ -52,10 +55,28 @@ def run_deutsch_algorithm(function):
 
     qc.h(0)
     qc.measure(0,0)
+    return qc
+
+
+def run_deutsch_algorithm(function):
+    """
+    Runs the Deutsch algorithm on a quantum circuit for a specified function
 
-    sim=AerSimulator()
-    result=sim.run(qc,shots=1).result().get_counts()
-    bit=int(list(result.keys())[0])
+    Args:
+        function (str): string representing one of the four possible functions
+    Returns:
+        bit(int): 0 if function is constant, 1 if balanced
+    Notes:
+        -Uses QuantumCircuit package; the outcome is drawn from the exact distribution held in result_cache
+    """
+    with tracing.span('deutsch',function=function):
+        with tracing.span('construct') as s:
+            qc=deutsch_circuit(function)
+            s.set_circuit(qc)
+
+        result=result_cache.sample(qc,shots=1)
+        with tracing.span('parse_counts'):
+            bit=int(list(result.keys())[0])
 
     return bit
 
@@ -71,6 +92,8 @@ def choose_function():
     Notes:
         -Uses tabulate package
     """
+    from tabulate import tabulate
+
     data1 = [[0, 0],
     [1, 0]]
     data2 = [[0, 0],
@@ -105,8 +128,9 @@ def constant_or_balanced(function):
     """
     if run_deutsch_algorithm(function)==0:
         return 'Your function is constant'
-    if run_deutsch_algorithm(function)==1:
+    else:
         return 'Your function is balanced'
 
 
-print(constant_or_balanced(choose_function()))
+if __name__ == "__main__":
+    print(constant_or_balanced(choose_function()))
@@ -0,0 +1,330 @@
+"""
+NumPy statevector engine for circuits of a few qubits.
+
+The circuits of the Deutsch, superdense coding, CHSH and small phase estimation scripts act on 2 or 3 qubits, where
+building an Aer job and dispatching it costs milliseconds while the arithmetic takes nanoseconds. This engine
+compiles such a circuit once into a short list of NumPy operations and then only samples from its outcome
+distribution:
+
+    import microsim
+    result = microsim.run(qc, shots=1024)
+    result.get_counts()       # same keys and format as Aer's Result.get_counts()
+
+Compilation inlines custom gates down to gates with a matrix and fuses every run of consecutive single-qubit gates
+on a qubit into one 2x2 matrix. Running the program evolves the state through preallocated buffers, once per
+circuit; later runs of the same, unedited circuit object only draw shots. Supported circuits have every parameter bound, at
+most MAX_QUBITS qubits, and measurements only at the end (no resets or classically conditioned gates).
+backends.run() sends such circuits here automatically.
+"""
+import threading
+import time
+import weakref
+
+import tracing
+
+MAX_QUBITS = 5
+
+# instructions without an effect on the state
+_IGNORED = frozenset(['barrier', 'delay', 'id'])
+
+_lock = threading.Lock()
+_programs = {}
+_local = threading.local()
+
+
+def _generator(seed):
+    # creating a Generator costs more than drawing a thousand shots, so unseeded runs share one per thread
+    import numpy as np
+
+    if seed is not None:
+        return np.random.default_rng(seed)
+    rng = getattr(_local, 'rng', None)
+    if rng is None:
+        rng = _local.rng = np.random.default_rng()
+    return rng
+
+
+class Program:
+    """
+    A circuit compiled to NumPy operations.
+
+    Attributes:
+        num_qubits (int): qubits of the circuit
+        operations (list): (matrix, qubits) pairs applied in order, with single-qubit runs fused
+        labels (list): get_counts() key of each distinct measurement outcome
+        outcome_index (numpy.ndarray): index into labels of each basis state
+    """
+    def __init__(self, num_qubits, operations, labels, outcome_index):
+        import numpy as np
+
+        self.num_qubits = num_qubits
+        self.operations = operations
+        self.labels = labels
+        self.outcome_index = outcome_index
+        self._buffers = (np.empty(2**num_qubits, dtype=complex), np.empty(2**num_qubits, dtype=complex))
+        self._probabilities = None
+        self._lock = threading.Lock()
+
+    def statevector(self):
+        """
+        Evolves |0...0> through the program.
+
+        Returns:
+            state (numpy.ndarray): amplitudes indexed by q0 + 2*q1 + ..., as in Statevector (a copy)
+        """
+        import numpy as np
+
+        n = self.num_qubits
+        with self._lock:
+            state, spare = self._buffers
+            state[:] = 0
+            state[0] = 1
+            for matrix, qubits in self.operations:
+                if len(qubits) == 1:
+                    # axis 1 of this view is the target qubit
+                    shape = (2**(n - 1 - qubits[0]), 2, 2**qubits[0])
+                    np.matmul(matrix, state.reshape(shape), out=spare.reshape(shape))
+                else:
+                    k = len(qubits)
+                    # tensor axis n-1-q is qubit q; the matrix's input axes run from its last qubit to its first
+                    axes = [n - 1 - q for q in reversed(qubits)]
+                    moved = np.tensordot(matrix.reshape((2,) * 2 * k), state.reshape((2,) * n),
+                                         axes=(list(range(k, 2 * k)), axes))
+                    spare.reshape((2,) * n)[...] = np.moveaxis(moved, list(range(k)), axes)
+                state, spare = spare, state
+            return state.copy()
+
+    def probabilities(self):
+        """
+        Returns the probability of each entry of labels, computed on the first call.
+        """
+        import numpy as np
+
+        if self._probabilities is None:
+            amplitudes = self.statevector()
+            probabilities = np.bincount(self.outcome_index, weights=(amplitudes * amplitudes.conj()).real,
+                                        minlength=len(self.labels))
+            self._probabilities = probabilities / probabilities.sum()
+        return self._probabilities
+
+    def sample(self, shots=1024, memory=False, seed=None):
+        """
+        Draws measurement results.
+
+        Args:
+            shots (int): number of shots
+            memory (bool): also return the outcome of every shot
+            seed (int): seed of the random generator (optional)
+        Returns:
+            counts (dict): number of shots of each outcome, keyed like Result.get_counts()
+            memory (list): outcome of each shot, or None when memory is False
+        """
+        import numpy as np
+
+        rng = _generator(seed)
+        probabilities = self.probabilities()
+        if memory:
+            drawn = rng.choice(len(self.labels), size=shots, p=probabilities)
+            shots_of = np.bincount(drawn, minlength=len(self.labels))
+            outcomes = [self.labels[i] for i in drawn]
+        else:
+            shots_of = rng.multinomial(shots, probabilities)
+            outcomes = None
+        counts = {self.labels[i]: int(c) for i, c in enumerate(shots_of) if c}
+        return counts, outcomes
+
+
+def _unitary(operation):
+    if getattr(operation, 'condition', None) is not None or getattr(operation, 'is_parameterized', bool)():
+        return None
+    try:
+        return operation.to_matrix()
+    except Exception:
+        return None
+
+
+def _flatten(circuit, qubits, operations, depth=0):
+    # appends (name, matrix, qubits) for every gate, inlining definitions; returns False if something is unsupported
+    for instruction in circuit.data:
+        operation = instruction.operation
+        mapped = [qubits[circuit.find_bit(qubit).index] for qubit in instruction.qubits]
+        if operation.name in _IGNORED:
+            continue
+        if operation.name == 'measure':
+            if depth:
+                return False
+            operations.append(('measure', None, mapped + [circuit.find_bit(instruction.clbits[0]).index]))
+            continue
+        if instruction.clbits:
+            return False
+        matrix = _unitary(operation)
+        if matrix is not None:
+            operations.append((operation.name, matrix, mapped))
+            continue
+        definition = getattr(operation, 'definition', None)
+        if definition is None or depth > 16 or getattr(operation, 'condition', None) is not None:
+            return False
+        if not _flatten(definition, mapped, operations, depth + 1):
+            return False
+    return True
+
+
+def compile_circuit(circuit):
+    """
+    Compiles a circuit into a Program.
+
+    Args:
+        circuit (QuantumCircuit): circuit to compile
+    Returns:
+        program (Program): the compiled program, or None if the circuit is not supported
+    """
+    import numpy as np
+    import result_cache
+
+    n = circuit.num_qubits
+    if n > MAX_QUBITS or circuit.parameters or circuit.num_clbits == 0:
+        return None
+    gates = []
+    if not _flatten(circuit, list(range(n)), gates):
+        return None
+
+    measured = {}
+    operations = []
+    pending = [None] * n
+
+    def flush(q):
+        if pending[q] is not None:
+            operations.append((pending[q], (q,)))
+            pending[q] = None
+
+    for name, matrix, qubits in gates:
+        if name == 'measure':
+            qubit, clbit = qubits
+            measured[clbit] = qubit
+            continue
+        if any(q in measured.values() for q in qubits):
+            return None   # a gate after a measurement of its qubit
+        if len(qubits) == 1:
+            q = qubits[0]
+            pending[q] = matrix if pending[q] is None else matrix @ pending[q]
+        else:
+            for q in qubits:
+                flush(q)
+            operations.append((np.ascontiguousarray(matrix, dtype=complex), tuple(qubits)))
+    for q in range(n):
+        flush(q)
+
+    # every basis state maps to the clbit string its measurement would produce
+    labels = []
+    positions = {}
+    outcome_index = np.empty(2**n, dtype=np.intp)
+    for index in range(2**n):
+        bits = ['0'] * circuit.num_clbits
+        for clbit, qubit in measured.items():
+            bits[clbit] = str((index >> qubit) & 1)
+        label = result_cache._format_outcome(bits, circuit)
+        if label not in positions:
+            positions[label] = len(labels)
+            labels.append(label)
+        outcome_index[index] = positions[label]
+    return Program(n, operations, labels, outcome_index)
+
+
+def _fingerprint(circuit):
+    # changes when instructions are added, removed or replaced, or their parameters or conditions are set in place;
+    # holding the instructions keeps their identities from being reused
+    return [(instruction, instruction.operation.params[:], getattr(instruction.operation, 'condition', None))
+            for instruction in circuit._data]
+
+
+def _unchanged(entry, fingerprint):
+    try:
+        return entry[1] == fingerprint
+    except ValueError:
+        return False   # array parameters replaced by new arrays compare elementwise
+
+
+def get_program(circuit):
+    """
+    Returns the Program of a circuit object, compiling it on first use and again whenever it has been edited.
+
+    Args:
+        circuit (QuantumCircuit): circuit to compile
+    Returns:
+        program (Program): the compiled program, or None if the circuit is not supported
+    Notes:
+        -programs are kept for as long as their circuit object lives. Edits to the circuit's instructions are
+         detected, but not edits inside the definition of a custom gate or the matrix of a unitary gate
+    """
+    key = id(circuit)
+    fingerprint = _fingerprint(circuit)
+    with _lock:
+        entry = _programs.get(key)
+    if entry is not None and entry[0]() is circuit and _unchanged(entry, fingerprint):
+        return entry[2]
+    with tracing.span('micro_compile', qubits=circuit.num_qubits):
+        program = compile_circuit(circuit)
+    with _lock:
+        _programs[key] = (weakref.ref(circuit, lambda _: _programs.pop(key, None)), fingerprint, program)
+    return program
+
+
+def supports(circuit):
+    """
+    Returns True if the engine can run a circuit.
+    """
+    return circuit.num_qubits <= MAX_QUBITS and get_program(circuit) is not None
+
+
+class MicroResult:
+    """
+    Result of a run, with the parts of qiskit's Result interface the scripts use.
+
+    Attributes:
+        backend_name (str): 'microsim'
+        success (bool): always True
+        metadata (dict): run metadata, e.g. the routing decision set by backends.run
+        time_taken (float): seconds spent in the run
+    """
+    backend_name = 'microsim'
+    success = True
+
+    def __init__(self, counts, memory, shots, time_taken):
+        self._counts = counts
+        self._memory = memory
+        self.shots = shots
+        self.time_taken = time_taken
+        self.metadata = {}
+
+    def get_counts(self, experiment=None):
+        return self._counts
+
+    def get_memory(self, experiment=None):
+        if self._memory is None:
+            raise ValueError('memory was not requested for this run (use memory=True)')
+        return self._memory
+
+
+def run(circuit, shots=1024, memory=False, seed_simulator=None, program=None):
+    """
+    Runs a small circuit.
+
+    Args:
+        circuit (QuantumCircuit): circuit with measurements only at the end and every parameter bound
+        shots (int): number of shots
+        memory (bool): keep the outcome of every shot
+        seed_simulator (int): seed of the random generator (optional)
+        program (Program): the circuit's program from get_program, to skip looking it up again (optional)
+    Returns:
+        result (MicroResult): counts, and memory when requested
+    Raises:
+        ValueError: if the circuit is not supported
+    """
+    start = time.perf_counter()
+    if program is None:
+        program = get_program(circuit)
+    if program is None:
+        raise ValueError(f'microsim runs circuits of at most {MAX_QUBITS} qubits with bound parameters and '
+                         'measurements only at the end')
+    counts, outcomes = program.sample(shots, memory, seed_simulator)
+    return MicroResult(counts, outcomes, shots, time.perf_counter() - start)
@@ -0,0 +1,194 @@
+"""
+Batched density-matrix evaluation of the 2-qubit entanglement protocols under noise.
+
+The superdense coding and CHSH circuits both prepare a Bell pair, pass a barrier, and then act locally before
+measuring. This module splits each circuit at its last barrier, where the qubits travel (superdense coding) or wait
+(CHSH), applies amplitude damping and then depolarizing noise to both qubits there, and flips each measured bit with
+the readout error probability. Noise parameters are numpy arrays broadcast against each other, and every grid point
+is evolved at once through stacked 4x4 Pauli transfer matrices, so a grid of 10^5 points takes well under a
+second.
+
+    import noise_sweep
+    p = np.linspace(0, 1, 101)
+    noise_sweep.chsh_win_probability(depolarizing=p)                          # shape (101,)
+    noise_sweep.superdense_error_rates(p[:, None], readout=[0, 0.01, 0.05])   # 'error_rate' of shape (101, 3)
+"""
+_splits = {}
+
+
+def _pauli_basis():
+    import numpy as np
+
+    return [np.eye(2), np.array([[0, 1], [1, 0]]), np.array([[0, -1j], [1j, 0]]), np.array([[1, 0], [0, -1]])]
+
+
+def split_circuit(circuit):
+    """
+    Splits a protocol circuit at its last barrier, after removing its final measurements.
+
+    Args:
+        circuit (QuantumCircuit): 2-qubit circuit with at least one barrier and measurements only at the end
+    Returns:
+        state (numpy.ndarray): density matrix of the qubits when they reach the last barrier
+        after (numpy.ndarray): 4x4 unitary applied between the last barrier and the measurements
+    Raises:
+        ValueError: if the circuit does not act on 2 qubits or has no barrier
+    """
+    import numpy as np
+    from qiskit.quantum_info import Operator, Statevector
+
+    if circuit.num_qubits != 2:
+        raise ValueError('noise sweeps are implemented for 2-qubit circuits')
+    body = circuit.remove_final_measurements(inplace=False)
+    barriers = [i for i, instruction in enumerate(body.data) if instruction.operation.name == 'barrier']
+    if not barriers:
+        raise ValueError('the circuit needs a barrier to mark where noise acts')
+
+    before = body.copy_empty_like()
+    after = body.copy_empty_like()
+    for i, instruction in enumerate(body.data):
+        if instruction.operation.name != 'barrier':
+            (before if i < barriers[-1] else after).append(instruction)
+
+    amplitudes = Statevector(before).data
+    return np.outer(amplitudes, amplitudes.conj()), Operator(after).data
+
+
+def _pauli_tables(circuit):
+    """
+    Returns the Pauli coordinates r[i, j] = tr((P_j x P_i) rho) of the state at the last barrier, and the
+    coefficients C[z, i, j] = tr(|z><z| U (P_j x P_i) U^dagger) / 4 turning noisy coordinates into probabilities.
+    """
+    import numpy as np
+
+    state, after = split_circuit(circuit)
+    paulis = _pauli_basis()
+    # P_j on qubit 1 and P_i on qubit 0
+    basis = np.array([[np.kron(paulis[j], paulis[i]) for j in range(4)] for i in range(4)])
+    coordinates = np.einsum('ijab,ba->ij', basis, state).real
+    rotated = np.einsum('za,ijab,zb->zij', after, basis, after.conj()).real / 4
+    return coordinates, rotated
+
+
+def noisy_distribution(circuit, depolarizing=0.0, amplitude_damping=0.0, readout=0.0):
+    """
+    Computes the measurement distribution of a 2-qubit protocol circuit for every point of a noise grid.
+
+    Args:
+        circuit (QuantumCircuit): 2-qubit circuit, with noise acting at its last barrier
+        depolarizing (float or array-like): depolarizing probability p of each qubit, rho -> (1-p) rho + p I/2
+        amplitude_damping (float or array-like): decay probability gamma of each qubit from |1> to |0>
+        readout (float or array-like): probability that each measured bit is flipped
+    Returns:
+        probabilities (numpy.ndarray): array of shape grid + (4,) indexed by q0 + 2*q1, where grid is the broadcast
+                                       shape of the three noise parameters
+    Raises:
+        ValueError: if a noise parameter is outside [0, 1]
+    Notes:
+        -uses numpy and qiskit.quantum_info; the noiseless parts of the circuit are evaluated once, and each grid
+         point only costs a few 4x4 real products in the Pauli transfer matrix picture
+    """
+    import numpy as np
+
+    p, gamma, e = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (depolarizing, amplitude_damping,
+                                                                             readout)))
+    if any(np.any((v < 0) | (v > 1)) for v in (p, gamma, e)):
+        raise ValueError('noise parameters must be between 0 and 1')
+    grid = p.shape
+    p, gamma, e = p.reshape(-1), gamma.reshape(-1), e.reshape(-1)
+
+    coordinates, rotated = _split(circuit)
+
+    # Pauli transfer matrix of amplitude damping followed by depolarizing on one qubit:
+    # (1, x, y, z) -> (1, (1-p) sqrt(1-gamma) x, (1-p) sqrt(1-gamma) y, (1-p) (gamma + (1-gamma) z))
+    transfer = np.zeros((len(p), 4, 4))
+    transfer[:, 0, 0] = 1
+    transfer[:, 1, 1] = transfer[:, 2, 2] = (1 - p) * np.sqrt(1 - gamma)
+    transfer[:, 3, 0] = (1 - p) * gamma
+    transfer[:, 3, 3] = (1 - p) * (1 - gamma)
+
+    # the same channel acts on both qubits: r'[i, j] = sum_kl T[i, k] T[j, l] r[k, l]
+    noisy = transfer @ coordinates @ transfer.swapaxes(-1, -2)
+    probabilities = noisy.reshape(-1, 16) @ rotated.reshape(4, 16).T
+    # each bit flips independently: p'(z) = sum_w p(w) prod_q e^[z_q != w_q] (1-e)^[z_q == w_q]
+    flips = np.array([[bin(z ^ w).count('1') for w in range(4)] for z in range(4)])
+    confusion = e[:, None, None]**flips * (1 - e[:, None, None])**(2 - flips)
+    probabilities = np.einsum('gzw,gw->gz', confusion, probabilities)
+    return probabilities.clip(0, 1).reshape(grid + (4,))
+
+
+def _split(circuit):
+    # circuits are rebuilt by every call of the scripts' builders, so they are matched by structure
+    import result_cache
+
+    key = result_cache.circuit_key(circuit)
+    if key not in _splits:
+        _splits[key] = _pauli_tables(circuit)
+    return _splits[key]
+
+
+def superdense_confusion(depolarizing=0.0, amplitude_damping=0.0, readout=0.0):
+    """
+    Probability that Bob decodes each two-bit message as each other one, over a noise grid.
+
+    Args:
+        depolarizing, amplitude_damping, readout (float or array-like): noise grid, as in noisy_distribution
+    Returns:
+        confusion (numpy.ndarray): array of shape grid + (4, 4) whose [..., sent, decoded] entry is the probability
+                                   of decoding message int(decoded, 2) when int(sent, 2) was sent
+    """
+    import numpy as np
+    from uqic import load_script
+
+    superdense = load_script('superdense')
+    rows = [noisy_distribution(superdense.message_circuit(format(sent, '02b')), depolarizing, amplitude_damping,
+                               readout) for sent in range(4)]
+    return np.stack(rows, axis=-2)
+
+
+def superdense_error_rates(depolarizing=0.0, amplitude_damping=0.0, readout=0.0):
+    """
+    Decoding error rates of superdense coding over a noise grid, for uniformly random messages.
+
+    Args:
+        depolarizing, amplitude_damping, readout (float or array-like): noise grid, as in noisy_distribution
+    Returns:
+        rates (dict): with keys
+            'error_rate' (numpy.ndarray): probability that a two-bit message is decoded wrongly
+            'bit_error_rate' (numpy.ndarray): probability that a transmitted bit is decoded wrongly
+            'confusion' (numpy.ndarray): the superdense_confusion array
+    """
+    import numpy as np
+
+    confusion = superdense_confusion(depolarizing, amplitude_damping, readout)
+    correct = np.trace(confusion, axis1=-2, axis2=-1) / 4
+    wrong_bits = np.array([[bin(sent ^ decoded).count('1') for decoded in range(4)] for sent in range(4)])
+    return {
+        'error_rate': 1 - correct,
+        'bit_error_rate': (confusion * wrong_bits).sum(axis=(-2, -1)) / 8,
+        'confusion': confusion,
+    }
+
+
+def chsh_win_probability(depolarizing=0.0, amplitude_damping=0.0, readout=0.0):
+    """
+    Winning probability of the optimal quantum CHSH strategy over a noise grid, with uniformly random questions.
+
+    Args:
+        depolarizing, amplitude_damping, readout (float or array-like): noise grid, as in noisy_distribution
+    Returns:
+        probabilities (numpy.ndarray): win probability at each grid point (cos^2(pi/8) ~ 0.854 without noise)
+    """
+    import numpy as np
+    from uqic import load_script
+
+    chsh = load_script('chsh')
+    total = 0
+    for x in (0, 1):
+        for y in (0, 1):
+            distribution = noisy_distribution(chsh.quantum_strategy_circuit(x, y), depolarizing,
+                                              amplitude_damping, readout)
+            # answer index 2*a+b; the pair wins when a XOR b == x AND y
+            winning = np.array([(a ^ b) == (x & y) for a in (0, 1) for b in (0, 1)])
+            total = total + distribution[..., winning].sum(axis=-1)
+    return total / 4
@@ -1,28 +1,34 @@
 #again, we will use a phase gate with eigenstate |1⟩
 #   Rϕ |1⟩ = e^(iϕ) |1⟩ 
 #   ϕ=2*pi*θ
-from qiskit import QuantumCircuit
-from qiskit.circuit.library import QFT
 from math import pi
-from qiskit_aer import AerSimulator
+import os,sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backends
+import tracing
 
 
-def phase_estimation(theta):
+_template=None
+
+
+def phase_estimation_template():
     """
-    Estimates theta via phase estimation algorithm with two control qubits. Estimate is rounded to the nearest 1/4.
+    Builds the phase estimation circuit with two control qubits, leaving theta as a parameter.
 
-    Args:
-        theta (float): phase of Rϕ gate such that Rϕ |1⟩ = e^(i*2*pi*theta) |1⟩
     Returns:
-        estimate (float): estimate of theta computed via QPE, rounded to nearest 0.25
-    Raises:
-        ValueError: if theta is not between 0 and 1
+        qc (QuantumCircuit): circuit measuring both control qubits, with one Parameter named 'theta'
     Notes:
-        -for some reason, AerSimulator only runs the circuit if I decompose before running. I tried to decompose only the QFT, but couldn't.
+        -built once and shared between calls, so do not modify it
     """
-    if not (0<=theta<=1):
-        raise ValueError('theta must be between 0 and 1')
+    global _template
+    if _template is not None:
+        return _template
+
+    from qiskit import QuantumCircuit
+    from qiskit.circuit import Parameter
+    from qiskit.circuit.library import QFT
 
+    theta=Parameter('theta')
     qc=QuantumCircuit(3,2)
     qc.x(2)
     qc.barrier()
@@ -39,20 +45,59 @@ def phase_estimation(theta):
           target_qubit=2)
     
     #apply QFT to top register
-    qft = QFT(num_qubits=2).to_gate()
-    qft_inv=qft.inverse()
+    with tracing.span('qft',qubits=2):
+        qft = QFT(num_qubits=2).to_gate()
+        qft_inv=qft.inverse()
     qc.append(qft_inv, qargs=[0, 1])
-   
-   #for some reason AerSim only works if I decompose the circuit
-    qc=qc.decompose(reps=2)
     qc.measure([0,1],[0,1])
+    _template=qc
+    return qc
+
+
+def phase_estimation_circuit(theta):
+    """
+    Builds the phase estimation circuit with two control qubits, transpiled for the shared simulator.
+
+    Args:
+        theta (float): phase of Rϕ gate such that Rϕ |1⟩ = e^(i*2*pi*theta) |1⟩
+    Returns:
+        qc (QuantumCircuit): transpiled circuit measuring both control qubits
+    Notes:
+        -AerSimulator cannot run the QFT gate itself, so the circuit used to be decomposed on every call. The
+         template is now transpiled once through transpile_cache and theta is bound to the cached result.
+    """
+    import transpile_cache
+
+    return transpile_cache.transpile(phase_estimation_template(),backends.get_simulator(),
+                                     parameter_values={'theta':theta})
+
+
+def phase_estimation(theta):
+    """
+    Estimates theta via phase estimation algorithm with two control qubits. Estimate is rounded to the nearest 1/4.
+
+    Args:
+        theta (float): phase of Rϕ gate such that Rϕ |1⟩ = e^(i*2*pi*theta) |1⟩
+    Returns:
+        estimate (float): estimate of theta computed via QPE, rounded to nearest 0.25
+    Raises:
+        ValueError: if theta is not between 0 and 1
+    """
+    if not (0<=theta<=1):
+        raise ValueError('theta must be between 0 and 1')
+
+    with tracing.span('phase_estimation_2_qubits',theta=theta):
+        with tracing.span('construct'):
+            qc=phase_estimation_circuit(theta)
 
-    sim=AerSimulator()
-    counts=sim.run(qc).result().get_counts()
+        #a circuit this small runs on the NumPy micro-simulator rather than on Aer
+        result=backends.run(qc,shots=1024)
+        with tracing.span('parse_counts'):
+            counts=result.get_counts()
 
-    #convert measurement to integer form
-    y=max(counts, key=counts.get)
-    y=int(y,2)
+        #convert measurement to integer form
+        y=max(counts, key=counts.get)
+        y=int(y,2)
 
     estimate=y/4
     return estimate
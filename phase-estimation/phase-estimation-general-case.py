@@ -1,33 +1,89 @@
-def phase_estimation(phi,precision=3):
+import os,sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def phase_estimation(phi,precision=3,analytic=False,iterative=False,approximation_degree=0):
     """
     Runs QPE algorithm with chosen precision.
 
     Args:
         phi (float): phase of unitary gate U such that U |u⟩ = e^(2pi*i*phi) |u⟩,  where |u⟩ is an eigenstate of U.
-        precision (int) level of precision in estimate (max 15)
+        precision (int) level of precision in estimate (max 15, or 52 if iterative, unless analytic is True)
+        analytic (bool): if True, take the most likely outcome from the closed-form distribution instead of simulating
+        iterative (bool): if True, use iterative_phase_estimation, with one control qubit instead of precision
+        approximation_degree (int or str): number of the smallest inverse-QFT rotation angles to drop, or 'auto' to
+                                           pick it from the precision (see approximate_qft); ignored if analytic
     Returns:
         estimate (float): estimate for phi
     Raises:
         ValueError: if phi is not between 0 and 1
         TypeError: if precision is not an integer
-        ValueError: if precision is not between 1 and 15   
+        ValueError: if precision is not between 1 and 15 (or 52 if iterative, or not positive, when analytic is True)
+        ValueError: if approximation_degree is not 'auto' or between 0 and precision-1
     Notes:
-        -uses qiskit and math packages
+        -uses qiskit and math packages, and the shared Sampler from backends
         -Unitary gate U is represented as a phase gate with eigenstate |1⟩
     """
     if not (0<=phi<=1):
         raise ValueError('phi must be between 0 and 1.')
     if not isinstance(precision,int):
         raise TypeError('precision must be an integer between 1 and 15 (inclusive)')
+    if iterative and not analytic:
+        return iterative_phase_estimation(phi,precision,approximation_degree=approximation_degree)
+    if analytic:
+        if not (precision>=1):
+            raise ValueError('precision must be a positive integer')
+        outcomes,probabilities=qpe_distribution(phi,precision,window=1)
+        return int(outcomes[probabilities.argmax()])/(2**precision)
     if not (1<=precision<=15):
         raise ValueError('precision must be an integer between 1 and 15 (inclusive)')
 
+    import backends
+    import tracing
+
+    m=precision
+    with tracing.span('phase_estimation',precision=m):
+        with tracing.span('construct') as s:
+            qc=phase_estimation_circuit(m,approximation_degree)
+            s.set_circuit(qc)
+
+        result = backends.sample(qc, parameter_values=[[phi]])
+        with tracing.span('parse_quasi_dists'):
+            counts=result.quasi_dists[0]
+            y=max(counts, key=counts.get)
+
+    estimate=y/(2**m)
+    return estimate
+
+
+_circuits={}
+
+def phase_estimation_circuit(precision,approximation_degree=0):
+    """
+    Builds the QPE circuit for a given precision with a symbolic phase, caching it for later calls.
+
+    Args:
+        precision (int): number of counting qubits
+        approximation_degree (int or str): number of the smallest inverse-QFT rotation angles to drop, or 'auto'
+    Returns:
+        qc (QuantumCircuit): circuit with a single Parameter 'phi' for the phase of U
+    Notes:
+        -uses qiskit and math packages
+        -The same circuit object is returned for every call with the same precision, so bind parameters
+         with assign_parameters(..., inplace=False) or pass them to the sampler rather than modifying it
+    """
+    import approximate_qft
+
+    degree=approximate_qft.resolve_degree(approximation_degree,precision)
+    if (precision,degree) in _circuits:
+        return _circuits[precision,degree]
+
     from qiskit import QuantumCircuit
+    from qiskit.circuit import Parameter
     from math import pi
-    from qiskit.circuit.library import QFT
-    from qiskit.primitives import Sampler
+    import tracing
 
     m=precision
+    phi=Parameter('phi')
 
     qc=QuantumCircuit(m+1,m)
     qc.x(m)
@@ -42,19 +98,415 @@ def phase_estimation(phi,precision=3):
         )
     qc.barrier()
 
-    qc.compose(
-        QFT(m, inverse=True),
-        inplace=True
-    )
+    qft=approximate_qft.inverse_qft(m,degree)
+    with tracing.span('compose',gates=m):
+        qc.compose(
+            qft,
+            inplace=True
+        )
     qc.barrier()
 
     qc.measure(range(m),range(m))
 
-    result = Sampler().run(qc).result()
-    counts=result.quasi_dists[0]
-    y=max(counts, key=counts.get)
+    _circuits[precision,degree]=qc
+    return qc
+
+
+ITERATIVE_MAX_PRECISION=52
+
+_iterative_circuits={}
+
+def iterative_phase_estimation_circuit(precision,approximation_degree=0):
+    """
+    Builds the iterative (semi-classical) QPE circuit for a given precision, caching it for later calls.
+
+    A single control qubit is reused for every bit: each round resets it, applies controlled-U^(2^(m-1-k)) for bit k
+    (least significant first), corrects the phase of the bits already measured with gates conditioned on their
+    classical bits (c_if), and measures it into clbit k. This replaces the counting register and the inverse QFT, so
+    the circuit has 2 qubits for any precision.
+
+    Args:
+        precision (int): number of bits m to estimate
+        approximation_degree (int or str): drops the corrections the approximate inverse QFT of this degree drops,
+                                           those by less than pi/2^(m-1-degree), or 'auto'
+    Returns:
+        qc (QuantumCircuit): circuit with one Parameter 'theta_k' per bit, the angle of the controlled phase of round k
+    Notes:
+        -uses qiskit and math packages
+        -bind theta_k to 2*pi*((phi*2**(m-1-k)) mod 1) (see iterative_phase_estimation), which keeps the angles exact
+         for large m where 2*pi*phi*2**(m-1-k) would lose the low bits of phi
+        -The same circuit object is returned for every call with the same precision, so do not modify it
+    """
+    import approximate_qft
+
+    degree=approximate_qft.resolve_degree(approximation_degree,precision)
+    if (precision,degree) in _iterative_circuits:
+        return _iterative_circuits[precision,degree]
+
+    from qiskit import QuantumCircuit,QuantumRegister,ClassicalRegister
+    from qiskit.circuit import Parameter
+    from math import pi
+
+    m=precision
+    control=QuantumRegister(1,'control')
+    target=QuantumRegister(1,'target')
+    bits=ClassicalRegister(m,'c')
+    qc=QuantumCircuit(control,target,bits)
+    qc.x(target)
+    qc.barrier()
+
+    for k in range(m):
+        if k:
+            qc.reset(control)
+        qc.h(control)
+        qc.cp(Parameter(f'theta_{k:02d}'),control,target)
+        #remove the phase of the less significant bits measured so far
+        for earlier in range(max(0,k-(m-1-degree)),k):
+            qc.p(-2*pi/2**(k-earlier+1),control).c_if(bits[earlier],1)
+        qc.h(control)
+        qc.measure(control,bits[k])
+
+    _iterative_circuits[precision,degree]=qc
+    return qc
+
+
+def iterative_phase_estimation(phi,precision=3,shots=16,approximation_degree=0):
+    """
+    Runs iterative QPE with one reusable control qubit, which makes estimates of 40 and more bits practical.
+
+    Args:
+        phi (float): phase of unitary gate U such that U |u⟩ = e^(2pi*i*phi) |u⟩,  where |u⟩ is an eigenstate of U.
+        precision (int): number of bits to estimate (max 52, the bits a float holds)
+        shots (int): number of runs; the most frequent outcome is returned
+        approximation_degree (int or str): number of the smallest correction angles to drop, or 'auto'
+    Returns:
+        estimate (float): estimate for phi
+    Raises:
+        ValueError: if phi is not between 0 and 1
+        TypeError: if precision is not an integer
+        ValueError: if precision is not between 1 and 52
+    Notes:
+        -uses Aer through backends.run, since the circuit measures and resets mid-circuit; memory and qubit count do
+         not grow with precision, and the circuit is transpiled once per precision through transpile_cache
+    """
+    if not (0<=phi<=1):
+        raise ValueError('phi must be between 0 and 1.')
+    if not isinstance(precision,int):
+        raise TypeError(f'precision must be an integer between 1 and {ITERATIVE_MAX_PRECISION} (inclusive)')
+    if not (1<=precision<=ITERATIVE_MAX_PRECISION):
+        raise ValueError(f'precision must be an integer between 1 and {ITERATIVE_MAX_PRECISION} (inclusive)')
+
+    import backends
+    import tracing
+    from math import pi
+
+    m=precision
+    with tracing.span('iterative_phase_estimation',precision=m):
+        with tracing.span('construct') as s:
+            qc=iterative_phase_estimation_circuit(m,approximation_degree)
+            s.set_circuit(qc)
+        angles={f'theta_{k:02d}':2*pi*((phi*2**(m-1-k))%1) for k in range(m)}
+
+        result=backends.run(qc,parameter_values=angles,shots=shots)
+        with tracing.span('parse_counts'):
+            counts=result.get_counts()
+            y=int(max(counts,key=counts.get),2)
 
     estimate=y/(2**m)
     return estimate
 
-print(phase_estimation(phi=0.3,precision=15))
+
+def phase_estimation_sweep(phis,precision=3,approximation_degree=0):
+    """
+    Runs QPE for many phases at once, binding each phase into the cached circuit for the given precision.
+
+    Args:
+        phis (array-like): phases of U, each between 0 and 1
+        precision (int): level of precision in estimate (max 15)
+        approximation_degree (int or str): number of the smallest inverse-QFT rotation angles to drop, or 'auto'
+    Returns:
+        estimates (numpy.ndarray): estimate for each phi
+        distributions (numpy.ndarray): array of shape (len(phis), 2**precision) with the probability of each outcome y
+    Raises:
+        ValueError: if any phi is not between 0 and 1
+        TypeError: if precision is not an integer
+        ValueError: if precision is not between 1 and 15
+    Notes:
+        -uses numpy and the shared Sampler from backends; all phases are submitted as one job
+        -precision 1 and 2 reproduce the circuits of the low-precision and 2-qubit scripts
+        -an empty phis gives empty results without running a job
+    """
+    import numpy as np
+    import backends
+    import tracing
+
+    phis=np.asarray(phis,dtype=float).ravel()
+    if not np.all((0<=phis)&(phis<=1)):
+        raise ValueError('phi must be between 0 and 1.')
+    if not isinstance(precision,int):
+        raise TypeError('precision must be an integer between 1 and 15 (inclusive)')
+    if not (1<=precision<=15):
+        raise ValueError('precision must be an integer between 1 and 15 (inclusive)')
+
+    m=precision
+    qc=phase_estimation_circuit(m,approximation_degree)
+    if not len(phis):
+        return np.zeros(0),np.zeros((0,2**m))
+
+    result=backends.sample([qc]*len(phis), parameter_values=[[phi] for phi in phis])
+
+    with tracing.span('parse_quasi_dists',circuits=len(phis)):
+        distributions=np.zeros((len(phis),2**m))
+        for row,quasi_dist in zip(distributions,result.quasi_dists):
+            row[list(quasi_dist.keys())]=list(quasi_dist.values())
+
+    estimates=distributions.argmax(axis=1)/(2**m)
+    return estimates,distributions
+
+
+def approximation_report(precision,degrees=None,phis=None,repeats=3):
+    """
+    Measures what each approximate inverse QFT saves and costs at a precision, to choose an approximation degree.
+
+    Args:
+        precision (int): number of counting qubits m (max 15)
+        degrees (list): approximation degrees to measure, integers or 'auto' (defaults to every degree 0..m-1)
+        phis (array-like): phases to simulate (defaults to 32 random phases)
+        repeats (int): sweeps timed per degree; the fastest is reported
+    Returns:
+        rows (list): one dict per degree with keys
+            'degree' (int): approximation degree
+            'auto' (bool): True for the degree the 'auto' setting picks
+            'smallest_angle' (float): smallest rotation angle kept (None if no rotation is kept)
+            'rotations' (int): controlled rotations in the inverse QFT
+            'gates' (int): gates of the whole circuit transpiled for the Aer simulator, without barriers
+            'depth' (int): depth of that circuit
+            'qft_depth' (int): depth of the inverse QFT alone
+            'seconds' (float): time to simulate one phase, from phase_estimation_sweep over phis
+            'success' (float): mean probability of measuring the closest m-bit approximation of phi
+            'loss' (float): success probability of the exact QFT (from qpe_success_probability) minus success
+    Notes:
+        -uses numpy and qiskit packages, and the shared Sampler from backends
+    """
+    import time
+    import numpy as np
+    import approximate_qft
+    import backends
+    import transpile_cache
+
+    m=precision
+    if phis is None:
+        phis=np.random.default_rng(0).uniform(0,1,32)
+    phis=np.asarray(phis,dtype=float).ravel()
+    degrees=list(range(m)) if degrees is None else degrees
+    k,fraction=_split_phase(phis,m)
+    closest=(k+np.where(fraction>0.5,1,0))%(2**m)
+    exact=qpe_success_probability(phis,m).mean()
+    auto=approximate_qft.auto_degree(m)
+
+    rows=[]
+    for degree in degrees:
+        degree=approximate_qft.resolve_degree(degree,m)
+        qc=phase_estimation_circuit(m,degree)
+        compiled=transpile_cache.transpile(qc,backends.get_simulator())
+        qft=approximate_qft.inverse_qft(m,degree).decompose()
+
+        seconds=float('inf')
+        for _ in range(repeats):
+            start=time.perf_counter()
+            _,distributions=phase_estimation_sweep(phis,m,degree)
+            seconds=min(seconds,(time.perf_counter()-start)/len(phis))
+        success=distributions[np.arange(len(phis)),closest].mean()
+
+        rows.append({
+            'degree':degree,
+            'auto':degree==auto,
+            'smallest_angle':approximate_qft.smallest_angle(m,degree),
+            'rotations':qft.count_ops().get('cp',0),
+            'gates':compiled.size()-compiled.count_ops().get('barrier',0),
+            'depth':compiled.depth(),
+            'qft_depth':qft.depth(),
+            'seconds':seconds,
+            'success':float(success),
+            'loss':float(exact-success),
+        })
+    return rows
+
+
+def _fejer(fraction,offsets,m):
+    """
+    Probability of measuring y=k+j in QPE, where phi*2**m = k + fraction with k an integer and j the offset.
+
+    Args:
+        fraction (numpy.ndarray): fractional part of phi*2**m, broadcast against offsets
+        offsets (numpy.ndarray): integer offsets j of the outcome from k
+        m (int): precision
+    Returns:
+        probabilities (numpy.ndarray): |sum_x e^(2pi*i*x*(phi-y/2**m))|^2 / 4**m
+    """
+    import numpy as np
+
+    distance=fraction-offsets
+    with np.errstate(divide='ignore',invalid='ignore'):
+        probabilities=np.sin(np.pi*fraction)**2/(4.0**m*np.sin(np.pi*distance/2.0**m)**2)
+    return np.where(distance==0,1.0,probabilities)
+
+
+def _split_phase(phis,m):
+    """
+    Splits phi*2**m into its integer part k, reduced mod 2**m, and fractional part.
+
+    k is int64 for m below 63 and an object array of Python ints above, which int64 cannot hold. Scaling by a power
+    of two is exact, so k is exact either way.
+    """
+    import numpy as np
+
+    scaled=np.asarray(phis,dtype=float)*2.0**m
+    k=np.floor(scaled)
+    fraction=scaled-k
+    if m<63:
+        k=k.astype(np.int64)%(1<<m)
+    else:
+        k=np.asarray(np.frompyfunc(lambda v:int(v)%(1<<m),1,1)(k),dtype=object)
+    return k,fraction
+
+
+def qpe_distribution(phi,precision,window=None):
+    """
+    Computes the exact QPE outcome distribution for a phase gate with eigenstate |1⟩, without simulating.
+
+    The probability of outcome y is the Fejér kernel sin²(π 2^m δ) / (4^m sin²(π δ)) with δ = phi - y/2^m.
+
+    Args:
+        phi (float): phase of U, between 0 and 1
+        precision (int): number of counting qubits m (any positive integer)
+        window (int): only evaluate the 2*window outcomes closest to phi*2**m (optional). Defaults to every
+                      outcome for precision up to 20, and to 2**16 on each side of the peak above that
+    Returns:
+        outcomes (numpy.ndarray): measured integers y (mod 2**m), in order of increasing offset from the peak; int64
+                                  for precision below 63, Python ints in an object array above
+        probabilities (numpy.ndarray): probability of each outcome
+    Raises:
+        ValueError: if phi is not between 0 and 1
+        TypeError: if precision is not an integer
+        ValueError: if precision is not positive
+    Notes:
+        -uses numpy package
+        -O(window) time and memory; the probability outside a window of w outcomes per side is at most about 1/(2w)
+    """
+    if not (0<=phi<=1):
+        raise ValueError('phi must be between 0 and 1.')
+    if not isinstance(precision,int):
+        raise TypeError('precision must be a positive integer')
+    if not (precision>=1):
+        raise ValueError('precision must be a positive integer')
+
+    import numpy as np
+
+    m=precision
+    if window is None:
+        window=2**(m-1) if m<=20 else 2**16
+    window=min(window,2**(m-1)) if m>1 else 1
+
+    k,fraction=_split_phase(phi,m)
+    offsets=np.arange(-window+1,window+1) if m>1 else np.arange(0,2)
+    probabilities=_fejer(fraction,offsets,m)
+    if m>=63:
+        offsets=offsets.astype(object)
+    outcomes=(int(k)+offsets)%(1<<m)
+    return outcomes,probabilities
+
+
+def qpe_success_probability(phis,precision,tolerance=0):
+    """
+    Probability that QPE returns an outcome within tolerance of the closest m-bit approximation of each phase.
+
+    Args:
+        phis (array-like): phases of U, each between 0 and 1
+        precision (int): number of counting qubits m
+        tolerance (int): number of outcomes on either side of the closest one that still count as a success
+    Returns:
+        probabilities (numpy.ndarray): success probability for each phase
+    Notes:
+        -uses numpy package; vectorised over phis in O(len(phis)*(2*tolerance+1))
+    """
+    import numpy as np
+
+    phis=np.asarray(phis,dtype=float)
+    k,fraction=_split_phase(phis,precision)
+    closest=np.where(fraction>0.5,1,0)
+    offsets=np.arange(-tolerance,tolerance+1)
+    total=np.zeros(phis.shape)
+    for offset in offsets:
+        total+=_fejer(fraction,closest+offset,precision)
+    return np.minimum(total,1.0)
+
+
+def qpe_sample(phis,precision,shots=1,window=4,seed=None):
+    """
+    Draws QPE measurement outcomes from the exact distribution for one or many phases.
+
+    Outcomes within window of the peak are drawn from the exact probabilities; the remaining tail is drawn exactly
+    by rejection sampling against a 1/j² envelope, so no probability mass is dropped.
+
+    Args:
+        phis (array-like): phases of U, each between 0 and 1
+        precision (int): number of counting qubits m
+        shots (int): samples per phase
+        window (int): outcomes per side evaluated explicitly
+        seed (int): seed for numpy's random generator (optional)
+    Returns:
+        outcomes (numpy.ndarray): array of shape phis.shape + (shots,) with measured integers y; uint64 for
+                                  precision below 63, Python ints in an object array above
+    Notes:
+        -uses numpy package
+        -estimates of phi are outcomes / 2**precision
+    """
+    import numpy as np
+
+    rng=np.random.default_rng(seed)
+    phis=np.asarray(phis,dtype=float)
+    m=precision
+    half=2**(m-1)
+    window=max(2,min(window,half))
+
+    k,fraction=_split_phase(phis.ravel(),m)
+    k=np.repeat(k,shots)
+    fraction=np.repeat(fraction,shots)
+    count=len(fraction)
+
+    offsets=np.arange(-window+1,window+1)
+    inside=_fejer(fraction[:,None],offsets[None,:],m)
+    cumulative=np.cumsum(inside,axis=1)
+    u=rng.random(count)
+    in_window=u<cumulative[:,-1]
+    chosen=np.zeros(count,dtype=np.int64)
+    rows=np.nonzero(in_window)[0]
+    chosen[rows]=offsets[(u[rows,None]>=cumulative[rows]).sum(axis=1).clip(max=2*window-1)]
+
+    #tail: propose |j| from P(u)=a/(u(u-1)), u>=w, with a random sign, and accept with probability P_j/(M q(j))
+    pending=np.nonzero(~in_window)[0]
+    a=window-1
+    while len(pending):
+        magnitude=np.ceil(a/(1-rng.random(len(pending))))
+        sign=np.where(rng.random(len(pending))<0.5,-1,1)
+        j=sign*magnitude
+        valid=(j>-half)&(j<=half)&((j<-window+1)|(j>window))
+        target=np.where(valid,_fejer(fraction[pending],j,m),0.0)
+        proposal=0.5*a/(magnitude*(magnitude-1))
+        bound=np.sin(np.pi*fraction[pending])**2*window/(2*a**2)
+        with np.errstate(divide='ignore',invalid='ignore'):
+            accept=rng.random(len(pending))*bound*proposal<target
+        chosen[pending[accept]]=j[accept]
+        pending=pending[~accept]
+
+    if m<63:
+        outcomes=((k+chosen)%(1<<m)).astype(np.uint64)
+    else:
+        outcomes=(k+chosen.astype(object))%(1<<m)
+    return outcomes.reshape(phis.shape+(shots,))
+
+
+if __name__ == "__main__":
+    print(phase_estimation(phi=0.3,precision=15))
+
@@ -8,24 +8,22 @@
 #   Rϕ |1⟩ = e^(iϕ) |1⟩ 
 #   ϕ=2*pi*θ
 
-from qiskit import QuantumCircuit
-from qiskit_aer import AerSimulator
+import os,sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backends
+import tracing
 from math import pi
 
-def phase_estimation(θ):
+def phase_estimation_circuit(θ):
     """
-    Runs the phase estimation algiorthm for the simple case where unitary gate U is a phase gate with eigenstate |1⟩.
-    Low precision case: phase estimation is rounded to the nearest half.
+    Builds the low-precision phase estimation circuit with one control qubit.
 
     Args:
-        θ (float): phase of the operation's eigenvalue λ such that λ=e^(2πiθ) 
+        θ (float): phase of the operation's eigenvalue λ such that λ=e^(2πiθ)
     Returns:
-        estimate (float): estimate of θ computed via phase estimation. Returns either 0.5 or 0.
-    Raises:
-        ValueError: if θ is not between 0 and 1
+        qc (QuantumCircuit): circuit measuring the control qubit
     """
-    if not (0<=θ<=1):
-        raise ValueError('θ must be between 0 and 1')
+    from qiskit import QuantumCircuit
 
     qc=QuantumCircuit(2,1)
     qc.x(1)
@@ -36,9 +34,33 @@ def phase_estimation(θ):
         target_qubit=1)
     qc.h(0)
     qc.measure(0,0)
+    return qc
+
+
+def phase_estimation(θ):
+    """
+    Runs the phase estimation algiorthm for the simple case where unitary gate U is a phase gate with eigenstate |1⟩.
+    Low precision case: phase estimation is rounded to the nearest half.
+
+    Args:
+        θ (float): phase of the operation's eigenvalue λ such that λ=e^(2πiθ) 
+    Returns:
+        estimate (float): estimate of θ computed via phase estimation. Returns either 0.5 or 0.
+    Raises:
+        ValueError: if θ is not between 0 and 1
+    """
+    if not (0<=θ<=1):
+        raise ValueError('θ must be between 0 and 1')
+
+    with tracing.span('phase_estimation_low_precision',theta=θ):
+        with tracing.span('construct') as s:
+            qc=phase_estimation_circuit(θ)
+            s.set_circuit(qc)
 
-    sim=AerSimulator()
-    counts=sim.run(qc).result().get_counts()
+        #a circuit this small runs on the NumPy micro-simulator rather than on Aer
+        result=backends.run(qc,shots=1024)
+        with tracing.span('parse_counts'):
+            counts=result.get_counts()
 
     if max(counts, key=counts.get)=='1':
         estimate=0.5
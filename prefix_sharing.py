@@ -0,0 +1,252 @@
+"""
+Execution of circuit families that differ only after a common prefix.
+
+The CHSH strategies all start from the same Bell pair, the four superdense coding messages share its preparation, and
+every Deutsch-Jozsa or Simon circuit opens with the same Hadamard layer before its oracle. Simulating each variant
+from scratch repeats that prefix K times. The functions here simulate the prefix once, keep the resulting state as a
+snapshot, and branch each variant's suffix from it, so a family costs prefix + K * suffix gates instead of
+K * (prefix + suffix):
+
+    import prefix_sharing
+    circuits = [chsh.quantum_strategy_circuit(x, y) for x in (0, 1) for y in (0, 1)]
+    prefix_sharing.common_prefix_length(circuits)            # 3 (h, cx, barrier)
+    prefix_sharing.family_distributions(circuits)            # exact distributions, keyed like get_counts()
+    prefix_sharing.run_family(circuits, shots=1024)          # counts of each variant
+
+Families of Clifford circuits are snapshotted as stabilizer tableaux on Aer's stabilizer simulator, so they can span
+hundreds of qubits, and their suffixes run in one batched job. Other families are snapshotted as a Statevector, and
+shots are drawn from each suffix's exact distribution. Measurements must all come at the end of the suffixes.
+"""
+import tracing
+
+
+def _signature(circuit, instruction):
+    import result_cache
+
+    operation = instruction.operation
+    return (operation.name, tuple(result_cache._parameter_text(param) for param in operation.params),
+            tuple(circuit.find_bit(qubit).index for qubit in instruction.qubits),
+            tuple(circuit.find_bit(clbit).index for clbit in instruction.clbits))
+
+
+def _shareable(instruction):
+    return (instruction.operation.name not in ('measure', 'reset')
+            and getattr(instruction.operation, 'condition', None) is None)
+
+
+def common_prefix_length(circuits):
+    """
+    Counts the leading instructions every circuit of a family has in common.
+
+    The prefix stops at the first instruction that differs between two circuits, or that measures, resets or is
+    classically conditioned.
+
+    Args:
+        circuits (list): QuantumCircuits on the same number of qubits
+    Returns:
+        length (int): number of shared leading instructions (0 if the qubit counts differ)
+    """
+    if not circuits or len({circuit.num_qubits for circuit in circuits}) > 1:
+        return 0
+    first = circuits[0]
+    length = 0
+    for position, instruction in enumerate(first.data):
+        if not _shareable(instruction):
+            break
+        signature = None
+        for other in circuits[1:]:
+            if position >= len(other.data):
+                return length
+            candidate = other.data[position]
+            # copies of one circuit share operation objects, which saves building signatures
+            if candidate.operation is instruction.operation and candidate.qubits == instruction.qubits \
+                    and candidate.clbits == instruction.clbits:
+                continue
+            if signature is None:
+                signature = _signature(first, instruction)
+            if _signature(other, candidate) != signature:
+                return length
+        length += 1
+    return length
+
+
+def split_at(circuit, length):
+    """
+    Splits a circuit after its first length instructions.
+
+    Args:
+        circuit (QuantumCircuit): circuit to split
+        length (int): number of instructions in the prefix
+    Returns:
+        prefix (QuantumCircuit): the first length instructions
+        suffix (QuantumCircuit): the remaining instructions, with the circuit's registers
+    """
+    prefix = circuit.copy_empty_like()
+    suffix = circuit.copy_empty_like()
+    for position, instruction in enumerate(circuit.data):
+        (prefix if position < length else suffix).append(instruction)
+    return prefix, suffix
+
+
+def _is_clifford(circuits):
+    import backends
+
+    return all(set(circuit.count_ops()) <= backends.CLIFFORD_OPERATIONS for circuit in circuits)
+
+
+def _count(stats, prefix, suffixes):
+    if stats is None:
+        return
+    prefix_operations = prefix.size()
+    suffix_operations = sum(suffix.size() for suffix in suffixes)
+    stats.update(variants=len(suffixes), prefix_operations=prefix_operations, suffix_operations=suffix_operations,
+                 operations=prefix_operations + suffix_operations,
+                 naive_operations=len(suffixes) * prefix_operations + suffix_operations)
+
+
+def _prefix_state(prefix):
+    from qiskit.quantum_info import Statevector
+
+    with tracing.span('prefix_snapshot', method='statevector', operations=prefix.size()):
+        return Statevector(prefix.remove_final_measurements(inplace=False))
+
+
+def suffix_distributions(prefix, suffixes, stats=None):
+    """
+    Computes the exact outcome distribution of each suffix applied to the state the prefix prepares.
+
+    Args:
+        prefix (QuantumCircuit): shared first part, without measurements
+        suffixes (list): QuantumCircuits on the same qubits, with measurements only at the end
+        stats (dict): if given, filled with the work done (see run_suffixes)
+    Returns:
+        distributions (list): probability of each outcome of each suffix, keyed like Result.get_counts()
+    Raises:
+        ValueError: if a suffix measures, resets or conditions before its final measurements
+    """
+    import result_cache
+
+    _count(stats, prefix, suffixes)
+    state = _prefix_state(prefix)
+    with tracing.span('branch_suffixes', variants=len(suffixes)):
+        return [result_cache.exact_distribution(suffix, initial_state=state) for suffix in suffixes]
+
+
+def _run_stabilizer(prefix, suffixes, shots, seed, memory):
+    import backends
+    import transpile_cache
+    from qiskit_aer.library import SetStabilizer
+
+    simulator = backends.get_simulator(method='stabilizer')
+    snapshot = None
+    if prefix.size():
+        with tracing.span('prefix_snapshot', method='stabilizer', operations=prefix.size()):
+            saved = transpile_cache.transpile(prefix, simulator).copy()
+            saved.save_stabilizer()
+            snapshot = simulator.run(saved, shots=1).result().data(0)['stabilizer']
+
+    variants = []
+    for suffix in suffixes:
+        compiled = transpile_cache.transpile(suffix, simulator)
+        if snapshot is None:
+            variants.append(compiled)
+            continue
+        variant = compiled.copy_empty_like()
+        variant.append(SetStabilizer(snapshot), variant.qubits)
+        variant.compose(compiled, inplace=True)
+        variants.append(variant)
+
+    with tracing.span('branch_suffixes', variants=len(suffixes), shots=shots):
+        result = simulator.run(variants, shots=shots, memory=memory, seed_simulator=seed).result()
+    if memory:
+        return [(result.get_counts(i), result.get_memory(i)) for i in range(len(variants))]
+    return [result.get_counts(i) for i in range(len(variants))]
+
+
+def run_suffixes(prefix, suffixes, shots=1024, seed=None, memory=False, stats=None):
+    """
+    Runs each suffix from the state the prefix prepares, simulating the prefix only once.
+
+    Args:
+        prefix (QuantumCircuit): shared first part, without measurements
+        suffixes (list): QuantumCircuits on the same qubits, with measurements only at the end
+        shots (int): shots of each variant
+        seed (int): seed for the sampling (optional)
+        memory (bool): also return the outcome of every shot
+        stats (dict): if given, filled with
+            'variants' (int): number of suffixes
+            'prefix_operations', 'suffix_operations' (int): gates in the prefix and in all suffixes together
+            'operations' (int): gates simulated, prefix once plus every suffix
+            'naive_operations' (int): gates simulating every variant from scratch would take
+    Returns:
+        results (list): counts of each variant, keyed like Result.get_counts(), or (counts, memory) pairs when memory
+                        is True
+    Raises:
+        ValueError: if a suffix measures, resets or conditions before its final measurements
+    """
+    if _is_clifford([prefix] + list(suffixes)):
+        _count(stats, prefix, suffixes)
+        return _run_stabilizer(prefix, suffixes, shots, seed, memory)
+
+    import numpy as np
+    import result_cache
+
+    distributions = suffix_distributions(prefix, suffixes, stats=stats)
+    seeds = np.random.SeedSequence(seed).spawn(len(suffixes))
+    return [result_cache.sample_distribution(distribution, shots=shots, seed=variant_seed, memory=memory)
+            for distribution, variant_seed in zip(distributions, seeds)]
+
+
+def _split_family(circuits, prefix_length):
+    length = common_prefix_length(circuits)
+    if prefix_length is None:
+        prefix_length = length
+    elif prefix_length > length:
+        raise ValueError(f'the circuits only share their first {length} instructions, not {prefix_length}')
+    prefix, _ = split_at(circuits[0], prefix_length)
+    suffixes = []
+    for circuit in circuits:
+        suffix = circuit.copy_empty_like()
+        for instruction in circuit.data[prefix_length:]:
+            suffix.append(instruction)
+        suffixes.append(suffix)
+    return prefix, suffixes
+
+
+def family_distributions(circuits, prefix_length=None, stats=None):
+    """
+    Computes the exact outcome distribution of every circuit of a family, simulating their common prefix once.
+
+    Args:
+        circuits (list): QuantumCircuits on the same qubits, with measurements only at the end
+        prefix_length (int): number of leading instructions to share (defaults to common_prefix_length)
+        stats (dict): if given, filled with the work done (see run_suffixes)
+    Returns:
+        distributions (list): probability of each outcome of each circuit, keyed like Result.get_counts()
+    Raises:
+        ValueError: if prefix_length is longer than the common prefix, or a circuit measures, resets or conditions
+                    before its final measurements
+    """
+    prefix, suffixes = _split_family(circuits, prefix_length)
+    return suffix_distributions(prefix, suffixes, stats=stats)
+
+
+def run_family(circuits, shots=1024, seed=None, memory=False, prefix_length=None, stats=None):
+    """
+    Runs every circuit of a family, simulating their common prefix once.
+
+    Args:
+        circuits (list): QuantumCircuits on the same qubits, with measurements only at the end
+        shots (int): shots of each circuit
+        seed (int): seed for the sampling (optional)
+        memory (bool): also return the outcome of every shot
+        prefix_length (int): number of leading instructions to share (defaults to common_prefix_length)
+        stats (dict): if given, filled with the work done (see run_suffixes)
+    Returns:
+        results (list): counts of each circuit, or (counts, memory) pairs when memory is True
+    Raises:
+        ValueError: if prefix_length is longer than the common prefix, or a circuit measures, resets or conditions
+                    before its final measurements
+    """
+    prefix, suffixes = _split_family(circuits, prefix_length)
+    return run_suffixes(prefix, suffixes, shots=shots, seed=seed, memory=memory, stats=stats)
@@ -0,0 +1,362 @@
+"""
+Content-addressed cache of exact measurement distributions for small deterministic circuits.
+
+The same few circuits (the four Deutsch oracles, the four superdense coding messages, the CHSH question pairs) are
+simulated over and over. Their outcome distributions depend only on the circuit, so the cache keys each one by a
+structural hash of the circuit and any options that change its result, computes the exact distribution once with
+Statevector, and draws later shots from it with numpy instead of running the simulator again.
+
+    import result_cache
+    counts = result_cache.sample(qc, shots=1024)
+    result_cache.cache_stats()   # {'hits': ..., 'misses': ..., 'evictions': ..., ...}
+
+Entries live in an in-memory LRU tier bounded by entry count and approximate size, and optionally in an on-disk
+tier (one JSON file per key) that survives restarts. Only circuits whose measurements all come at the end can be
+cached; others raise ValueError.
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import tracing
+
+
+_standard_gates = None
+
+
+def _parameter_text(value):
+    if hasattr(value, 'tobytes'):
+        return hashlib.sha256(value.tobytes()).hexdigest()
+    try:
+        return repr(complex(value))
+    except TypeError:
+        # str() of an unbound ParameterExpression goes through sympy's printer, which is slow and imports sympy
+        return str(getattr(value, '_symbol_expr', value))
+
+
+def _hash_circuit(circuit, digest, standard_gates):
+    digest.update(f'{circuit.num_qubits},{circuit.num_clbits};'.encode())
+    # register sizes set the layout of get_counts() keys; names are left out, since unnamed registers get a new
+    # name (c0, c1, ...) every time a circuit is built
+    for register in circuit.cregs:
+        digest.update(f'creg {register.size};'.encode())
+    for instruction in circuit.data:
+        operation = instruction.operation
+        qubits = [circuit.find_bit(qubit).index for qubit in instruction.qubits]
+        clbits = [circuit.find_bit(clbit).index for clbit in instruction.clbits]
+        params = [_parameter_text(param) for param in operation.params]
+        digest.update(f'{operation.name}{params}{qubits}{clbits}'.encode())
+        condition = getattr(operation, 'condition', None)
+        if condition is not None:
+            from qiskit.circuit import Clbit
+
+            target, value = condition
+            bits = [target] if isinstance(target, Clbit) else list(target)
+            digest.update(f'if {[circuit.find_bit(bit).index for bit in bits]}=={value}'.encode())
+        # gates defined by the user can share a name but not a body
+        if operation.name not in standard_gates and getattr(operation, 'definition', None) is not None:
+            digest.update(b'{')
+            _hash_circuit(operation.definition, digest, standard_gates)
+            digest.update(b'}')
+
+
+def circuit_key(circuit, **options):
+    """
+    Returns a structural hash of a circuit and the options that affect its result.
+
+    Two circuits get the same key when they apply the same operations, with the same parameters, to the same qubit
+    and clbit indices, regardless of their names or of how they were built.
+
+    Args:
+        circuit (QuantumCircuit): circuit to hash
+        **options: anything else that changes the result, e.g. a noise model name
+    Returns:
+        key (str): hex digest
+    """
+    global _standard_gates
+    if _standard_gates is None:
+        from qiskit.circuit.library import get_standard_gate_name_mapping
+        _standard_gates = frozenset(get_standard_gate_name_mapping())
+
+    digest = hashlib.sha256()
+    _hash_circuit(circuit, digest, _standard_gates)
+    digest.update(repr(sorted(options.items())).encode())
+    return digest.hexdigest()
+
+
+def exact_distribution(circuit, initial_state=None):
+    """
+    Computes the exact distribution of a circuit's measurement results with Statevector.
+
+    Args:
+        circuit (QuantumCircuit): circuit whose measurements all come at the end
+        initial_state (Statevector): state to apply the circuit to instead of |0...0> (optional)
+    Returns:
+        distribution (dict): probability of each outcome, keyed like Result.get_counts()
+    Raises:
+        ValueError: if the circuit measures, resets or conditions on bits before its final measurements
+    """
+    from qiskit.quantum_info import Statevector
+
+    measured = {}
+    body = circuit.remove_final_measurements(inplace=False)
+    for instruction in circuit.data:
+        if instruction.operation.name == 'measure':
+            qubit = circuit.find_bit(instruction.qubits[0]).index
+            clbit = circuit.find_bit(instruction.clbits[0]).index
+            measured[clbit] = qubit
+    unsupported = {'measure', 'reset'} & set(body.count_ops())
+    if unsupported or any(getattr(i.operation, 'condition', None) for i in body.data):
+        raise ValueError('only circuits whose measurements all come at the end can be cached')
+
+    clbits = sorted(measured)
+    state = Statevector(body) if initial_state is None else initial_state.evolve(body)
+    probabilities = state.probabilities_dict([measured[clbit] for clbit in clbits])
+
+    distribution = {}
+    for outcome, probability in probabilities.items():
+        if probability < 1e-12:
+            continue
+        bits = ['0'] * circuit.num_clbits
+        # outcome is written with the last listed qubit first
+        for clbit, bit in zip(clbits, reversed(outcome)):
+            bits[clbit] = bit
+        distribution[_format_outcome(bits, circuit)] = float(probability)
+    return distribution
+
+
+def sample_distribution(distribution, shots=1024, seed=None, memory=False):
+    """
+    Draws shots from an outcome distribution.
+
+    Args:
+        distribution (dict): probability of each outcome, e.g. from exact_distribution
+        shots (int): number of samples
+        seed (int): seed for numpy's random generator (optional)
+        memory (bool): also return the outcome of every shot
+    Returns:
+        counts (dict): number of shots per outcome, like Result.get_counts()
+        memory (list): outcome of every shot, only when memory is True
+    """
+    import numpy as np
+
+    with tracing.span('sample_distribution', shots=shots):
+        outcomes = list(distribution)
+        probabilities = np.fromiter(distribution.values(), dtype=float, count=len(outcomes))
+        rng = np.random.default_rng(seed)
+        if memory:
+            drawn = rng.choice(len(outcomes), size=shots, p=probabilities / probabilities.sum())
+            shots_memory = [outcomes[i] for i in drawn]
+            counts = np.bincount(drawn, minlength=len(outcomes))
+        else:
+            counts = rng.multinomial(shots, probabilities / probabilities.sum())
+        counts = {outcome: int(count) for outcome, count in zip(outcomes, counts) if count}
+    return (counts, shots_memory) if memory else counts
+
+
+def _format_outcome(bits, circuit):
+    # Result.get_counts() writes each register with its highest bit first, last register first, space separated
+    words = []
+    start = 0
+    for register in circuit.cregs:
+        words.append(''.join(reversed(bits[start:start + register.size])))
+        start += register.size
+    if not words:
+        words = [''.join(reversed(bits))]
+    return ' '.join(reversed(words))
+
+
+class ResultCache:
+    """
+    Two-tier store of exact distributions keyed by circuit_key.
+
+    Args:
+        max_entries (int): most distributions kept in memory
+        max_bytes (int): approximate memory budget of the in-memory tier (None for no limit)
+        path (str): directory of the on-disk tier (optional); created if missing
+    """
+    def __init__(self, max_entries=1024, max_bytes=None, path=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.path = path
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _size(distribution):
+        return sys.getsizeof(distribution) + sum(sys.getsizeof(k) + sys.getsizeof(v)
+                                                 for k, v in distribution.items())
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.json')
+
+    def _store(self, key, distribution):
+        if key in self._entries:
+            self.bytes -= self._size(self._entries.pop(key))
+        self._entries[key] = distribution
+        self.bytes += self._size(distribution)
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or (self.max_bytes is not None and self.bytes > self.max_bytes)):
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= self._size(evicted)
+            self._stats['evictions'] += 1
+
+    def get(self, key):
+        """
+        Returns the cached distribution for a key, or None, counting a hit or a miss.
+        """
+        with self._lock:
+            distribution = self._entries.get(key)
+            if distribution is not None:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return distribution
+            if self.path is not None and os.path.exists(self._file(key)):
+                with open(self._file(key)) as f:
+                    distribution = json.load(f)
+                self._store(key, distribution)
+                self._stats['disk_hits'] += 1
+                return distribution
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key, distribution):
+        """
+        Stores a distribution in memory and, if the cache has a path, on disk.
+        """
+        with self._lock:
+            self._store(key, distribution)
+            if self.path is not None:
+                # write then rename, so a concurrent reader never sees a partial file
+                temporary = f'{self._file(key)}.{os.getpid()}.{threading.get_ident()}'
+                with open(temporary, 'w') as f:
+                    json.dump(distribution, f)
+                os.replace(temporary, self._file(key))
+
+    def distribution(self, circuit, **options):
+        """
+        Returns the exact distribution of a circuit, computing and storing it on a miss.
+
+        Args:
+            circuit (QuantumCircuit): circuit whose measurements all come at the end
+            **options: options that change the result, folded into the key
+        Returns:
+            distribution (dict): probability of each outcome, keyed like Result.get_counts()
+        """
+        with tracing.span('cache_lookup') as s:
+            key = circuit_key(circuit, **options)
+            distribution = self.get(key)
+            if s:
+                s.set(hit=distribution is not None)
+        if distribution is None:
+            with tracing.span('exact_distribution', qubits=circuit.num_qubits):
+                distribution = exact_distribution(circuit)
+            self.put(key, distribution)
+        return distribution
+
+    def sample(self, circuit, shots=1024, seed=None, memory=False, **options):
+        """
+        Draws shots from the cached distribution of a circuit.
+
+        Args:
+            circuit (QuantumCircuit): circuit whose measurements all come at the end
+            shots (int): number of samples
+            seed (int): seed for numpy's random generator (optional)
+            memory (bool): also return the outcome of every shot
+            **options: options that change the result, folded into the key
+        Returns:
+            counts (dict): number of shots per outcome, like Result.get_counts()
+            memory (list): outcome of every shot, only when memory is True
+        """
+        distribution = self.distribution(circuit, **options)
+        return sample_distribution(distribution, shots=shots, seed=seed, memory=memory)
+
+    def stats(self):
+        """
+        Reports how the cache was used.
+
+        Returns:
+            stats (dict): with keys
+                'hits' (int): lookups served from memory
+                'disk_hits' (int): lookups served from the on-disk tier
+                'misses' (int): lookups that had to simulate
+                'evictions' (int): entries dropped from memory to respect the limits
+                'hit_rate' (float): fraction of lookups served from either tier
+                'entries' (int): distributions held in memory
+                'bytes' (int): approximate size of the in-memory tier
+        """
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['disk_hits'] + self._stats['misses']
+            served = self._stats['hits'] + self._stats['disk_hits']
+            return dict(self._stats, hit_rate=served / lookups if lookups else 0.0,
+                        entries=len(self._entries), bytes=self.bytes)
+
+    def clear(self, disk=False):
+        """
+        Empties the in-memory tier and resets the counters; with disk=True also deletes the on-disk entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self._stats.update(hits=0, disk_hits=0, misses=0, evictions=0)
+            if disk and self.path is not None:
+                for name in os.listdir(self.path):
+                    if name.endswith('.json'):
+                        os.remove(os.path.join(self.path, name))
+
+
+_cache = ResultCache(path=os.environ.get('UQIC_RESULT_CACHE'))
+
+
+def configure(max_entries=1024, max_bytes=None, path=None):
+    """
+    Replaces the shared cache used by the module-level functions.
+
+    Args:
+        max_entries (int): most distributions kept in memory
+        max_bytes (int): approximate memory budget of the in-memory tier (None for no limit)
+        path (str): directory of the on-disk tier (optional)
+    Returns:
+        cache (ResultCache): the new shared cache
+    """
+    global _cache
+    _cache = ResultCache(max_entries=max_entries, max_bytes=max_bytes, path=path)
+    return _cache
+
+
+def get_cache():
+    """
+    Returns the shared ResultCache. Its on-disk tier defaults to the UQIC_RESULT_CACHE environment variable.
+    """
+    return _cache
+
+
+def distribution(circuit, **options):
+    """
+    Returns the exact distribution of a circuit from the shared cache. See ResultCache.distribution.
+    """
+    return _cache.distribution(circuit, **options)
+
+
+def sample(circuit, shots=1024, seed=None, memory=False, **options):
+    """
+    Draws shots for a circuit from the shared cache. See ResultCache.sample.
+    """
+    return _cache.sample(circuit, shots=shots, seed=seed, memory=memory, **options)
+
+
+def cache_stats():
+    """
+    Reports how the shared cache was used. See ResultCache.stats.
+    """
+    return _cache.stats()
@@ -1,14 +1,16 @@
-from qiskit import QuantumCircuit,QuantumRegister,ClassicalRegister
-from qiskit.primitives import Sampler
-from qiskit.circuit.library import QFT
+import backends
+import tracing
+from fractions import Fraction
+from math import gcd, lcm, pi
 
-def c_amod15(a):
+def amod15_circuit(a):
     """
-    Controlled multiplication by a mod 15.
+    Uncontrolled multiplication by a mod 15 on 4 qubits.
     This is hard-coded for simplicity.
     """
     if a not in [2,4,7,8,11,13]:
         raise ValueError("'a' must not have common factors with 15")
+    from qiskit import QuantumCircuit
     U = QuantumCircuit(4)
     if a in [2,13]:
         U.swap(2,3)
@@ -24,26 +26,302 @@ def c_amod15(a):
     if a in [7,11,13]:
         for q in range(4):
             U.x(q)
-    U = U.to_gate()
+    return U
+
+def c_amod15(a):
+    """
+    Controlled multiplication by a mod 15.
+    This is hard-coded for simplicity.
+    """
+    U = amod15_circuit(a).to_gate()
     U.name = f"{a} mod 15"
     c_U = U.control()
     return c_U
 
-def phase_estimation(
-        controlled_operation: QuantumCircuit,
-        psi_prep: QuantumCircuit,
-        precision: int
+def circuit_permutation(circuit):
+    """
+    Basis-state permutation implemented by a circuit of swap and x gates.
+    Args:
+        circuit: Circuit containing only swap and x gates
+    Returns:
+        list: perm such that the circuit maps |x> to |perm[x]>
+    """
+    perm = list(range(2**circuit.num_qubits))
+    for instruction in circuit.data:
+        qubits = [circuit.find_bit(q).index for q in instruction.qubits]
+        name = instruction.operation.name
+        for x, value in enumerate(perm):
+            if name == "x":
+                value ^= 1 << qubits[0]
+            elif name == "swap":
+                i, j = qubits
+                if ((value >> i) & 1) != ((value >> j) & 1):
+                    value ^= (1 << i) | (1 << j)
+            else:
+                raise ValueError(f"Cannot read a permutation from '{name}' gates")
+            perm[x] = value
+    return perm
+
+def controlled_permutation_gate(perm, num_qubits, name=None):
+    """
+    Gate applying a basis-state permutation to num_qubits target qubits,
+    controlled by one extra qubit (qubit 0 of the gate).
+
+    The permutation is split into transpositions. Each transposition of
+    |u> and |v> is one multi-controlled X between two fans of CX gates,
+    so no unitary matrix is ever built.
+    Args:
+        perm: perm[x] is the image of basis state x (length 2**num_qubits)
+        num_qubits: Number of target qubits
+        name: Name of the returned gate
+    Returns:
+        Gate: Controlled permutation on 1 + num_qubits qubits
+    """
+    from qiskit import QuantumCircuit
+
+    qc = QuantumCircuit(1 + num_qubits, name=name)
+    seen = [False] * len(perm)
+    for start in range(len(perm)):
+        if seen[start]:
+            continue
+        cycle = [start]
+        seen[start] = True
+        while not seen[perm[cycle[-1]]]:
+            cycle.append(perm[cycle[-1]])
+            seen[cycle[-1]] = True
+        # x0 -> x1 -> ... -> x0 is the transpositions (x0 x1), (x0 x2), ...
+        for other in cycle[1:]:
+            _controlled_transposition(qc, cycle[0], other, num_qubits)
+    return qc.to_gate()
+
+def _controlled_transposition(qc, u, v, num_qubits):
+    from qiskit.circuit.library import MCXGate
+
+    differing = [i for i in range(num_qubits) if ((u ^ v) >> i) & 1]
+    t = differing[0]
+    # make u and v differ only in bit t
+    for i in differing[1:]:
+        qc.cx(1 + t, 1 + i)
+    u_reduced = u
+    if (u >> t) & 1:
+        for i in differing[1:]:
+            u_reduced ^= 1 << i
+    controls = [0] + [1 + i for i in range(num_qubits) if i != t]
+    ctrl_state = 1
+    for position, i in enumerate(i for i in range(num_qubits) if i != t):
+        ctrl_state |= ((u_reduced >> i) & 1) << (position + 1)
+    qc.append(MCXGate(len(controls), ctrl_state=ctrl_state), controls + [1 + t])
+    for i in differing[1:]:
+        qc.cx(1 + t, 1 + i)
+
+_power_gates = {}
+
+def c_amod15_power(a, power):
+    """
+    Controlled U^(2^power), where U is multiplication by a mod 15.
+
+    The permutation of U is squared `power` times and turned into one
+    controlled gate, cached per (a, N, power).
+    Args:
+        a: Base, coprime to 15
+        power: Exponent k of U^(2^k)
+    Returns:
+        Gate: Controlled U^(2^power) on 5 qubits (control first)
+    """
+    key = (a, 15, power)
+    if key not in _power_gates:
+        perm = circuit_permutation(amod15_circuit(a))
+        for _ in range(power):
+            perm = [perm[x] for x in perm]
+        _power_gates[key] = controlled_permutation_gate(
+            perm, 4, name=f"{a}^(2^{power}) mod 15")
+    return _power_gates[key]
+
+def c_amod15_powers(a):
+    """
+    Source of controlled powers for phase_estimation, see c_amod15_power.
+    """
+    from functools import partial
+    return partial(c_amod15_power, a)
+
+def modmul_permutation(a, N, num_qubits=None):
+    """
+    Index permutation of multiplication by a mod N on a work register.
+    Args:
+        a: Multiplier, coprime to N
+        N: Modulus
+        num_qubits: Size of the work register (defaults to N.bit_length())
+    Returns:
+        numpy.ndarray: perm with perm[x] = a*x mod N for x < N and
+                       perm[x] = x for the unused states N <= x < 2**num_qubits
+    """
+    import numpy as np
+
+    if gcd(a, N) != 1:
+        raise ValueError(f"'a' must not have common factors with {N}")
+    num_qubits = num_qubits or N.bit_length()
+    perm = np.arange(2**num_qubits, dtype=np.int64)
+    perm[:N] = (a * perm[:N]) % N
+    return perm
+
+def controlled_modmul_power(a, N, power):
+    """
+    Controlled U^(2^power), where U is multiplication by a mod N.
+
+    Drop-in replacement for c_amod15_power for any coprime a and N. The
+    gate is synthesised from the permutation of a^(2^power) mod N without
+    a dense unitary, but still needs O(N) multi-controlled X gates, so it
+    is meant for small N; use emulate_order_finding beyond that.
+    Args:
+        a: Base, coprime to N
+        N: Modulus
+        power: Exponent k of U^(2^k)
+    Returns:
+        Gate: Controlled U^(2^power) on 1 + N.bit_length() qubits
+    """
+    key = (a, N, power)
+    if key not in _power_gates:
+        perm = modmul_permutation(pow(a, 2**power, N), N)
+        _power_gates[key] = controlled_permutation_gate(
+            perm.tolist(), N.bit_length(), name=f"{a}^(2^{power}) mod {N}")
+    return _power_gates[key]
+
+def modmul_powers(a, N):
+    """
+    Source of controlled powers for phase_estimation, see controlled_modmul_power.
+    """
+    from functools import partial
+    return partial(controlled_modmul_power, a, N)
+
+def controlled_multiplication(a, N, repeated_squaring=True):
+    """
+    Default controlled operation for order finding of a mod N.
+    Args:
+        a: Base, coprime to N
+        N: Modulus
+        repeated_squaring: Return a source of controlled powers instead
+                           of the single controlled U
+    Returns:
+        The hard-coded mod 15 gates for N = 15, and the synthesised
+        modmul_powers / controlled_modmul_power gates for other N
+    """
+    if N == 15:
+        return c_amod15_powers(a) if repeated_squaring else c_amod15(a)
+    if repeated_squaring:
+        return modmul_powers(a, N)
+    return controlled_modmul_power(a, N, 0)
+
+def emulate_order_finding(a, N, precision):
+    """
+    Exact counting-register distribution of Shor's order finding, without a circuit.
+
+    After the controlled powers the state is sum_x |x>|a^x mod N>, so the
+    work register is stored as one value per counting basis state and each
+    controlled U^(2^k) is applied as an index permutation of those values.
+    The inverse QFT is then evaluated in closed form from the period r of
+    the stored values: with 2**precision = q*r + rem,
+        P(y) = (rem*F(q+1, ry/2^m) + (r-rem)*F(q, ry/2^m)) / 4^m,
+    where F(L, θ) = sin²(πLθ)/sin²(πθ).
+    Args:
+        a: Base, coprime to N
+        N: Modulus (up to about 2**20)
+        precision: Number of counting qubits m
+    Returns:
+        numpy.ndarray: probability of each outcome y, length 2**precision
+    Notes:
+        Time O(m*2^m + m*N) and memory O(2^m + N); see
+        benchmarks/shor_emulator.py.
+    """
+    import numpy as np
+
+    if gcd(a, N) != 1:
+        raise ValueError(f"'a' must not have common factors with {N}")
+
+    size = 2**precision
+    x = np.arange(size, dtype=np.int64)
+    values = np.ones(size, dtype=np.int64)
+    for k in range(precision):
+        perm = modmul_permutation(pow(a, 2**k, N), N)
+        controlled = ((x >> k) & 1).astype(bool)
+        values[controlled] = perm[values[controlled]]
+
+    repeats = np.flatnonzero(values[1:] == 1)
+    if len(repeats) == 0:
+        # every counting state holds a different work value
+        return np.full(size, 1 / size)
+    r = int(repeats[0]) + 1
+
+    q, rem = divmod(size, r)
+    # reduce phases mod 1 with integer arithmetic before taking sines
+    ry = (r * np.arange(size, dtype=np.int64)) % size
+    denominator = np.sin(np.pi * ry / size)**2
+    aligned = ry == 0
+
+    def fejer(length):
+        numerator = np.sin(np.pi * ((length * ry) % size) / size)**2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(aligned, float(length)**2, numerator / denominator)
+
+    probabilities = (rem * fejer(q + 1) + (r - rem) * fejer(q)) / size**2
+    return probabilities
+
+def sample_order_finding(a, N, precision, shots, seed=None, probabilities=None):
+    """
+    Draw measured outcomes of order finding from emulate_order_finding.
+    Args:
+        probabilities: Result of emulate_order_finding to reuse (optional)
+        seed: Seed or numpy Generator to draw with (optional)
+    Returns:
+        dict: measured integer y -> number of shots
+    """
+    import numpy as np
+
+    if probabilities is None:
+        probabilities = emulate_order_finding(a, N, precision)
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(shots, probabilities / probabilities.sum())
+    return {int(y): int(counts[y]) for y in np.flatnonzero(counts)}
+
+def _controlled_power(qc, controlled_operation, index, control, target):
+    # appends controlled U^(2^index), from a callable or by repeating U
+    if callable(controlled_operation):
+        with tracing.span('controlled_power', power=2**index):
+            powers = [controlled_operation(index)]
+    else:
+        powers = [controlled_operation] * 2**index
+    with tracing.span('compose', counting_qubit=index, operations=len(powers)):
+        for operation in powers:
+            qc.compose(
+                operation,
+                qubits=[control] + list(target),
+                inplace=True
+            )
+
+def phase_estimation_circuit(
+        controlled_operation,
+        psi_prep: "QuantumCircuit",
+        precision: int,
+        approximation_degree=0
     ):
     """
-    Carry out phase estimation on a simulator.
+    Build the phase estimation circuit.
     Args:
         controlled_operation: The operation to perform phase estimation on,
-                              controlled by one qubit.
+                              controlled by one qubit. Either a gate, which
+                              is repeated 2**k times for counting qubit k, or
+                              a callable returning controlled U^(2^k) for k,
+                              which is applied once per counting qubit.
         psi_prep: Circuit to prepare |ψ>
         precision: Number of counting qubits to use
+        approximation_degree: Number of the smallest inverse QFT rotation
+                              angles to drop, or 'auto' to pick it from
+                              precision (see approximate_qft)
     Returns:
-        float: Best guess for phase of U|ψ>
+        QuantumCircuit: Circuit measuring the counting register
     """
+    import approximate_qft
+    from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
+
     control_register = QuantumRegister(precision)
     output_register = ClassicalRegister(precision)
     
@@ -58,52 +336,374 @@ def phase_estimation(
     # Do phase estimation
     for index, qubit in enumerate(control_register):
         qc.h(qubit)
-        for _ in range(2**index):
-            qc.compose(
-                controlled_operation,
-                qubits=[qubit] + list(target_register),
-                inplace=True
-            )
+        _controlled_power(qc, controlled_operation, index, qubit,
+                          target_register)
 
-    qc.compose(
-        QFT(precision, inverse=True),
-        qubits=control_register,
-        inplace=True
-    )
+    qft = approximate_qft.inverse_qft(precision, approximation_degree)
+    with tracing.span('compose', operations=1):
+        qc.compose(
+            qft,
+            qubits=control_register,
+            inplace=True
+        )
 
     qc.measure(control_register, output_register)
-    
-    measurement = Sampler().run(qc, shots=1).result().quasi_dists[0].popitem()[0]
+    return qc
+
+def phase_estimation(
+        controlled_operation,
+        psi_prep: "QuantumCircuit",
+        precision: int,
+        approximation_degree=0
+    ):
+    """
+    Carry out phase estimation on a simulator.
+    Args:
+        controlled_operation: The operation to perform phase estimation on,
+                              controlled by one qubit, or a callable giving
+                              its controlled 2**k-th powers (see
+                              phase_estimation_circuit).
+        psi_prep: Circuit to prepare |ψ>
+        precision: Number of counting qubits to use
+        approximation_degree: Number of the smallest inverse QFT rotation
+                              angles to drop, or 'auto'
+    Returns:
+        float: Best guess for phase of U|ψ>
+    """
+    with tracing.span('phase_estimation', precision=precision):
+        with tracing.span('construct') as s:
+            qc = phase_estimation_circuit(controlled_operation, psi_prep,
+                                          precision, approximation_degree)
+            s.set_circuit(qc)
+
+        result = backends.sample(qc, shots=1)
+        with tracing.span('parse_quasi_dists'):
+            measurement = result.quasi_dists[0].popitem()[0]
     return measurement / 2**precision
 
 
 
-psi_prep = QuantumCircuit(4)
-psi_prep.x(0)
+def iterative_phase_estimation_circuit(
+        controlled_operation,
+        psi_prep: "QuantumCircuit",
+        precision: int,
+        approximation_degree=0
+    ):
+    """
+    Build the iterative (semi-classical) phase estimation circuit.
 
-from fractions import Fraction
-from math import gcd
+    One control qubit is measured and reset once per bit, least significant
+    bit first. Each round applies controlled U^(2^(precision-1-bit)) and
+    then, for every bit already measured as 1, a phase correction
+    conditioned on its classical bit, which replaces the inverse QFT. The
+    circuit always uses psi_prep.num_qubits + 1 qubits.
+    Args:
+        controlled_operation: The operation to perform phase estimation on,
+                              controlled by one qubit, or a callable giving
+                              its controlled 2**k-th powers (see
+                              phase_estimation_circuit).
+        psi_prep: Circuit to prepare |ψ>
+        precision: Number of bits to estimate
+        approximation_degree: Drop the corrections the approximate inverse
+                              QFT of this degree drops, or 'auto'
+    Returns:
+        QuantumCircuit: Circuit writing bit k of the estimate to clbit k, so
+                        its counts read like those of phase_estimation_circuit
+    """
+    import approximate_qft
+    from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister
 
-a = 8
-N = 15
+    degree = approximate_qft.resolve_degree(approximation_degree, precision)
 
-FACTOR_FOUND = False
-ATTEMPT = 0
-while not FACTOR_FOUND:
-    ATTEMPT += 1
-    print(f"\nAttempt {ATTEMPT}")
-    
-    phase = phase_estimation(
-        c_amod15(a),
-        psi_prep,
-        precision=8
-    )
+    control = QuantumRegister(1, 'control')
+    target_register = QuantumRegister(psi_prep.num_qubits, 'target')
+    output_register = ClassicalRegister(precision, 'output')
+    qc = QuantumCircuit(control, target_register, output_register)
+
+    qc.compose(psi_prep,
+               qubits=target_register,
+               inplace=True)
+
+    for bit in range(precision):
+        if bit:
+            qc.reset(control)
+        qc.h(control)
+        _controlled_power(qc, controlled_operation, precision - 1 - bit,
+                          control[0], target_register)
+        # remove the phase of the bits measured so far
+        for earlier in range(max(0, bit - (precision - 1 - degree)), bit):
+            qc.p(-2*pi / 2**(bit - earlier + 1),
+                 control).c_if(output_register[earlier], 1)
+        qc.h(control)
+        qc.measure(control, output_register[bit])
+    return qc
+
+def iterative_phase_estimation(
+        controlled_operation,
+        psi_prep: "QuantumCircuit",
+        precision: int,
+        approximation_degree=0
+    ):
+    """
+    Carry out iterative phase estimation on a simulator, with one control
+    qubit however large precision is.
+    Args:
+        controlled_operation: The operation to perform phase estimation on,
+                              controlled by one qubit, or a callable giving
+                              its controlled 2**k-th powers
+        psi_prep: Circuit to prepare |ψ>
+        precision: Number of bits to estimate
+        approximation_degree: Number of the smallest correction angles to
+                              drop, or 'auto'
+    Returns:
+        float: Best guess for phase of U|ψ>
+    """
+    with tracing.span('iterative_phase_estimation', precision=precision):
+        with tracing.span('construct') as s:
+            qc = iterative_phase_estimation_circuit(controlled_operation,
+                                                    psi_prep, precision,
+                                                    approximation_degree)
+            s.set_circuit(qc)
+
+        result = backends.run(qc, shots=1)
+        with tracing.span('parse_counts'):
+            measurement = int(next(iter(result.get_counts())), 2)
+    return measurement / 2**precision
+
+
+def factor_from_phase(phase, a, N):
+    """
+    Classical post-processing of one phase estimate.
+    Args:
+        phase: Estimated phase s/r of multiplication by a mod N
+        a: Base whose order is being estimated
+        N: Number to factor
+    Returns:
+        tuple: (r, guess) where r is the denominator found by continued
+               fractions and guess is a non-trivial factor of N, or None
+    """
     frac = Fraction(phase).limit_denominator(N)
     r = frac.denominator
     if phase != 0:
-        # Guess for a factor is gcd(x^{r/2} - 1 , 15)
+        # Guess for a factor is gcd(x^{r/2} - 1 , N)
         guess = gcd(a**(r//2)-1, N)
         if guess not in [1,N] and (N % guess) == 0:
+            return r, guess
+    return r, None
+
+
+def order_candidates(outcomes, precision, a, N):
+    """
+    Continued-fraction post-processing of many measured outcomes at once.
+    Args:
+        outcomes: Distinct measured integers y of the counting register
+        precision: Number of counting qubits used
+        a: Base whose order is being estimated
+        N: Modulus
+    Returns:
+        tuple: (order, denominators) where denominators is the set of
+               candidate denominators r of y/2**precision ~ s/r and order
+               is the smallest r with a^r ≡ 1 (mod N) among them and
+               their LCM, or None
+    """
+    denominators = {
+        Fraction(y, 2**precision).limit_denominator(N).denominator
+        for y in outcomes if y != 0
+    }
+    for r in sorted(denominators):
+        if pow(a, r, N) == 1:
+            return r, denominators
+
+    # Each s/r may be reduced, so the order is a multiple of every
+    # denominator; their LCM recovers it once enough shots are seen
+    combined = lcm(*denominators) if denominators else 1
+    if combined > 1 and pow(a, combined, N) == 1:
+        # strip prime factors that are not needed for a^r ≡ 1 (mod N)
+        order = combined
+        for p in _prime_factors(denominators):
+            while order % p == 0 and pow(a, order // p, N) == 1:
+                order //= p
+        return order, denominators
+    return None, denominators
+
+def _prime_factors(numbers):
+    primes = set()
+    for n in numbers:
+        p = 2
+        while p * p <= n:
+            while n % p == 0:
+                primes.add(p)
+                n //= p
+            p += 1
+        if n > 1:
+            primes.add(n)
+    return sorted(primes)
+
+@tracing.traced()
+def find_order(a, N=15, precision=8, shots=64, controlled_operation=None,
+               psi_prep=None, max_executions=10, emulate=False,
+               iterative=False, approximation_degree=0):
+    """
+    Find the order of a mod N from many shots of one phase estimation job.
+    Args:
+        a: Base whose order is being estimated
+        N: Modulus
+        precision: Number of counting qubits to use
+        shots: Shots per simulator job
+        controlled_operation: Controlled U or source of controlled powers
+                              (defaults to controlled_multiplication(a, N))
+        psi_prep: Circuit to prepare |1> on the work register (defaults
+                  to N.bit_length() qubits with the first one flipped)
+        max_executions: Number of jobs to run before giving up
+        emulate: Sample from emulate_order_finding instead of simulating
+                 a circuit, which works for any coprime a and N
+        iterative: Use the single-control-qubit circuit of
+                   iterative_phase_estimation_circuit, which runs on Aer
+        approximation_degree: Number of the smallest inverse QFT rotation
+                              angles to drop, or 'auto' (ignored when
+                              emulating)
+    Returns:
+        dict: 'order' (int or None), 'executions' (jobs run),
+              'shots' (total shots), 'distinct_outcomes' (int) and
+              'denominators' (set of candidate denominators)
+    """
+    if emulate:
+        import numpy as np
+
+        with tracing.span('emulate_order_finding', N=N, precision=precision):
+            probabilities = emulate_order_finding(a, N, precision)
+        rng = np.random.default_rng()
+    else:
+        from qiskit import QuantumCircuit
+
+        if controlled_operation is None:
+            controlled_operation = controlled_multiplication(a, N)
+        if psi_prep is None:
+            psi_prep = QuantumCircuit(N.bit_length())
+            psi_prep.x(0)
+
+        build = (iterative_phase_estimation_circuit if iterative
+                 else phase_estimation_circuit)
+        with tracing.span('construct', precision=precision) as s:
+            qc = build(controlled_operation, psi_prep, precision,
+                       approximation_degree)
+            s.set_circuit(qc)
+
+    outcomes = set()
+    order = None
+    executions = 0
+    while order is None and executions < max_executions:
+        executions += 1
+        if emulate:
+            distribution = sample_order_finding(a, N, precision, shots,
+                                                rng, probabilities)
+        elif iterative:
+            # mid-circuit measurements need Aer rather than the Sampler
+            result = backends.run(qc, shots=shots)
+            with tracing.span('parse_counts'):
+                distribution = {int(y, 2): count for y, count
+                                in result.get_counts().items()}
+        else:
+            result = backends.sample(qc, shots=shots)
+            with tracing.span('parse_quasi_dists'):
+                distribution = result.quasi_dists[0]
+        outcomes.update(distribution)
+        with tracing.span('order_candidates', outcomes=len(outcomes)):
+            order, denominators = order_candidates(outcomes, precision, a,
+                                                   N)
+
+    return {
+        'order': order,
+        'executions': executions,
+        'shots': executions * shots,
+        'distinct_outcomes': len(outcomes),
+        'denominators': denominators,
+    }
+
+def factor_from_order(r, a, N):
+    """
+    Classical post-processing of an order.
+    Args:
+        r: Order of a mod N
+        a: Base
+        N: Number to factor
+    Returns:
+        int: Non-trivial factor of N, or None if r is odd or the
+             guesses gcd(a^(r/2) ± 1, N) are trivial
+    """
+    if r is None or r % 2:
+        return None
+    for guess in (gcd(pow(a, r//2, N) - 1, N), gcd(pow(a, r//2, N) + 1, N)):
+        if guess not in [1,N]:
+            return guess
+    return None
+
+
+def factor(a=8, N=15, precision=8, verbose=True, repeated_squaring=True, shots=1,
+           iterative=False, approximation_degree=0):
+    """
+    Repeats phase estimation of multiplication by a mod N until a factor is found.
+    Args:
+        a: Base to use, coprime to N
+        N: Number to factor (other values than 15 use the synthesised gates
+           of controlled_multiplication, which are meant for small N)
+        precision: Number of counting qubits to use
+        verbose: Print progress if True
+        repeated_squaring: Use one cached U^(2^k) gate per counting qubit
+                           instead of 2^k copies of U
+        shots: If greater than 1, find the order from this many shots per
+               job with find_order instead of retrying single shots
+        iterative: Estimate the phase with one reused control qubit
+                   instead of a counting register and inverse QFT
+        approximation_degree: Number of the smallest inverse QFT rotation
+                              angles to drop, or 'auto'
+    Returns:
+        int: Non-trivial factor of N (None if the order of a gives none)
+    """
+    from qiskit import QuantumCircuit
+
+    if shots > 1:
+        result = find_order(
+            a, N, precision, shots,
+            controlled_operation=controlled_multiplication(
+                a, N, repeated_squaring),
+            iterative=iterative,
+            approximation_degree=approximation_degree
+        )
+        guess = factor_from_order(result['order'], a, N)
+        if verbose:
+            print(f"Order {result['order']} found with {result['executions']} "
+                  f"job(s), {result['shots']} shots, "
+                  f"{result['distinct_outcomes']} distinct outcomes")
+            if guess is not None:
+                print(f"Non-trivial factor found: {guess}")
+        return guess
+
+    psi_prep = QuantumCircuit(N.bit_length())
+    psi_prep.x(0)
+    controlled_operation = controlled_multiplication(a, N, repeated_squaring)
+
+    ATTEMPT = 0
+    while True:
+        ATTEMPT += 1
+        if verbose:
+            print(f"\nAttempt {ATTEMPT}")
+
+        estimate = (iterative_phase_estimation if iterative
+                    else phase_estimation)
+        phase = estimate(
+            controlled_operation,
+            psi_prep,
+            precision=precision,
+            approximation_degree=approximation_degree
+        )
+        r, guess = factor_from_phase(phase, a, N)
+        if guess is not None:
             # Guess is a factor!
-            print(f"Non-trivial factor found: {guess}")
-            FACTOR_FOUND = True
\ No newline at end of file
+            if verbose:
+                print(f"Non-trivial factor found: {guess}")
+            return guess
+
+
+if __name__ == "__main__":
+    factor(shots=64)
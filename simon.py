@@ -1,6 +1,5 @@
-from qiskit import QuantumCircuit
-from qiskit_aer import AerSimulator
-from qiskit.visualization import plot_histogram
+import backends
+import tracing
 
 def simon_oracle(string):
     """
@@ -14,13 +13,19 @@ def simon_oracle(string):
     Raises:
         TypeError: if string is not a string
         ValueError: if string is not binary
+    Notes:
+        -the copy of s is controlled on the first input qubit i with s_i=1, so that x and x XOR s agree on
+         whether it is applied; with a leading '0' in s, qubit 0 would not do
     """
     if not isinstance(string,str):
         raise TypeError('Input must be a valid binary string')
     if any(i not in ['0','1'] for i in string):
         raise ValueError('Input must be a valid binary string')
+
+    from qiskit import QuantumCircuit
     
     n=len(string)
+    control=string.find('1')
 
     oracle=QuantumCircuit(2*n)
     for i in range(n):
@@ -28,29 +33,29 @@ def simon_oracle(string):
     oracle.barrier()
     for i in range(n):
         if string[i]=='1':
-            oracle.cx(0,n+i)
+            oracle.cx(control,n+i)
     
     return oracle
 
 
-def simon_algorithm(string):
+def simon_circuit(string):
     """
-    Runs simon's algorithm using a given string.
+    Builds the circuit for simon's algorithm using a given string.
 
     Args:
         string (str): binary string s for oracle function
     Returns:
-        strings (list): list of strings y that satisfy y.s=0, where a.b is the binary dot product
+        qc (QuantumCircuit): circuit measuring the n input qubits after the oracle
     Raises:
         TypeError: if string is not a string
         ValueError: if string is not binary
-    Notes:
-        -classical post-processing is still required to find s
     """
     if not isinstance(string,str):
         raise TypeError('Input must be a valid binary string')
     if any(i not in ['0','1'] for i in string):
         raise ValueError('Input must be a valid binary string')
+
+    from qiskit import QuantumCircuit
     
     n=len(string)
     qc=QuantumCircuit(2*n,n)
@@ -60,18 +65,186 @@ def simon_algorithm(string):
     qc.barrier()
 
     oracle=simon_oracle(string)
-    qc=qc.compose(oracle)
+    with tracing.span('compose',gates=len(oracle.data)):
+        qc=qc.compose(oracle)
     qc.barrier()
 
     for i in range(n):
         qc.h(i)
         qc.measure(i,i)
 
-    sim=AerSimulator()
-    results=sim.run(qc).result().get_counts()
+    return qc
+
 
-    strings=[i for i in results]
+def simon_algorithm(string):
+    """
+    Runs simon's algorithm using a given string.
+
+    Args:
+        string (str): binary string s for oracle function
+    Returns:
+        strings (list): list of strings y that satisfy y.s=0, where a.b is the binary dot product
+    Raises:
+        TypeError: if string is not a string
+        ValueError: if string is not binary
+    Notes:
+        -classical post-processing is still required to find s; simon_solve does it online
+    """
+    with tracing.span('simon',n=len(string)):
+        with tracing.span('construct') as s:
+            qc=simon_circuit(string)
+            s.set_circuit(qc)
+
+        result=backends.run(qc)
+        with tracing.span('parse_counts'):
+            results=result.get_counts()
+
+        strings=[i for i in results]
     
     return strings
 
-print(simon_algorithm('101'))
+
+class GF2Basis:
+    """
+    Row-reduced basis of a subspace of {0,1}^n, updated one vector at a time.
+
+    Vectors are packed into Python ints (bit i is coordinate i). The basis is kept in reduced row-echelon form, with
+    each row stored under its pivot (highest set bit) and no other row having that bit set, so memory is linear in
+    the rank and each update costs O(rank) word operations.
+
+    Args:
+        n (int): number of coordinates
+    """
+    def __init__(self,n):
+        self.n=n
+        self.rows={}
+
+    @property
+    def rank(self):
+        return len(self.rows)
+
+    def reduce(self,y):
+        """
+        Returns y with every pivot bit of the basis cleared.
+        """
+        for pivot,row in self.rows.items():
+            if (y>>pivot)&1:
+                y^=row
+        return y
+
+    def add(self,y):
+        """
+        Adds a vector to the span. Returns True if it increased the rank.
+        """
+        y=self.reduce(y)
+        if not y:
+            return False
+        pivot=y.bit_length()-1
+        for other,row in self.rows.items():
+            if (row>>pivot)&1:
+                self.rows[other]=row^y
+        self.rows[pivot]=y
+        return True
+
+    def null_vector(self):
+        """
+        Returns the non-zero vector s with y.s=0 for every y in the span, if the rank is n-1, and None otherwise.
+        """
+        if self.rank!=self.n-1:
+            return None
+        free=next(i for i in range(self.n) if i not in self.rows)
+        s=1<<free
+        for pivot,row in self.rows.items():
+            #row.s = s_pivot + row_free*s_free = 0
+            if (row>>free)&1:
+                s|=1<<pivot
+        return s
+
+
+def _evaluate_oracle(oracle,n,x):
+    """
+    Classically evaluates an oracle made of CX gates on input x (packed into an int). Returns f(x) as an int.
+    """
+    bits=x
+    for instruction in oracle.data:
+        if instruction.operation.name=='barrier':
+            continue
+        control,target=[oracle.find_bit(q).index for q in instruction.qubits]
+        if (bits>>control)&1:
+            bits^=1<<target
+    return bits>>n
+
+
+def simon_solve(string,batch=None,max_samples=None,sampler=None):
+    """
+    Runs simon's algorithm until s is determined, feeding each measured y into an online GF(2) solver.
+
+    Args:
+        string (str): binary string s for oracle function
+        batch (int): shots requested from the backend per job (defaults to n)
+        max_samples (int): give up after this many samples (defaults to 20*n)
+        sampler (callable): sampler(circuit, shots) returning measured y values as ints, bit i being qubit i
+                            (defaults to backends.run with memory=True)
+    Returns:
+        result (dict): with keys
+            's' (str): hidden string, in the same qubit order as the input string (None if not found)
+            'samples' (int): measurements fed to the solver
+            'shots' (int): measurements drawn from the backend
+            'jobs' (int): backend jobs run
+            'expected_samples' (float): expected samples to reach rank n-1 for a non-zero s
+    Raises:
+        TypeError: if string is not a string
+        ValueError: if string is not binary
+    Notes:
+        -once the rank reaches n-1 the candidate s is checked with two classical queries f(0) and f(s); if they
+         differ, s is zero and sampling continues until the rank reaches n
+    """
+    qc=simon_circuit(string)
+    n=len(string)
+    batch=batch or n
+    max_samples=max_samples or 20*n
+
+    if sampler is None:
+        def sampler(circuit,shots):
+            result=backends.run(circuit,shots=shots,memory=True)
+            with tracing.span('parse_memory',shots=shots):
+                return [int(y,2) for y in result.get_memory()]
+
+    oracle=simon_oracle(string)
+    basis=GF2Basis(n)
+    samples=shots=jobs=0
+
+    def determined():
+        if basis.rank==n-1:
+            candidate=basis.null_vector()
+            if _evaluate_oracle(oracle,n,0)==_evaluate_oracle(oracle,n,candidate):
+                return candidate
+        elif basis.rank==n:
+            return 0
+        return None
+
+    s=determined()
+    while s is None and samples<max_samples:
+        measured=sampler(qc,batch)
+        jobs+=1
+        shots+=len(measured)
+        with tracing.span('gf2_solve',samples=len(measured)):
+            for y in measured:
+                samples+=1
+                if basis.add(y):
+                    s=determined()
+                if s is not None or samples>=max_samples:
+                    break
+
+    expected=sum(1/(1-2.0**(k-(n-1))) for k in range(n-1))
+    return {
+        's':None if s is None else ''.join(str((s>>i)&1) for i in range(n)),
+        'samples':samples,
+        'shots':shots,
+        'jobs':jobs,
+        'expected_samples':expected,
+    }
+
+if __name__ == "__main__":
+    print(simon_algorithm('101'))
+
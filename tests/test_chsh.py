@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from uqic import load_script
+
+chsh = load_script('chsh')
+
+
+@pytest.mark.parametrize('function', ['chsh_game', 'winning_chance', 'strategy_distributions'])
+def test_strategy_must_be_string(function):
+    with pytest.raises(TypeError):
+        getattr(chsh, function)(1)
+    with pytest.raises(ValueError):
+        getattr(chsh, function)('telepathy')
+
+
+def test_parallel_strategies_must_be_strings():
+    with pytest.raises(TypeError):
+        chsh.parallel_winning_chance([None])
+
+
+@pytest.mark.parametrize('index', [-1, 17, 100])
+def test_angle_table_rejects_out_of_range_indices(index):
+    table = chsh.AngleTable(8)
+    with pytest.raises(IndexError):
+        table.row(index)
+    with pytest.raises(IndexError):
+        table.distribution(0, index)
+
+
+@pytest.mark.parametrize('index', [1.0, '3', None, True])
+def test_angle_table_rejects_non_integer_indices(index):
+    table = chsh.AngleTable(8)
+    with pytest.raises(TypeError):
+        table.row(index)
+    with pytest.raises(TypeError):
+        table.distribution(0, index)
+
+
+def test_angle_table_rows_match_fill():
+    table = chsh.AngleTable(4)
+    row = table.row(np.int64(len(table) - 1))
+    assert np.allclose(table.fill()[-1], row)
+    assert np.allclose(table.distribution(0, len(table) - 1), table.fill()[0, -1])
+    assert np.allclose(row.sum(axis=1), 1.0)
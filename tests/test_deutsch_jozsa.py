@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import backends
+from uqic import load_script
+
+dj = load_script('deutsch-jozsa')
+
+
+def _measure(oracle, n):
+    result = backends.run(dj.deutsch_jozsa_circuit(n, oracle), shots=1, memory=True)
+    return int(result.get_memory()[0], 2)
+
+
+def test_classify_oracles_matches_circuit():
+    n = 3
+    oracles = np.concatenate([
+        dj.random_oracles(6, n, seed=4),
+        # labels that disagree with the function must not change the answer
+        np.array([(dj.CONSTANT, 5, 1), (dj.BALANCED, 0, 0)], dtype=dj.oracle_dtype()),
+    ])
+    outcomes, balanced = dj.classify_oracles(oracles)
+    for oracle, outcome, is_balanced in zip(oracles, outcomes, balanced):
+        measured = _measure(oracle, n)
+        assert int(outcome) == measured
+        assert bool(is_balanced) == (measured != 0)
+
+
+def test_query_gate_keeps_promise():
+    from qiskit.quantum_info import Statevector
+
+    n = 3
+    for _ in range(20):
+        gate = dj.deutsch_jozsa_query_gate(n)
+        # f(x) is the output qubit of the basis state gate |x, 0> goes to
+        values = [Statevector.from_int(x, 2**(n + 1)).evolve(gate).probabilities_dict() for x in range(2**n)]
+        values = [int(next(iter(v))[0]) for v in values]
+        assert sum(values) in (0, 2**(n - 1), 2**n)
+
+
+@pytest.mark.parametrize('n', [1, 4])
+def test_evaluate_oracles_matches_truth(n):
+    oracles = dj.random_oracles(5, n, seed=n)
+    for oracle in oracles:
+        for x in range(2**n):
+            expected = (bin(int(oracle['mask']) & x).count('1') + int(oracle['constant'])) % 2
+            assert dj.evaluate_oracles(oracle, x) == expected
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+import microsim
+import result_cache
+from uqic import load_script
+
+
+def _distribution(program):
+    return dict(zip(program.labels, program.probabilities()))
+
+
+def _assert_exact(circuit):
+    program = microsim.get_program(circuit)
+    assert program is not None
+    expected = result_cache.exact_distribution(circuit)
+    actual = _distribution(program)
+    for label in set(expected) | set(actual):
+        assert actual.get(label, 0.0) == pytest.approx(expected.get(label, 0.0), abs=1e-12)
+
+
+def _random_circuit(num_qubits, depth, seed):
+    from qiskit import QuantumCircuit
+
+    rng = np.random.default_rng(seed)
+    qc = QuantumCircuit(num_qubits)
+    for _ in range(depth):
+        qubits = [int(q) for q in rng.permutation(num_qubits)]
+        gate = rng.integers([3, 5, 6][min(num_qubits, 3) - 1])
+        if gate == 0:
+            qc.h(qubits[0])
+        elif gate == 1:
+            qc.u(*rng.random(3) * 2 * np.pi, qubits[0])
+        elif gate == 2:
+            qc.ry(rng.random() * 2 * np.pi, qubits[0])
+        elif gate == 3:
+            qc.cx(qubits[0], qubits[1])
+        elif gate == 4:
+            qc.cp(rng.random() * 2 * np.pi, qubits[0], qubits[1])
+        else:
+            qc.ccx(qubits[0], qubits[1], qubits[2])
+    qc.measure_all()
+    return qc
+
+
+@pytest.mark.parametrize('num_qubits', range(1, microsim.MAX_QUBITS + 1))
+@pytest.mark.parametrize('seed', range(3))
+def test_random_circuits_match_statevector(num_qubits, seed):
+    _assert_exact(_random_circuit(num_qubits, 12, seed))
+
+
+@pytest.mark.parametrize('name,build', [
+    ('deutsch', lambda s: s.deutsch_circuit('3')),
+    ('superdense', lambda s: s.message_circuit('10')),
+    ('chsh', lambda s: s.quantum_strategy_circuit(1, 1)),
+    ('qpe-low-precision', lambda s: s.phase_estimation_circuit(0.3)),
+    ('qpe-2-qubits', lambda s: s.phase_estimation_circuit(0.3)),
+])
+def test_script_circuits_match_statevector(name, build):
+    _assert_exact(build(load_script(name)))
+
+
+def test_partial_measurement_matches_statevector():
+    from qiskit import QuantumCircuit
+
+    qc = QuantumCircuit(3, 2)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.ry(0.7, 2)
+    qc.measure(2, 0)
+    qc.measure(0, 1)
+    _assert_exact(qc)
+
+
+def test_in_place_edits_recompile():
+    from qiskit import QuantumCircuit
+    from qiskit.circuit import CircuitInstruction
+    from qiskit.circuit.library import XGate
+
+    qc = QuantumCircuit(1, 1)
+    qc.ry(0.0, 0)
+    qc.measure(0, 0)
+    assert _distribution(microsim.get_program(qc))['0'] == pytest.approx(1.0)
+
+    qc.data[0].operation.params[0] = np.pi
+    _assert_exact(qc)
+    assert _distribution(microsim.get_program(qc))['1'] == pytest.approx(1.0)
+
+    qc.data.insert(0, CircuitInstruction(XGate(), [qc.qubits[0]]))
+    _assert_exact(qc)
+    assert _distribution(microsim.get_program(qc))['0'] == pytest.approx(1.0)
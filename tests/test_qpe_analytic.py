@@ -0,0 +1,41 @@
+from fractions import Fraction
+
+import numpy as np
+import pytest
+
+from uqic import load_script
+
+qpe = load_script('qpe')
+
+
+@pytest.mark.parametrize('precision', range(1, 6))
+def test_distribution_matches_simulation(precision):
+    phis = np.random.default_rng(precision).random(10)
+    _, simulated = qpe.phase_estimation_sweep(phis, precision)
+    analytic = np.zeros_like(simulated)
+    for row, phi in zip(analytic, phis):
+        outcomes, probabilities = qpe.qpe_distribution(phi, precision)
+        row[outcomes] = probabilities
+    assert np.abs(analytic - simulated).max() <= 1e-9
+
+
+@pytest.mark.parametrize('precision', [63, 64, 100])
+@pytest.mark.parametrize('phi', [0.3, 0.9999, 0.5, 1e-30])
+def test_large_precision_is_exact(precision, phi):
+    size = 1 << precision
+    scaled = Fraction(phi) * size
+    outcomes, probabilities = qpe.qpe_distribution(phi, precision, window=8)
+    assert int(outcomes[probabilities.argmax()]) == round(scaled) % size
+    assert qpe.phase_estimation(phi, precision=precision, analytic=True) == (round(scaled) % size) / size
+    # the sampled outcomes are almost always within a few steps of phi * 2^m
+    for y in qpe.qpe_sample([phi], precision, shots=16, seed=3)[0]:
+        distance = abs(Fraction(int(y)) - scaled)
+        assert 0 <= int(y) < size and min(distance, size - distance) < 64
+
+
+@pytest.mark.parametrize('phis', [[], np.zeros(0), np.zeros((0, 3))])
+def test_sweep_of_no_phases(phis):
+    estimates, distributions = qpe.phase_estimation_sweep(phis, 4)
+    assert estimates.shape == (0,) and distributions.shape == (0, 16)
+    with pytest.raises(ValueError):
+        qpe.phase_estimation_sweep([], 16)
@@ -0,0 +1,59 @@
+import result_cache
+from uqic import load_script
+
+
+def _order_finding_circuit():
+    from qiskit import QuantumCircuit
+
+    shor = load_script('shor')
+    psi_prep = QuantumCircuit(4)
+    psi_prep.x(0)
+    # unnamed registers get a new automatic name on every build
+    return shor.phase_estimation_circuit(shor.c_amod15_powers(7), psi_prep, 4)
+
+
+def test_key_ignores_register_names():
+    first = _order_finding_circuit()
+    second = _order_finding_circuit()
+    assert first.cregs[0].name != second.cregs[0].name
+    assert result_cache.circuit_key(first) == result_cache.circuit_key(second)
+
+
+def test_key_ignores_names_in_conditions():
+    from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+
+    circuits = []
+    for name in ('a', 'b'):
+        bits = ClassicalRegister(2, name)
+        qc = QuantumCircuit(QuantumRegister(1), bits)
+        qc.measure(0, 0)
+        qc.x(0).c_if(bits[0], 1)
+        qc.x(0).c_if(bits, 2)
+        qc.measure(0, 1)
+        circuits.append(qc)
+    assert result_cache.circuit_key(circuits[0]) == result_cache.circuit_key(circuits[1])
+
+
+def test_key_depends_on_register_layout():
+    from qiskit import ClassicalRegister, QuantumCircuit
+
+    one = QuantumCircuit(2)
+    one.add_register(ClassicalRegister(2))
+    two = QuantumCircuit(2)
+    two.add_register(ClassicalRegister(1))
+    two.add_register(ClassicalRegister(1))
+    for qc in (one, two):
+        qc.h(0)
+        qc.measure([0, 1], [0, 1])
+    assert result_cache.circuit_key(one) != result_cache.circuit_key(two)
+
+
+def test_transpile_cache_hits_for_rebuilt_circuits():
+    import backends
+    import transpile_cache
+
+    cache = transpile_cache.TranspileCache()
+    simulator = backends.get_simulator()
+    cache.transpile(_order_finding_circuit(), simulator)
+    cache.transpile(_order_finding_circuit(), simulator)
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,35 @@
+import itertools
+
+import pytest
+
+from uqic import load_script
+
+simon = load_script('simon')
+
+
+def _strings(n):
+    return [''.join(bits) for bits in itertools.product('01', repeat=n)]
+
+
+@pytest.mark.parametrize('string', _strings(3) + ['0001', '0110', '00101'])
+def test_oracle_hides_string(string):
+    n = len(string)
+    oracle = simon.simon_oracle(string)
+    s = int(string[::-1], 2)
+    values = [simon._evaluate_oracle(oracle, n, x) for x in range(2**n)]
+    for x in range(2**n):
+        assert values[x] == values[x ^ s]
+    # two-to-one for non-zero s, one-to-one for s = 0
+    assert len(set(values)) == (2**n if s == 0 else 2**(n - 1))
+
+
+@pytest.mark.parametrize('string', ['011', '001', '010', '0101', '101'])
+def test_solve_with_leading_zero(string):
+    assert simon.simon_solve(string)['s'] == string
+
+
+@pytest.mark.parametrize('string', ['011', '0110'])
+def test_measured_strings_are_orthogonal(string):
+    for y in simon.simon_algorithm(string):
+        # counts keys are little-endian: the last character is qubit 0
+        assert sum(int(a) & int(b) for a, b in zip(y[::-1], string)) % 2 == 0
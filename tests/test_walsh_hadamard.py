@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from uqic import load_script
+
+dj = load_script('deutsch-jozsa')
+
+
+def _brute_force(values, n):
+    # P(y) = (2^-n sum_x (-1)^(f(x) + x.y))^2
+    x = np.arange(2**n)
+    signs = 1.0 - 2.0 * np.asarray(values)
+    parity = np.array([[bin(a & b).count('1') & 1 for b in x] for a in x])
+    amplitudes = (1.0 - 2.0 * parity) @ signs / 2**n
+    return amplitudes**2
+
+
+@pytest.mark.parametrize('n,block_bits,workers', [(1, 20, 1), (3, 20, 1), (8, 3, 1), (9, 4, None), (10, 5, 3)])
+def test_distribution_matches_brute_force(n, block_bits, workers):
+    values = np.random.default_rng(n).integers(0, 2, 2**n)
+    distribution = dj.walsh_hadamard_distribution(dj.pack_truth_table(values), n, block_bits=block_bits,
+                                                  workers=workers)
+    assert np.allclose(distribution, _brute_force(values, n), atol=1e-12)
+
+
+def test_distribution_from_files(tmp_path):
+    n = 10
+    values = np.random.default_rng(0).integers(0, 2, 2**n)
+    dj.pack_truth_table(values).tofile(tmp_path / 'table.bin')
+    distribution = dj.walsh_hadamard_distribution(str(tmp_path / 'table.bin'), n, out=str(tmp_path / 'out.bin'),
+                                                  block_bits=4)
+    assert np.allclose(distribution, _brute_force(values, n), atol=1e-12)
+
+
+def test_truth_table_answers_promise():
+    n = 6
+    constant = dj.pack_truth_table(np.ones(2**n))
+    balanced = dj.pack_truth_table(np.arange(2**n) & 1)
+    assert dj.deutsch_jozsa_truth_table(constant, n)[1] == 'Constant'
+    distribution, answer = dj.deutsch_jozsa_truth_table(balanced, n)
+    assert answer == 'Balanced' and distribution[1] == pytest.approx(1.0)
+
+
+def test_parity_without_bitwise_count(monkeypatch):
+    values = np.random.default_rng(1).integers(0, 2**63, 1000, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    expected = np.array([bin(int(v)).count('1') & 1 for v in values], dtype=np.uint8)
+    assert np.array_equal(dj._parity(values), expected)
+    monkeypatch.delattr(np, 'bitwise_count', raising=False)
+    assert np.array_equal(dj._parity(values), expected)
+
+
+def test_algorithm_returns_circuit():
+    from qiskit import QuantumCircuit
+
+    qc, answer = dj.deutsch_jozsa_alorgithm(3)
+    assert isinstance(qc, QuantumCircuit) and answer in ('Constant', 'Balanced')
@@ -0,0 +1,268 @@
+"""
+Lightweight tracing of the stages inside each algorithm.
+
+The scripts wrap their hot paths (circuit construction and compose calls, QFT construction, decomposition,
+simulator start-up, simulation and result parsing) in named spans:
+
+    import tracing
+    with tracing.span('construct', precision=m) as s:
+        qc = ...
+        s.set_circuit(qc)   # qubits, depth and size
+
+Tracing is off by default. span() then returns a shared do-nothing span whose methods do nothing (so the depth of a
+circuit is never computed) and which is falsy, so other costly attributes can be guarded with `if s:`. The whole
+call then costs about as much as a function call.
+
+enable() turns it on and returns a Recorder, which keeps finished spans and can export them:
+
+    recorder = tracing.enable()
+    deutsch_jozsa_alorgithm(8)
+    recorder.write_chrome_trace('trace.json')   # open in chrome://tracing or https://ui.perfetto.dev
+    print(recorder.summary())
+
+Any other sink can be plugged in with enable(sink): it is called with every finished Span.
+"""
+import functools
+import json
+import os
+import threading
+import time
+
+_lock = threading.Lock()
+_local = threading.local()
+_sinks = []
+_enabled = False
+
+
+class Span:
+    """
+    A named, timed stage with attributes, nested under the span that was open when it started on the same thread.
+
+    Attributes:
+        name (str): stage name
+        attributes (dict): values attached with span() or set()
+        start (float): perf_counter() when the span was entered
+        end (float): perf_counter() when it was exited (None while open)
+        parent (Span): enclosing span, or None
+        depth (int): nesting level, 0 for top-level spans
+        thread (int): identifier of the thread that ran it
+    """
+    __slots__ = ('name', 'attributes', 'start', 'end', 'parent', 'depth', 'thread')
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.start = None
+        self.end = None
+        self.parent = None
+        self.depth = 0
+        self.thread = threading.get_ident()
+
+    def __bool__(self):
+        return True
+
+    def set(self, **attributes):
+        """
+        Attaches attributes to the span.
+        """
+        self.attributes.update(attributes)
+
+    def set_circuit(self, circuit):
+        """
+        Attaches the qubit count, depth and gate count of a circuit to the span.
+        """
+        self.attributes.update(qubits=circuit.num_qubits, depth=circuit.depth(), size=circuit.size())
+
+    @property
+    def duration(self):
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def __enter__(self):
+        stack = getattr(_local, 'stack', None)
+        if stack is None:
+            stack = _local.stack = []
+        if stack:
+            self.parent = stack[-1]
+            self.depth = len(stack)
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.end = time.perf_counter()
+        if kind is not None:
+            self.attributes['error'] = kind.__name__
+        _local.stack.pop()
+        for sink in list(_sinks):
+            sink(self)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+    def set_circuit(self, circuit):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **attributes):
+    """
+    Returns a context manager timing a named stage while tracing is enabled.
+
+    Args:
+        name (str): stage name
+        **attributes: values to attach, e.g. qubits, depth or shots
+    Returns:
+        span (Span): the new span, or a falsy do-nothing span when tracing is disabled
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, attributes)
+
+
+def traced(name=None):
+    """
+    Decorator wrapping every call of a function in a span named after it (or name).
+    """
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with Span(label, {}):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enabled():
+    """
+    Returns True while at least one sink is receiving spans.
+    """
+    return _enabled
+
+
+def enable(sink=None):
+    """
+    Starts sending finished spans to a sink.
+
+    Args:
+        sink (callable): called with every finished Span (defaults to a new Recorder)
+    Returns:
+        sink (callable): the sink that was added, so it can be passed to disable()
+    """
+    global _enabled
+    sink = Recorder() if sink is None else sink
+    with _lock:
+        _sinks.append(sink)
+        _enabled = True
+    return sink
+
+
+def disable(sink=None):
+    """
+    Stops sending spans to a sink, or to every sink when none is given.
+    """
+    global _enabled
+    with _lock:
+        if sink is None:
+            _sinks.clear()
+        elif sink in _sinks:
+            _sinks.remove(sink)
+        _enabled = bool(_sinks)
+
+
+class Recorder:
+    """
+    Sink that keeps every finished span in memory, with Chrome trace export and a summary table.
+    """
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def __call__(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def chrome_trace(self):
+        """
+        Returns the recorded spans as a Chrome trace-event dictionary of complete ('X') events in microseconds.
+        """
+        pid = os.getpid()
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start):
+            events.append({
+                'name': span.name,
+                'ph': 'X',
+                'ts': (span.start - self._origin) * 1e6,
+                'dur': (span.end - span.start) * 1e6,
+                'pid': pid,
+                'tid': span.thread,
+                'args': {key: value if isinstance(value, (int, float, str, bool)) or value is None else repr(value)
+                         for key, value in span.attributes.items()},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        """
+        Writes the recorded spans to a Chrome trace-event JSON file.
+        """
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def totals(self):
+        """
+        Aggregates the recorded spans by name.
+
+        Returns:
+            totals (dict): for each name, a dict with 'count', 'total', 'self' (total minus time in child spans),
+                           'mean' and 'max', in seconds
+        """
+        children = {}
+        for span in self.spans:
+            if span.parent is not None:
+                children[id(span.parent)] = children.get(id(span.parent), 0.0) + span.end - span.start
+        totals = {}
+        for span in self.spans:
+            duration = span.end - span.start
+            entry = totals.setdefault(span.name, {'count': 0, 'total': 0.0, 'self': 0.0, 'max': 0.0})
+            entry['count'] += 1
+            entry['total'] += duration
+            entry['self'] += duration - children.get(id(span), 0.0)
+            entry['max'] = max(entry['max'], duration)
+        for entry in totals.values():
+            entry['mean'] = entry['total'] / entry['count']
+        return totals
+
+    def summary(self):
+        """
+        Returns a text table of the recorded spans by name, slowest total first.
+        """
+        totals = self.totals()
+        lines = [f"{'span':<28}{'count':>7}{'total ms':>11}{'self ms':>11}{'mean ms':>11}{'max ms':>11}"]
+        for name, entry in sorted(totals.items(), key=lambda item: -item[1]['total']):
+            lines.append(f"{name:<28}{entry['count']:>7}{entry['total'] * 1e3:>11.3f}{entry['self'] * 1e3:>11.3f}"
+                         f"{entry['mean'] * 1e3:>11.3f}{entry['max'] * 1e3:>11.3f}")
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
@@ -0,0 +1,231 @@
+"""
+Cache of transpiled circuits keyed by circuit structure and target backend.
+
+Most entry points run the same few circuit structures over and over, and transpiling them again each time dominates
+the latency of small circuits. transpile() looks the circuit up by its structural fingerprint (result_cache's
+circuit_key, in which unbound parameters appear by name) together with the backend and the transpile options, and
+only calls qiskit.transpile on a miss. Parameterized circuits are transpiled once with their parameters unbound, and
+values are bound to the cached result after the lookup:
+
+    import transpile_cache
+    compiled = transpile_cache.transpile(template, simulator, parameter_values={'theta': 0.3})
+    transpile_cache.cache_stats()   # {'hits': ..., 'misses': ..., 'seconds_saved': ..., ...}
+
+Transpiled circuits are kept in an in-memory LRU tier and, when the cache has a path, serialized as QPY files that
+survive restarts. The on-disk tier of the shared cache defaults to the UQIC_TRANSPILE_CACHE environment variable.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import tracing
+
+
+def fingerprint(circuit, backend, **transpile_options):
+    """
+    Returns the cache key of a circuit transpiled for a backend with the given options.
+
+    Args:
+        circuit (QuantumCircuit): circuit to transpile, with or without unbound parameters
+        backend (Backend): target backend
+        **transpile_options: options for qiskit.transpile, e.g. optimization_level
+    Returns:
+        key (str): hex digest
+    """
+    import result_cache
+
+    options = getattr(backend, 'options', None)
+    method = getattr(options, 'method', None)
+    return result_cache.circuit_key(circuit, backend=backend.name, method=method, **transpile_options)
+
+
+def bind_parameters(circuit, parameter_values):
+    """
+    Binds values to a circuit's parameters by name.
+
+    Circuits loaded from QPY have new Parameter objects, equal in name only to the caller's, so values are matched
+    by name rather than by object.
+
+    Args:
+        circuit (QuantumCircuit): circuit with unbound parameters
+        parameter_values (dict or list): values by Parameter or name, or in the order of circuit.parameters
+    Returns:
+        bound (QuantumCircuit): a new circuit, or circuit itself when parameter_values is None
+    """
+    if parameter_values is None:
+        return circuit
+    if isinstance(parameter_values, dict):
+        values = {getattr(name, 'name', name): value for name, value in parameter_values.items()}
+    else:
+        values = dict(zip((parameter.name for parameter in circuit.parameters), parameter_values))
+    return circuit.assign_parameters({parameter: values[parameter.name] for parameter in circuit.parameters},
+                                     inplace=False)
+
+
+class TranspileCache:
+    """
+    Two-tier store of transpiled circuits keyed by fingerprint.
+
+    Args:
+        max_entries (int): most transpiled circuits kept in memory
+        path (str): directory of the on-disk QPY tier (optional); created if missing
+    """
+    def __init__(self, max_entries=256, path=None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'transpile_seconds': 0.0,
+                       'seconds_saved': 0.0}
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _file(self, key):
+        return os.path.join(self.path, key + '.qpy')
+
+    def _store(self, key, circuit, seconds):
+        self._entries[key] = (circuit, seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _load(self, key):
+        from qiskit import qpy
+
+        with open(self._file(key), 'rb') as f:
+            circuit = qpy.load(f)[0]
+        return circuit, circuit.metadata.get('transpile_seconds', 0.0) if circuit.metadata else 0.0
+
+    def _save(self, key, circuit, seconds):
+        from qiskit import qpy
+
+        circuit.metadata = dict(circuit.metadata or {}, transpile_seconds=seconds)
+        temporary = f'{self._file(key)}.{os.getpid()}.{threading.get_ident()}'
+        with open(temporary, 'wb') as f:
+            qpy.dump(circuit, f)
+        os.replace(temporary, self._file(key))
+
+    def transpile(self, circuit, backend, parameter_values=None, **transpile_options):
+        """
+        Returns a circuit transpiled for a backend, transpiling it only if no equal structure was seen before.
+
+        Args:
+            circuit (QuantumCircuit): circuit to transpile, with or without unbound parameters
+            backend (Backend): target backend
+            parameter_values (dict or list): values to bind after the lookup, by Parameter or name, or in the order
+                                             of circuit.parameters (optional)
+            **transpile_options: options for qiskit.transpile, e.g. optimization_level
+        Returns:
+            compiled (QuantumCircuit): transpiled circuit. Without parameter_values, the cached object itself is
+                                       returned, so do not modify it
+        """
+        with tracing.span('transpile_lookup') as s:
+            key = fingerprint(circuit, backend, **transpile_options)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    self._stats['seconds_saved'] += entry[1]
+                elif self.path is not None and os.path.exists(self._file(key)):
+                    entry = self._load(key)
+                    self._store(key, *entry)
+                    self._stats['disk_hits'] += 1
+                    self._stats['seconds_saved'] += entry[1]
+            s.set(hit=entry is not None)
+
+        if entry is None:
+            from qiskit import transpile
+
+            with tracing.span('transpile', **transpile_options) as s:
+                start = time.perf_counter()
+                compiled = transpile(circuit, backend, **transpile_options)
+                seconds = time.perf_counter() - start
+                s.set_circuit(compiled)
+            entry = (compiled, seconds)
+            with self._lock:
+                self._stats['misses'] += 1
+                self._stats['transpile_seconds'] += seconds
+                self._store(key, compiled, seconds)
+                if self.path is not None:
+                    self._save(key, compiled, seconds)
+
+        with tracing.span('bind_parameters'):
+            return bind_parameters(entry[0], parameter_values)
+
+    def stats(self):
+        """
+        Reports how the cache was used.
+
+        Returns:
+            stats (dict): with keys
+                'hits' (int): lookups served from memory
+                'disk_hits' (int): lookups served from the on-disk tier
+                'misses' (int): lookups that had to transpile
+                'evictions' (int): entries dropped from memory to respect max_entries
+                'hit_rate' (float): fraction of lookups served from either tier
+                'entries' (int): transpiled circuits held in memory
+                'transpile_seconds' (float): time spent transpiling on misses
+                'seconds_saved' (float): transpile time the hits avoided, as measured on their misses
+        """
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['disk_hits'] + self._stats['misses']
+            served = self._stats['hits'] + self._stats['disk_hits']
+            return dict(self._stats, hit_rate=served / lookups if lookups else 0.0, entries=len(self._entries))
+
+    def clear(self, disk=False):
+        """
+        Empties the in-memory tier and resets the counters; with disk=True also deletes the on-disk entries.
+        """
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0 if isinstance(self._stats[name], int) else 0.0
+            if disk and self.path is not None:
+                for name in os.listdir(self.path):
+                    if name.endswith('.qpy'):
+                        os.remove(os.path.join(self.path, name))
+
+
+_cache = TranspileCache(path=os.environ.get('UQIC_TRANSPILE_CACHE'))
+
+
+def configure(max_entries=256, path=None):
+    """
+    Replaces the shared cache used by the module-level functions.
+
+    Args:
+        max_entries (int): most transpiled circuits kept in memory
+        path (str): directory of the on-disk QPY tier (optional)
+    Returns:
+        cache (TranspileCache): the new shared cache
+    """
+    global _cache
+    _cache = TranspileCache(max_entries=max_entries, path=path)
+    return _cache
+
+
+def get_cache():
+    """
+    Returns the shared TranspileCache.
+    """
+    return _cache
+
+
+def transpile(circuit, backend, parameter_values=None, **transpile_options):
+    """
+    Transpiles a circuit through the shared cache. See TranspileCache.transpile.
+    """
+    return _cache.transpile(circuit, backend, parameter_values=parameter_values, **transpile_options)
+
+
+def cache_stats():
+    """
+    Reports how the shared cache was used. See TranspileCache.stats.
+    """
+    return _cache.stats()
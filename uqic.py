@@ -0,0 +1,226 @@
+"""
+Command-line entry point for the algorithms in this repository.
+
+Run from the repository root, for example:
+
+    python -m uqic deutsch 2
+    python -m uqic deutsch-jozsa 4 --draw
+    python -m uqic simon 101
+    python -m uqic shor --a 7
+    python -m uqic shor --phase 0.75
+    python -m uqic shor --N 21 --a 2 --precision 6
+    python -m uqic chsh quantum --games 100000 --batched
+    python -m uqic superdense 10
+    python -m uqic qpe 0.3 --precision 8
+    python -m uqic qpe 0.3 --precision 40 --iterative
+    python -m uqic qpe 0.3 --precision 14 --approximation-degree auto
+    python -m uqic --trace trace.json simon 10110
+
+Only argparse is imported up front. Each subcommand loads its script when it runs, and the scripts import qiskit
+inside the functions that build or simulate circuits, so classical paths (the classical CHSH strategies, continued
+fraction post-processing of a phase, --help) never import qiskit.
+
+--trace FILE records the stages of the run with the tracing module, writes them to FILE as Chrome trace-event JSON
+and prints a summary table to stderr.
+"""
+import argparse
+import importlib.util
+import math
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+SCRIPTS = {
+    'deutsch': 'deutsch.py',
+    'deutsch-jozsa': 'deutsch-jozsa.py',
+    'simon': 'simon.py',
+    'shor': 'shor2.py',
+    'chsh': os.path.join('applications-of-entanglement', 'chsh-game.py'),
+    'superdense': os.path.join('applications-of-entanglement', 'superdense-coding.py'),
+    'qpe': os.path.join('phase-estimation', 'phase-estimation-general-case.py'),
+    'qpe-2-qubits': os.path.join('phase-estimation', 'phase-estimation-2-qubits.py'),
+    'qpe-low-precision': os.path.join('phase-estimation', 'phase-estimation-low-precision.py'),
+}
+
+
+def load_script(name):
+    """
+    Imports one of the repository's scripts as a module.
+
+    The scripts have hyphenated file names, so they cannot be imported with a plain import statement. The module is
+    registered in sys.modules under its name with hyphens replaced by underscores (e.g. 'chsh_game' for 'chsh'),
+    so functions defined in it can be pickled for worker processes.
+
+    Args:
+        name (str): key of SCRIPTS
+    Returns:
+        module (module): the loaded script
+    Raises:
+        ValueError: if name is not a known script
+    """
+    if name not in SCRIPTS:
+        raise ValueError(f"unknown script '{name}', expected one of {', '.join(SCRIPTS)}")
+    path = os.path.join(ROOT, SCRIPTS[name])
+    module_name = os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    if ROOT not in sys.path:
+        sys.path.append(ROOT)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[module_name]
+        raise
+    return module
+
+
+def _approximation_degree(text):
+    return text if text == 'auto' else int(text)
+
+
+def _deutsch(args):
+    print(load_script('deutsch').constant_or_balanced(args.function))
+
+
+def _deutsch_jozsa(args):
+    qc, outcome = load_script('deutsch-jozsa').deutsch_jozsa_alorgithm(args.n)
+    if args.draw:
+        print(qc.draw())
+    print(outcome)
+
+
+def _simon(args):
+    print(load_script('simon').simon_algorithm(args.string))
+
+
+# largest N the shor subcommand simulates; controlled_modmul_power needs O(N) gates on N.bit_length() + 1 qubits
+SHOR_MAX_N = 255
+
+
+def _check_shor(parser, args):
+    if args.N < 3:
+        parser.error('--N must be at least 3')
+    if not (1 < args.a < args.N):
+        parser.error(f'--a must be between 2 and {args.N - 1}')
+    if math.gcd(args.a, args.N) != 1:
+        parser.error(f'--a {args.a} shares the factor {math.gcd(args.a, args.N)} with --N {args.N}; '
+                     'pick a coprime base')
+    if args.phase is None and args.N > SHOR_MAX_N:
+        parser.error(f'--N is limited to {SHOR_MAX_N} when simulating (use --phase to post-process a phase)')
+
+
+def _shor(args):
+    shor = load_script('shor')
+    if args.phase is not None:
+        r, guess = shor.factor_from_phase(args.phase, args.a, args.N)
+        print(f"Order guess: {r}")
+        print(f"Non-trivial factor found: {guess}" if guess else "No factor from this phase")
+        return
+    shor.factor(a=args.a, N=args.N, precision=args.precision, shots=args.shots, iterative=args.iterative,
+                approximation_degree=args.approximation_degree)
+
+
+def _chsh(args):
+    print(load_script('chsh').winning_chance(args.strategy, games=args.games, batched=args.batched))
+
+
+def _superdense(args):
+    print(load_script('superdense').superdense_coding(args.bits))
+
+
+def _qpe(args):
+    if args.variant == 'general':
+        print(load_script('qpe').phase_estimation(args.phi, precision=args.precision, iterative=args.iterative,
+                                                  approximation_degree=args.approximation_degree))
+    else:
+        print(load_script('qpe-' + args.variant).phase_estimation(args.phi))
+
+
+def build_parser():
+    """
+    Builds the argument parser for the command-line entry point.
+
+    Returns:
+        parser (argparse.ArgumentParser): parser with one subcommand per algorithm
+    """
+    parser = argparse.ArgumentParser(prog='python -m uqic', description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--trace', metavar='FILE', help='write a Chrome trace of the run to FILE')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('deutsch', help="Deutsch's algorithm on one of the four functions {0,1} -> {0,1}")
+    command.add_argument('function', choices=['1', '2', '3', '4'])
+    command.set_defaults(run=_deutsch)
+
+    command = commands.add_parser('deutsch-jozsa', help='Deutsch-Jozsa algorithm with a random query gate')
+    command.add_argument('n', type=int)
+    command.add_argument('--draw', action='store_true', help='print the circuit')
+    command.set_defaults(run=_deutsch_jozsa)
+
+    command = commands.add_parser('simon', help="Simon's algorithm for a hidden binary string")
+    command.add_argument('string')
+    command.set_defaults(run=_simon)
+
+    command = commands.add_parser('shor', help="Shor's algorithm (hard-coded gates for N=15, synthesised otherwise)")
+    command.add_argument('--a', type=int, default=8, help='base, coprime to N')
+    command.add_argument('--N', type=int, default=15, help=f'number to factor, up to {SHOR_MAX_N}')
+    command.add_argument('--precision', type=int, default=8)
+    command.add_argument('--shots', type=int, default=64, help='shots per job (1 retries single-shot runs)')
+    command.add_argument('--phase', type=float, help='only post-process this phase estimate classically')
+    command.add_argument('--iterative', action='store_true', help='estimate phases with one reused control qubit')
+    command.add_argument('--approximation-degree', type=_approximation_degree, default=0, metavar='DEGREE',
+                         help="inverse QFT rotation angles to drop, or 'auto'")
+    command.set_defaults(run=_shor)
+
+    command = commands.add_parser('chsh', help='CHSH game win rate for a strategy')
+    command.add_argument('strategy', choices=['quantum', 'classical', 'random_quantum', 'random_classical'])
+    command.add_argument('--games', type=int, default=1000)
+    command.add_argument('--batched', action='store_true', help='sample all games from exact distributions')
+    command.set_defaults(run=_chsh)
+
+    command = commands.add_parser('superdense', help='superdense coding of a two-bit message')
+    command.add_argument('bits')
+    command.set_defaults(run=_superdense)
+
+    command = commands.add_parser('qpe', help='phase estimation of a phase gate')
+    command.add_argument('phi', type=float)
+    command.add_argument('--precision', type=int, default=3)
+    command.add_argument('--variant', choices=['general', '2-qubits', 'low-precision'], default='general')
+    command.add_argument('--iterative', action='store_true',
+                         help='use one control qubit with mid-circuit measurement (precision up to 52)')
+    command.add_argument('--approximation-degree', type=_approximation_degree, default=0, metavar='DEGREE',
+                         help="inverse QFT rotation angles to drop, or 'auto'")
+    command.set_defaults(run=_qpe)
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == 'shor':
+        _check_shor(parser, args)
+    if not args.trace:
+        args.run(args)
+        return
+
+    if ROOT not in sys.path:
+        sys.path.append(ROOT)
+    import tracing
+
+    recorder = tracing.enable()
+    try:
+        with tracing.span(args.command):
+            args.run(args)
+    finally:
+        tracing.disable(recorder)
+        recorder.write_chrome_trace(args.trace)
+        print(recorder.summary(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()